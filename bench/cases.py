@@ -0,0 +1,220 @@
+# bench/cases.py
+# Firmware hot paths, each set up on a fresh simulated board.
+#
+# A case is a setup function taking a Board and returning the operation to
+# time. Keep the names in sync with bench/device_bench.py so host and
+# device results line up.
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from hal_sim import FlashFS, Hal, SSD1306Panel, is_firmware_module
+
+PASSWORD = "Tr0ub4dor&3"
+PASSPHRASE = "correct-horse-battery-staple-42x"
+MASTER = "correct horse battery staple"
+SERVICE = "github.com"
+
+CASES = {}
+
+
+def case(name, iterations=50):
+    def register(setup):
+        CASES[name] = (setup, iterations)
+        return setup
+    return register
+
+
+class Board:
+    """A fresh Hal with its own flash directory and console."""
+
+    def __init__(self):
+        self.hal = Hal()
+        self.fs = FlashFS(tempfile.mkdtemp(prefix="picopass-bench-"))
+        self.console = self.hal.console()
+
+    def firmware(self, name):
+        """Import a firmware module against this board."""
+        module = self.hal.import_firmware(name)
+        for loaded in list(sys.modules.values()):
+            if is_firmware_module(loaded):
+                self.fs.attach(loaded)
+        return module
+
+    def crypto(self):
+        crypto = self.firmware("crypto").AESCrypto("E6605838834C2A2F")
+        crypto.derive_key(MASTER)
+        return crypto
+
+
+# ---- storage ---------------------------------------------------------------
+
+def _vault(board):
+    crypto = board.crypto()
+    return {
+        "master_hash": crypto.hash_password(MASTER),
+        "slots": [crypto.encrypt(PASSWORD) for _ in range(4)],
+        "timeout": 120,
+    }
+
+
+@case("storage_save")
+def storage_save(board):
+    storage = board.firmware("storage").PasswordStorage()
+    data = _vault(board)
+    return lambda: storage.save(data)
+
+
+@case("storage_load")
+def storage_load(board):
+    storage = board.firmware("storage").PasswordStorage()
+    storage.save(_vault(board))
+    return storage.load
+
+
+# ---- crypto ----------------------------------------------------------------
+
+@case("kdf", iterations=200)
+def kdf(board):
+    crypto = board.crypto()
+
+    def derive():
+        crypto.clear_key_cache()
+        crypto.derive_key(MASTER)
+    return derive
+
+
+@case("encrypt")
+def encrypt(board):
+    crypto = board.crypto()
+    return lambda: crypto.encrypt(PASSWORD)
+
+
+@case("decrypt")
+def decrypt(board):
+    crypto = board.crypto()
+    blob = crypto.encrypt(PASSWORD)
+    return lambda: crypto.decrypt(blob)
+
+
+# ---- serial commands ---------------------------------------------------------
+
+@case("command_parse", iterations=200)
+def command_parse(board):
+    serial = board.firmware("serial_protocol").SerialProtocol()
+    line = '{"type": "TYPE_PASSWORD", "slot": 2}\n'
+
+    def parse():
+        board.console.feed(line)
+        serial.read_command()
+    return parse
+
+
+@case("command_dispatch", iterations=200)
+def command_dispatch(board):
+    device = board.firmware("main").PicoPassDevice()
+    command = {"type": "STATUS"}
+    return lambda: device.handle_serial_command(command)
+
+
+@case("line_dispatch", iterations=200)
+def line_dispatch(board):
+    device = board.firmware("device").PicoPassDevice()
+
+    def dispatch():
+        board.console.feed("VERSION\n")
+        device.handle_serial()
+    return dispatch
+
+
+# ---- HID -------------------------------------------------------------------
+
+@case("hid_type", iterations=20)
+def hid_type(board):
+    keyboard = board.firmware("hid_keyboard").USBKeyboard()
+    return lambda: keyboard.type_string(PASSWORD)
+
+
+@case("hid_type_32", iterations=20)
+def hid_type_32(board):
+    keyboard = board.firmware("hid_keyboard").USBKeyboard()
+    return lambda: keyboard.type_string(PASSPHRASE)
+
+
+@case("hid_type_line", iterations=20)
+def hid_type_line(board):
+    hid = board.firmware("device").PicoPassHID()
+    return lambda: hid.type_text(PASSWORD)
+
+
+@case("ble_type_32", iterations=20)
+def ble_type_32(board):
+    # Notification rate: the fake BLE stamps every gatts_notify on the
+    # virtual clock, so virtual_us is the time to notify the whole passphrase
+    # at a 7.5 ms connection interval.
+    keyboard = board.firmware("ble_hid").BLEKeyboard()
+    board.hal.ble.connect(conn_handle=1, interval_us=7500)
+    board.hal.ble.update_connection(1, 7500)
+    return lambda: keyboard.type_text(PASSPHRASE)
+
+
+# ---- buttons ---------------------------------------------------------------
+
+@case("button_scan", iterations=500)
+def button_scan(board):
+    buttons = board.firmware("button_handler").ButtonHandler()
+    return buttons.check_buttons
+
+
+# ---- LEDs ------------------------------------------------------------------
+
+@case("led_frame", iterations=500)
+def led_frame(board):
+    # One animation frame, as the LED timer callback runs it
+    leds = board.firmware("led_controller").LEDController()
+    leds.engine.play(sys.modules["led_engine"].breathe(0, 560, 3))
+    return leds.engine._tick
+
+
+# ---- instrumentation -------------------------------------------------------
+
+@case("metrics_probe", iterations=500)
+def metrics_probe(board):
+    metrics = board.firmware("metrics")
+    return metrics.timed(metrics.DISPATCH)(lambda: None)
+
+
+@case("trace_record", iterations=500)
+def trace_record(board):
+    tracebuf = board.firmware("tracebuf")
+    return lambda: tracebuf.record(tracebuf.HID_KEY, 0x41)
+
+
+# ---- display ---------------------------------------------------------------
+
+@case("display_blit", iterations=20)
+def display_blit(board):
+    # Two different layouts in turn: most pages change on every frame
+    board.hal.attach_i2c(0x3C, SSD1306Panel())
+    display = board.firmware("display_manager").PicoPassDisplay()
+    screens = [("READY", "Unlocked", SERVICE), ("LOCKED", "Device Locked", "")]
+
+    def blit():
+        screens.reverse()
+        display.show_status(*screens[0])
+    return blit
+
+
+@case("display_update", iterations=20)
+def display_update(board):
+    # Status line alternating under the same header: dirty pages only
+    board.hal.attach_i2c(0x3C, SSD1306Panel())
+    display = board.firmware("display_manager").PicoPassDisplay()
+    screens = [("TYPING", "Typing...", SERVICE), ("TYPING", "Typed!", SERVICE)]
+
+    def update():
+        screens.reverse()
+        display.show_status(*screens[0])
+    return update
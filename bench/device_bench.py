@@ -0,0 +1,148 @@
+# bench/device_bench.py
+# On-device half of the benchmark suite (MicroPython).
+#   mpremote run bench/device_bench.py      (or: python bench/run.py --target device)
+#
+# Needs the firmware modules already on the board's flash. Prints one
+# "BENCH {json}" line per case; names match bench/cases.py. Cases that read
+# the console cannot feed it here, so they time the same work without the
+# stdin step. HID cases type into whatever window has focus on the host and
+# are off unless RUN_HID is set.
+
+import gc
+import json
+import os
+import time
+
+RUN_HID = False
+
+PASSWORD = "Tr0ub4dor&3"
+PASSPHRASE = "correct-horse-battery-staple-42x"
+MASTER = "correct horse battery staple"
+SERVICE = "github.com"
+BENCH_FILE = "/bench_data.json"
+
+
+def measure(name, op, iterations=50):
+    op()
+    samples = []
+    for _ in range(iterations):
+        t0 = time.ticks_us()
+        op()
+        samples.append(time.ticks_diff(time.ticks_us(), t0))
+    samples.sort()
+    gc.collect()
+    print("BENCH " + json.dumps({
+        "name": name,
+        "iterations": iterations,
+        "device_us": samples[len(samples) // 2],
+        "device_min_us": samples[0],
+    }))
+
+
+def bench_crypto():
+    from crypto import AESCrypto
+    crypto = AESCrypto("E6605838834C2A2F")
+    crypto.derive_key(MASTER)
+
+    def derive():
+        crypto.clear_key_cache()
+        crypto.derive_key(MASTER)
+
+    measure("kdf", derive, 200)
+    measure("encrypt", lambda: crypto.encrypt(PASSWORD))
+    blob = crypto.encrypt(PASSWORD)
+    measure("decrypt", lambda: crypto.decrypt(blob))
+    return crypto
+
+
+def bench_storage(crypto):
+    from storage import PasswordStorage
+    storage = PasswordStorage(BENCH_FILE)
+    data = {
+        "master_hash": crypto.hash_password(MASTER),
+        "slots": [crypto.encrypt(PASSWORD) for _ in range(4)],
+        "timeout": 120,
+    }
+    try:
+        measure("storage_save", lambda: storage.save(data), 20)
+        measure("storage_load", storage.load)
+    finally:
+        storage.delete()
+
+
+def bench_commands():
+    line = '{"type": "TYPE_PASSWORD", "slot": 2}'
+    measure("command_parse", lambda: json.loads(line), 200)
+
+    import main
+    device = main.PicoPassDevice()
+    device.serial.send_response = lambda data: json.dumps(data)
+    command = {"type": "STATUS"}
+    measure("command_dispatch", lambda: device.handle_serial_command(command), 200)
+    return device
+
+
+def bench_hid():
+    from hid_keyboard import USBKeyboard
+    keyboard = USBKeyboard()
+    measure("hid_type", lambda: keyboard.type_string(PASSWORD), 5)
+    measure("hid_type_32", lambda: keyboard.type_string(PASSPHRASE), 5)
+
+
+def bench_buttons():
+    from button_handler import ButtonHandler
+    buttons = ButtonHandler()
+    measure("button_scan", buttons.check_buttons, 500)
+
+
+def bench_leds():
+    import led_engine
+    from led_controller import LEDController
+    leds = LEDController()
+    leds.engine.play(led_engine.breathe(0, 560, 3))
+    measure("led_frame", leds.engine._tick, 500)
+    leds.all_off()
+
+
+def bench_metrics():
+    # Cost of one timed() probe; compare with the 10 ms main loop period
+    import metrics
+    measure("metrics_probe", metrics.timed(metrics.DISPATCH)(lambda: None), 500)
+    import tracebuf
+    measure("trace_record", lambda: tracebuf.record(tracebuf.HID_KEY, 0x41), 500)
+
+
+def bench_display():
+    from display_manager import PicoPassDisplay
+    display = PicoPassDisplay()
+    if not display.active:
+        print("! No display, skipping display_blit")
+        return
+    layouts = [("READY", "Unlocked", SERVICE), ("LOCKED", "Device Locked", "")]
+
+    def blit():
+        layouts.reverse()
+        display.show_status(*layouts[0])
+    measure("display_blit", blit, 20)
+    screens = [("TYPING", "Typing...", SERVICE), ("TYPING", "Typed!", SERVICE)]
+
+    def update():
+        screens.reverse()
+        display.show_status(*screens[0])
+    measure("display_update", update, 20)
+
+
+def run():
+    print("PicoPass device benchmarks ({})".format(os.uname().machine))
+    crypto = bench_crypto()
+    bench_storage(crypto)
+    bench_commands()
+    bench_buttons()
+    bench_leds()
+    bench_metrics()
+    bench_display()
+    if RUN_HID:
+        bench_hid()
+
+
+run()
@@ -0,0 +1,233 @@
+# bench/run.py
+# Firmware benchmark runner with regression thresholds.
+#
+#   python bench/run.py                        # CPython + hal_sim, vs baseline
+#   python bench/run.py --only kdf,encrypt --output results.json
+#   python bench/run.py --update-baseline      # accept current numbers
+#   python bench/run.py --target device --port /dev/ttyACM0   # via mpremote
+#
+# On CPython every case reports two numbers: host_us (best wall time of the
+# Python code, machine-dependent) and virtual_us (time the firmware spends
+# in sleeps and bus transfers on the virtual clock, deterministic). On a
+# board, device_us is the median measured with ticks_us. Only the stable
+# metrics are checked by default; add --threshold host_us=PCT on a quiet,
+# fixed CI machine to gate host time too.
+#
+# Exit status: 0 ok, 1 regression against the baseline, 2 usage/run error.
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEVICE_SCRIPT = os.path.join(BENCH_DIR, "device_bench.py")
+
+METRICS = ("virtual_us", "device_us", "host_us")
+# metric -> default regression threshold (%)
+THRESHOLDS = {"virtual_us": 10.0, "device_us": 20.0}
+# Differences below this many microseconds are never regressions
+NOISE_FLOOR_US = 5.0
+
+
+@contextlib.contextmanager
+def _console(stream):
+    """Firmware stdin/stdout go to the board's console while a case runs."""
+    saved = sys.stdin, sys.stdout
+    sys.stdin = sys.stdout = stream
+    try:
+        yield
+    finally:
+        sys.stdin, sys.stdout = saved
+
+
+def run_case(name, iterations=None):
+    """Run one case on a fresh board; returns its result dict."""
+    from cases import CASES, Board
+
+    setup, default_iterations = CASES[name]
+    iterations = iterations or default_iterations
+    board = Board()
+    clock = board.hal.clock
+    host, virtual = [], 0
+    with _console(board.console):
+        op = setup(board)
+        op()  # warm-up: first-call imports and caches
+        for _ in range(iterations):
+            board.console.output.clear()
+            v0 = clock.now_us()
+            t0 = time.perf_counter_ns()
+            op()
+            host.append((time.perf_counter_ns() - t0) / 1000)
+            virtual += clock.now_us() - v0
+    return {
+        "iterations": iterations,
+        "host_us": round(min(host), 1),
+        "host_median_us": round(statistics.median(host), 1),
+        "virtual_us": round(virtual / iterations, 1),
+    }
+
+
+def run_cpython(names, iterations=None):
+    return {name: run_case(name, iterations) for name in names}
+
+
+def run_device(names, port=None, mpremote="mpremote"):
+    """Run bench/device_bench.py on a board through mpremote."""
+    cmd = [mpremote]
+    if port:
+        cmd += ["connect", port]
+    cmd += ["run", DEVICE_SCRIPT]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"mpremote failed: {proc.stderr.strip() or proc.stdout.strip()}")
+    results = parse_device_output(proc.stdout)
+    return {name: results[name] for name in names if name in results}
+
+
+def parse_device_output(text):
+    """Collect the `BENCH {json}` lines printed by device_bench.py."""
+    results = {}
+    for line in text.splitlines():
+        if line.startswith("BENCH "):
+            entry = json.loads(line[6:])
+            results[entry.pop("name")] = entry
+    return results
+
+
+def compare(results, baseline, thresholds):
+    """Return a list of regressions: (case, metric, baseline, current, pct)."""
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        reference = baseline.get(name, {})
+        for metric, limit in thresholds.items():
+            if metric not in metrics or metric not in reference:
+                continue
+            old, new = reference[metric], metrics[metric]
+            if new - old <= NOISE_FLOOR_US:
+                continue
+            pct = 100.0 * (new - old) / old if old else float("inf")
+            if pct > limit:
+                regressions.append((name, metric, old, new, pct))
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, target, results):
+    baseline = load_baseline(path)
+    section = baseline.setdefault(target, {})
+    for name, metrics in results.items():
+        section[name] = {k: v for k, v in metrics.items() if k in METRICS}
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _parse_thresholds(values):
+    thresholds = dict(THRESHOLDS)
+    for value in values or ():
+        metric, _, pct = value.rpartition("=")
+        if metric:
+            if metric not in METRICS:
+                raise ValueError(f"unknown metric: {metric}")
+            thresholds[metric] = float(pct)
+        else:
+            # a bare number applies to the deterministic metrics
+            thresholds["virtual_us"] = thresholds["device_us"] = float(pct)
+    return thresholds
+
+
+def _table(target, results, baseline, out):
+    metric = "device_us" if target == "device" else "virtual_us"
+    print(f"{'case':<18}{'host_us':>12}{metric:>14}{'baseline':>14}", file=out)
+    for name, metrics in results.items():
+        reference = baseline.get(name, {}).get(metric, "-")
+        print(f"{name:<18}{metrics.get('host_us', '-'):>12}{metrics.get(metric, '-'):>14}"
+              f"{reference:>14}", file=out)
+
+
+def main(argv=None):
+    sys.path.insert(0, BENCH_DIR)
+    from cases import CASES
+
+    parser = argparse.ArgumentParser(description="PicoPass firmware benchmarks")
+    parser.add_argument("--target", choices=("cpython", "device"), default="cpython")
+    parser.add_argument("--only", help="comma-separated case names")
+    parser.add_argument("--iterations", type=int, help="override per-case iteration counts")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", action="append", metavar="[METRIC=]PCT",
+                        help="regression threshold in percent "
+                             f"(defaults: {', '.join(f'{k}={v:g}' for k, v in THRESHOLDS.items())})")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--port", help="serial port for --target device")
+    parser.add_argument("--mpremote", default="mpremote")
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, iterations) in CASES.items():
+            print(f"{name} ({iterations} iterations)")
+        return 0
+
+    names = args.only.split(",") if args.only else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+    try:
+        thresholds = _parse_thresholds(args.threshold)
+        if args.target == "device":
+            results = run_device(names, args.port, args.mpremote)
+        else:
+            results = run_cpython(names, args.iterations)
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 2
+
+    baseline = load_baseline(args.baseline).get(args.target, {})
+    regressions = [] if args.update_baseline else compare(results, baseline, thresholds)
+    report = {
+        "target": args.target,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "thresholds": thresholds,
+        "results": results,
+        "regressions": [
+            {"case": c, "metric": m, "baseline": old, "current": new, "pct": round(pct, 1)}
+            for c, m, old, new, pct in regressions
+        ],
+    }
+
+    _table(args.target, results, baseline, sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, args.target, results)
+        print(f"✓ Baseline updated: {args.baseline}", file=sys.stderr)
+        return 0
+    for c, m, old, new, pct in regressions:
+        print(f"✗ {c}.{m}: {old} -> {new} (+{pct:.1f}%)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
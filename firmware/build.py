@@ -12,10 +12,14 @@ def build_micropython():
         shutil.rmtree(build_dir)
     os.makedirs(build_dir)
     
-    # Copy all .py files
+    # Copy all .py files and packages (lib/, layouts/)
     for item in os.listdir(src_dir):
+        path = os.path.join(src_dir, item)
         if item.endswith(".py"):
-            shutil.copy(os.path.join(src_dir, item), build_dir)
+            shutil.copy(path, build_dir)
+        elif os.path.isdir(path) and item != "__pycache__":
+            shutil.copytree(path, os.path.join(build_dir, item),
+                            ignore=shutil.ignore_patterns("__pycache__"))
             
     # Create zip
     zip_name = os.path.join(base_dir, "builds/picopass_micropython_v0.1.0")
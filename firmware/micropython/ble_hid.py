@@ -1,12 +1,34 @@
 # firmware/micropython/ble_hid.py
+# Vazão: os reports saem em lotes de NOTIFY_BATCH notificações por evento
+# de conexão, com a pausa entre lotes igual ao intervalo de conexão que a
+# central escolheu (_IRQ_CONNECTION_UPDATE). O MicroPython não tem como o
+# periférico pedir outro intervalo depois de conectado, então o intervalo
+# preferido (7,5-15 ms) vai no advertising (AD 0x12), que os hosts usam ao
+# conectar. Desconectado, anuncia rápido por ADV_FAST_MS e depois cai para
+# o intervalo lento para economizar energia.
 import bluetooth
 import struct
+from machine import Timer
 from micropython import const
+import hid_keymap
+import timers
+import typing_profile
+from typing_engine import TypingEngine
 
 # --- BLE Constants ---
 _IRQ_CENTRAL_CONNECT = const(1)
 _IRQ_CENTRAL_DISCONNECT = const(2)
 _IRQ_GATTS_WRITE = const(3)
+_IRQ_CONNECTION_UPDATE = const(27)
+
+# --- Throughput / energia ---
+NOTIFY_BATCH = const(4)           # notificações por evento de conexão
+CONN_INTERVAL_MIN = const(6)      # 7,5 ms (unidades de 1,25 ms)
+CONN_INTERVAL_MAX = const(12)     # 15 ms
+DEFAULT_INTERVAL_MS = const(30)   # até a central informar o intervalo real
+ADV_FAST_US = const(30000)
+ADV_SLOW_US = const(1000000)
+ADV_FAST_MS = const(30000)        # anúncio rápido após boot/desconexão
 
 # --- HID Service & Characteristics ---
 _HID_SERVICE_UUID = bluetooth.UUID(0x1812)
@@ -19,7 +41,7 @@ _HID_CONTROL_POINT_UUID = bluetooth.UUID(0x2A4C)
 _REPORT_MAP = b'\x05\x01\x09\x06\xa1\x01\x85\x01\x05\x07\x19\xe0\x29\xe7\x15\x00\x25\x01\x75\x01\x95\x08\x81\x02\x95\x01\x75\x08\x81\x01\x95\x05\x75\x01\x05\x08\x19\x01\x29\x05\x91\x02\x95\x01\x75\x03\x91\x01\x95\x06\x75\x08\x15\x00\x25d\x05\x07\x19\x00\x29d\x81\x00\xc0'
 
 class BLEKeyboard:
-    def __init__(self, name="PicoPass-Pro"):
+    def __init__(self, name="PicoPass-Pro", layout=hid_keymap.US):
         self._ble = bluetooth.BLE()
         self._ble.active(True)
         self._ble.irq(self._irq)
@@ -28,7 +50,13 @@ class BLEKeyboard:
         self._handle_report, self._handle_report_map = self._register_services()
         
         self._conn_handle = None
+        self._report = bytearray(8)  # reutilizado em cada notify
+        # NOTIFY_BATCH notificações e então um intervalo de conexão
+        self.profile = typing_profile.TypingProfile("ble", DEFAULT_INTERVAL_MS, DEFAULT_INTERVAL_MS)
+        self.engine = TypingEngine(self.send_raw, self.profile, layout, batch=NOTIFY_BATCH)
+        self.conn_interval_us = None
         self._payload = self._advertising_payload(name=name, appearance=const(0x03C1))
+        self._adv_timer = timers.one_shot()
         self._advertise()
 
     def _register_services(self):
@@ -49,14 +77,35 @@ class BLEKeyboard:
     def _irq(self, event, data):
         if event == _IRQ_CENTRAL_CONNECT:
             self._conn_handle, _, _ = data
+            self._adv_timer.deinit()
             print("BLE Connected")
         elif event == _IRQ_CENTRAL_DISCONNECT:
             self._conn_handle = None
+            self.conn_interval_us = None
+            self.engine.cancel()
+            self._set_interval_ms(DEFAULT_INTERVAL_MS)
             print("BLE Disconnected")
             self._advertise()
+        elif event == _IRQ_CONNECTION_UPDATE:
+            conn_handle, interval, _, _, status = data
+            if conn_handle == self._conn_handle and not status:
+                self.conn_interval_us = interval * 1250
+                self._set_interval_ms((self.conn_interval_us + 999) // 1000)
+
+    def _set_interval_ms(self, ms):
+        # Perfil compartilhado com o engine: vale já para a digitação em curso
+        self.profile.key_ms = ms
+        self.profile.release_ms = ms
 
-    def _advertise(self, interval_us=100000):
+    def _advertise(self, interval_us=ADV_FAST_US):
         self._ble.gap_advertise(interval_us, adv_data=self._payload)
+        if interval_us == ADV_FAST_US:
+            self._adv_timer.init(mode=Timer.ONE_SHOT, period=ADV_FAST_MS,
+                                 callback=self._advertise_slow)
+
+    def _advertise_slow(self, timer=None):
+        if not self.is_connected():
+            self._advertise(ADV_SLOW_US)
 
     def _advertising_payload(self, name=None, appearance=0):
         payload = bytearray()
@@ -68,6 +117,8 @@ class BLEKeyboard:
         _append(const(0x01), struct.pack("B", 0x06))
         if name: _append(const(0x09), name.encode())
         if appearance: _append(const(0x19), struct.pack("<H", appearance))
+        # Peripheral Connection Interval Range: intervalo curto preferido
+        _append(const(0x12), struct.pack("<HH", CONN_INTERVAL_MIN, CONN_INTERVAL_MAX))
         return payload
 
     def is_connected(self):
@@ -76,28 +127,35 @@ class BLEKeyboard:
     def send_report(self, modifier, keycodes):
         if not self.is_connected(): return
         # HID Keyboard Report: [Modifier, Reserved, Key1, Key2, Key3, Key4, Key5, Key6]
-        report = bytearray(8)
+        report = self._report
+        hid_keymap.release(report)
         report[0] = modifier
         for i, code in enumerate(keycodes[:6]):
             report[i+2] = code
         self._ble.gatts_notify(self._conn_handle, self._handle_report, report)
 
-    def type_text(self, text):
+    def send_raw(self, report):
+        """Notifica um report de 8 bytes já montado."""
         if not self.is_connected(): return
-        # Simple char to HID mapping (basic subset)
-        mapping = {
-            'a': 0x04, 'b': 0x05, 'c': 0x06, 'd': 0x07, 'e': 0x08, 'f': 0x09, 'g': 0x0a, 'h': 0x0b, 
-            'i': 0x0c, 'j': 0x0d, 'k': 0x0e, 'l': 0x0f, 'm': 0x10, 'n': 0x11, 'o': 0x12, 'p': 0x13,
-            'q': 0x14, 'r': 0x15, 's': 0x16, 't': 0x17, 'u': 0x18, 'v': 0x19, 'w': 0x1a, 'x': 0x1b,
-            'y': 0x1c, 'z': 0x1d, '1': 0x1e, '2': 0x1f, '3': 0x20, '4': 0x21, '5': 0x22, '6': 0x23,
-            '7': 0x24, '8': 0x25, '9': 0x26, '0': 0x27, '\n': 0x28, ' ': 0x2c, '-': 0x2d, '=': 0x2e
-        }
-        for char in text:
-            code = mapping.get(char.lower(), 0)
-            if code:
-                mod = 0x02 if char.isupper() else 0
-                self.send_report(mod, [code])
-                import utime
-                utime.sleep_ms(10)
-                self.send_report(0, [])
-                utime.sleep_ms(10)
+        self._ble.gatts_notify(self._conn_handle, self._handle_report, report)
+
+    def type_text(self, text, layout=None):
+        """Digita text (bloqueia até terminar)."""
+        if self.start_typing(text, layout=layout):
+            self.engine.wait()
+
+    def start_typing(self, text, on_done=None, layout=None):
+        """Começa a digitar em segundo plano; False se desconectado."""
+        if not self.is_connected(): return False
+        try:
+            self.engine.start(text, on_done=on_done, layout=layout)
+        except Exception as e:
+            print(f"BLE HID error: {e}")
+            return False
+        return True
+
+    def cancel_typing(self):
+        return self.engine.cancel()
+
+    def is_typing(self):
+        return self.engine.busy()
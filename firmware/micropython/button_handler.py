@@ -1,133 +1,243 @@
 # firmware/micropython/button_handler.py
+# Botões por interrupção: IRQ de pino -> fila de eventos -> debounce
+#
+# Cada borda (descida e subida) de cada botão dispara uma IRQ que grava
+# (ticks_ms, botão, nível) num ring buffer pré-alocado; o handler não
+# aloca nem faz debounce. check_buttons() consome a fila e aplica o
+# debounce pelos timestamps das bordas, então a latência de um press não
+# depende do período do loop e nada é lido dos pinos a cada iteração.
+#
+# No RP2040/RP2350 o debounce pode ir para o PIO: uma state machine por
+# botão amostra o pino e só empurra o nível no RX FIFO depois de
+# PIO_SAMPLES amostras iguais seguidas (debounce integrador, PIO_DEBOUNCE_MS
+# no total). A IRQ da state machine esvazia o FIFO na mesma fila de bordas,
+# já limpas, então o Python não compara ticks por borda e o tempo do
+# debounce não depende de o Python estar ocupado. Sem rp2.PIO, ou com alguma
+# das state machines reservada por outro driver (pio_sm), fica o caminho por
+# IRQ de pino + debounce em software.
 
 from machine import Pin
+from array import array
 import time
+import pio_sm
+import tracebuf
+
+# 15: Unlock/Lock, 14-11: Slots 1-4
+BUTTON_GPIOS = (15, 14, 13, 12, 11)
+QUEUE_SIZE = 32  # bordas; cada press com bounce gera algumas
+
+# Debounce no PIO: state machines PIO_SM_BASE.. (uma por botão)
+PIO_SM_BASE = 0
+PIO_DEBOUNCE_MS = 10
+PIO_SAMPLES = 32        # set(x, 31) + jmp(x_dec) -> 32 amostras
+PIO_SAMPLE_CYCLES = 8   # jmp(pin) + jmp(x_dec) [6]
+
+try:
+    import rp2
+
+    @rp2.asm_pio(fifo_join=rp2.PIO.JOIN_RX)
+    def _debounce_program():
+        # Nível baixo estável: 32 amostras altas seguidas viram borda
+        wrap_target()
+        label("low")
+        set(x, 31)
+        label("low_loop")
+        jmp(pin, "low_count")
+        jmp("low")                      # voltou a baixo: recomeça a contar
+        label("low_count")
+        jmp(x_dec, "low_loop")  [6]
+        in_(pins, 1)
+        push(noblock)
+        irq(rel(0))
+        # Nível alto estável: o mesmo para 32 amostras baixas
+        label("high")
+        set(x, 31)
+        label("high_loop")
+        jmp(pin, "high")                # ainda alto: recomeça a contar
+        jmp(x_dec, "high_loop")  [6]
+        in_(pins, 1)
+        push(noblock)
+        irq(rel(0))
+        wrap()
+except (ImportError, AttributeError):
+    _debounce_program = None  # sem PIO: debounce em software
+
+
+class EventQueue:
+    """Ring buffer de bordas (ticks_ms, botão, nível) escrito pela IRQ."""
+
+    def __init__(self, size=QUEUE_SIZE):
+        self.size = size
+        self.times = array('I', [0] * size)
+        self.codes = bytearray(size)  # botão << 1 | nível
+        self.head = 0  # próxima escrita (IRQ)
+        self.tail = 0  # próxima leitura (loop)
+        self.dropped = 0
+
+    def push(self, t, button, level):
+        """Chamado na IRQ: não aloca. Fila cheia descarta a borda."""
+        head = self.head
+        nxt = (head + 1) % self.size
+        if nxt == self.tail:
+            self.dropped += 1
+            return
+        self.times[head] = t
+        self.codes[head] = button << 1 | level
+        self.head = nxt
+
+    def pop(self):
+        """(t, botão, nível) mais antigo, ou None se vazia."""
+        tail = self.tail
+        if tail == self.head:
+            return None
+        code = self.codes[tail]
+        t = self.times[tail]
+        self.tail = (tail + 1) % self.size
+        return t, code >> 1, code & 1
+
+    def __len__(self):
+        return (self.head - self.tail) % self.size
+
+    def clear(self):
+        self.tail = self.head
+
 
 class ButtonHandler:
     """Gerenciador de botões com debounce e long press"""
-    
-    def __init__(self):
-        # Botões (pull-up interno, ativo em LOW)
-        # Using GPIOs from specification (15, 14, 13, 12, 11)
-        # 15: Unlock/Lock
-        # 14-11: Slots 1-4
-        self.buttons = [
-            Pin(15, Pin.IN, Pin.PULL_UP),  # Botão 0 - Unlock/Lock
-            Pin(14, Pin.IN, Pin.PULL_UP),  # Botão 1 - Senha slot 0
-            Pin(13, Pin.IN, Pin.PULL_UP),  # Botão 2 - Senha slot 1
-            Pin(12, Pin.IN, Pin.PULL_UP),  # Botão 3 - Senha slot 2
-            Pin(11, Pin.IN, Pin.PULL_UP),  # Botão 4 - Senha slot 3
-        ]
-        
-        # Estado dos botões
-        self.last_state = [1] * len(self.buttons)
-        self.last_change_time = [0] * len(self.buttons)
-        self.press_start_time = [0] * len(self.buttons)
-        
+
+    def __init__(self, gpios=BUTTON_GPIOS, pull=Pin.PULL_UP, active_low=True, queue_size=QUEUE_SIZE,
+                 use_pio=True):
+        # Pull-up interno e ativo em LOW por padrão
+        self.buttons = [Pin(gpio, Pin.IN, pull) for gpio in gpios]
+        self.active_low = active_low
+        self.events = EventQueue(queue_size)
+
+        # Estado dos botões (após debounce)
+        n = len(self.buttons)
+        self.pressed = bytearray(n)
+        self.unsettled = bytearray(n)  # borda ignorada no debounce
+        self.last_change_time = [0] * n
+        self.press_start_time = [0] * n
+
         # Configurações
         self.debounce_ms = 50
         self.long_press_ms = 1000  # 1 segundo
-    
-    def check_buttons(self):
-        """Verifica estado dos botões e retorna ID se pressionado"""
-        current_time = time.ticks_ms()
-        
-        for i, button in enumerate(self.buttons):
-            current_state = button.value()
-            
-            # Detectar mudança de estado
-            if current_state != self.last_state[i]:
-                # Debounce
-                if time.ticks_diff(current_time, self.last_change_time[i]) > self.debounce_ms:
-                    self.last_state[i] = current_state
-                    self.last_change_time[i] = current_time
-                    
-                    if current_state == 0:  # Pressionado (LOW)
-                        self.press_start_time[i] = current_time
-                    else: # Solto (HIGH)
-                         # Na especificação original, retornava no press.
-                         # Mas para long press, geralmente detectamos no release ou mantemos state.
-                         # O código original retornava apenas 'se for pressão curta'.
-                         # Mas wait... o código original dizia "Retornar apenas se for pressão curta" mas o if estava no press.
-                         # Se retornar no press, não sabe se é long press ainda.
-                         # O código original estava:
-                         # if current_state == 0: 
-                         #    self.press_start_time[i] = current_time
-                         #    return i 
-                         # Isso retornava IMEDIATAMENTE no press. O check de long-press seria impossível se o handler consumisse o evento.
-                         # A função 'check_buttons' deve retornar o evento.
-                         
-                         # Se eu seguir o código do usuário ESTRITAMENTE:
-                         # return i
-                         # Mas o método `is_long_press` depende de `press_start_time`.
-                         # Se eu retornar 'i' aqui, o loop principal chama `handle_button_press(i)`.
-                         # Lá ele chama `is_long_press(i)`.
-                         # `is_long_press` verifica se o botão *ainda* está pressionado e se passou o tempo.
-                         # Se eu retornar imediatamente no press (t=0), `is_long_press` vai dar False.
-                         # Então o `check_buttons` deve esperar?
-                         # Ou o `handle_button_press` bloqueia?
-                         
-                         # Vamos ver `handle_button_press` em `main.py`:
-                         # if button_id == 0: if self.buttons.is_long_press(button_id): ...
-                         
-                         # Se check_buttons retorna logo no inicio do press, duration é ~0.
-                         # Então `is_long_press` retorna False.
-                         # Para funcionar como long press, o 'check_buttons' só deve retornar quando for release?
-                         # Ou o main loop deve ficar polling o botão?
-                         
-                         # Vou ajustar levemente para ser funcional: detectar no RELEASE.
-                         # OU, manter como o user escreveu e assumir que o usuario quer ação imediata para keys normais,
-                         # e talvez o botão 0 seja especial.
-                         # Mas botão 0 só faz algo se for long press.
-                         
-                         # CORREÇÃO: Vamos detectar no RELEASE para saber a duração.
-                         # Mas o codigo original retornava no PRESS (current_state == 0).
-                         # Se eu mudar, desvio da spec.
-                         # Mas se eu não mudar, o long press do botão 0 nunca vai funcionar (vai disparar curto imediatamente).
-                         
-                         # Vou implementar detecção no RELEASE para garantir funcionalidade.
-                         pass
-                    
-                    if current_state == 1: # Release
-                         duration = time.ticks_diff(current_time, self.press_start_time[i])
-                         # Se foi um press válido
-                         if duration > self.debounce_ms:
-                             return i
-                         
+
+        # Debounce no PIO se houver; senão um handler por pino, criado uma
+        # vez (a IRQ não aloca)
+        self.machines = self._start_pio() if use_pio and _debounce_program else None
+        if self.machines is None:
+            for i, button in enumerate(self.buttons):
+                button.irq(handler=self._irq_handler(i), trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def _start_pio(self):
+        freq = PIO_SAMPLES * PIO_SAMPLE_CYCLES * 1000 // PIO_DEBOUNCE_MS
+        machines = []
+        claimed = []
+        try:
+            for i, button in enumerate(self.buttons):
+                # StateMachine() reprogramaria uma SM ocupada sem reclamar
+                pio_sm.claim(PIO_SM_BASE + i, "buttons")
+                claimed.append(PIO_SM_BASE + i)
+                sm = rp2.StateMachine(PIO_SM_BASE + i, _debounce_program, freq=freq,
+                                      in_base=button, jmp_pin=button)
+                machines.append(sm)
+                sm.irq(self._fifo_handler(i))
+        except (ValueError, OSError) as e:
+            print(f"! PIO debounce unavailable ({e}), using software")
+            for sm in machines:
+                sm.active(0)
+            for sm_id in claimed:
+                pio_sm.release(sm_id)
+            return None
+        for sm in machines:
+            sm.active(1)
+        return machines
+
+    def _fifo_handler(self, i):
+        # O PIO só empurra depois de PIO_DEBOUNCE_MS de nível estável: a
+        # borda aconteceu esse tempo antes
+        events = self.events
+        ticks_ms = time.ticks_ms
+        ticks_add = time.ticks_add
+        def handler(sm):
+            while sm.rx_fifo():
+                events.push(ticks_add(ticks_ms(), -PIO_DEBOUNCE_MS), i, sm.get())
+        return handler
+
+    def _irq_handler(self, i):
+        events = self.events
+        ticks_ms = time.ticks_ms
+        def handler(pin):
+            events.push(ticks_ms(), i, pin.value())
+        return handler
+
+    def _is_pressed(self, level):
+        return level == 0 if self.active_low else level == 1
+
+    def poll_edge(self):
+        """Próxima borda após debounce: (t, botão, pressionado) ou None."""
+        while True:
+            event = self.events.pop()
+            if event is None:
+                return self._settle()
+            t, i, level = event
+            pressed = self._is_pressed(level)
+            if pressed == self.pressed[i]:
+                continue
+            if self.machines is None and time.ticks_diff(t, self.last_change_time[i]) <= self.debounce_ms:
+                self.unsettled[i] = 1  # bounce: conferir o pino no fim da janela
+                continue
+            return self._accept(t, i, pressed)
+
+    def _settle(self):
+        # Uma borda caiu na janela de debounce: o nível final do pino decide
+        now = time.ticks_ms()
+        for i in range(len(self.unsettled)):
+            if not self.unsettled[i]:
+                continue
+            if time.ticks_diff(now, self.last_change_time[i]) <= self.debounce_ms:
+                continue
+            self.unsettled[i] = 0
+            pressed = self._is_pressed(self.buttons[i].value())
+            if pressed != self.pressed[i]:
+                return self._accept(now, i, pressed)
         return None
 
+    def _accept(self, t, i, pressed):
+        self.pressed[i] = pressed
+        self.last_change_time[i] = t
+        if pressed:
+            self.press_start_time[i] = t
+        return t, i, pressed
+
+    def check_buttons(self):
+        """Consome a fila e retorna o ID do botão solto, ou None"""
+        while True:
+            edge = self.poll_edge()
+            if edge is None:
+                return None
+            t, i, pressed = edge
+            # Retorna no release para saber a duração (long press)
+            if not pressed:
+                duration = time.ticks_diff(t, self.press_start_time[i])
+                tracebuf.record(tracebuf.BUTTON,
+                                i | (tracebuf.LONG_PRESS if duration >= self.long_press_ms else 0))
+                return i
+
     def is_long_press(self, button_id):
-        """Verifica se a última pressão foi longa"""
-        # Ajustado para checar a duração do último press registrado
-        # Como mudei para return no release, posso checar a duração baseada no start time
-        # Mas `press_start_time` é sobrescrito no próximo press.
-        # Vamos usar o tempo atual vs start time se ainda pressionado?
-        # Não, mudei para release.
-        
-        # Para ser fiel ao código original mas funcional:
-        # Codigo original: retornava no press.
-        # Main: if is_long_press(id).
-        # is_long_press: if button.value() == 0 and duration > ms.
-        
-        # Se main loop é rápido, ele chama handle -> is_long_press.
-        # is_long_press vai dar falso no início.
-        # Main loop continua. check_buttons não retorna nada pois last_state já é 0.
-        # Então `handle_button_press` só é chamado UMA VEZ por press.
-        # Então long press falha com a lógica original se retornar apenas no edge 1->0.
-        
-        # Solução Híbrida robusta:
-        # Retornar no RELEASE.
-        # E `is_long_press` checa a duração do que acabou de ser solto.
+        """Verifica se a última pressão (já solta) foi longa"""
         if button_id < 0 or button_id >= len(self.buttons):
             return False
-            
-        # Duração do último evento
-        # Note: current_time aqui pode ser um pouco depois do release
-        current_time = time.ticks_ms()
         duration = time.ticks_diff(self.last_change_time[button_id], self.press_start_time[button_id])
         return duration >= self.long_press_ms
-    
+
+    def is_pressed(self, button_id):
+        """Estado do botão após debounce"""
+        return bool(self.pressed[button_id])
+
     def wait_for_release(self, button_id):
         """Aguarda botão ser solto"""
-        while self.buttons[button_id].value() == 0:
-            time.sleep(0.01)
+        while self.is_pressed(button_id) or self.events:
+            self.poll_edge()
+            time.sleep_ms(10)
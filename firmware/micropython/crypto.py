@@ -2,6 +2,7 @@
 
 import hashlib
 import os
+import tracebuf
 
 try:
     from ucryptolib import aes
@@ -24,6 +25,7 @@ class AESCrypto:
         if self.key_cache:
             return self.key_cache
         
+        tracebuf.record(tracebuf.CRYPTO_BEGIN, tracebuf.CRYPTO_DERIVE)
         # Combinar master password + board ID como salt
         data = (master_password + self.board_id).encode()
         
@@ -33,6 +35,7 @@ class AESCrypto:
         key = hash_obj.digest()
         
         self.key_cache = key
+        tracebuf.record(tracebuf.CRYPTO_END, tracebuf.CRYPTO_DERIVE)
         return key
     
     def hash_password(self, password):
@@ -50,6 +53,7 @@ class AESCrypto:
         if not aes:
             raise Exception("AES not supported on this firmware")
             
+        tracebuf.record(tracebuf.CRYPTO_BEGIN, tracebuf.CRYPTO_ENCRYPT)
         # Gerar IV aleatório (16 bytes)
         iv = os.urandom(16)
         
@@ -65,6 +69,7 @@ class AESCrypto:
         # aes(key, mode, IV). Mode 2 = CBC
         cipher = aes(self.key_cache, 2, iv)
         ciphertext = cipher.encrypt(padded.encode())
+        tracebuf.record(tracebuf.CRYPTO_END, tracebuf.CRYPTO_ENCRYPT)
         
         # Retornar IV + ciphertext
         return {
@@ -80,12 +85,14 @@ class AESCrypto:
         if not self.key_cache:
             raise Exception("Key not derived - unlock first")
         
+        tracebuf.record(tracebuf.CRYPTO_BEGIN, tracebuf.CRYPTO_DECRYPT)
         iv = encrypted_data['iv']
         ciphertext = encrypted_data['data']
         
         # Descriptografar
         cipher = aes(self.key_cache, 2, iv)
         padded = cipher.decrypt(ciphertext)
+        tracebuf.record(tracebuf.CRYPTO_END, tracebuf.CRYPTO_DECRYPT)
         
         # Remover padding PKCS7
         # padded is bytes
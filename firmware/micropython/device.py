@@ -8,6 +8,7 @@ import sys
 import uselect
 import gc
 import json
+import binascii
 
 try:
     import rp2
@@ -16,6 +17,19 @@ except:
     HAS_RP2 = False
 
 from license import LicenseManager
+from button_handler import ButtonHandler
+from led_engine import DUTY8, Animation, LEDEngine
+from ws2812 import WS2812, grb
+import hid_keymap
+import metrics
+import timers
+import tracebuf
+import typing_profile
+from typing_engine import TypingEngine
+
+# A press still held this long after typing ended is no longer treated as
+# stale (also keeps ticks_diff far from wrapping)
+STALE_PRESS_MS = 10000
 
 # Optional imports - fail gracefully if not available
 try:
@@ -26,7 +40,7 @@ except:
     BLEKeyboard = None
 
 try:
-    from display_manager import PicoPassDisplay
+    from display_manager import DisplayService, PicoPassDisplay
     HAS_DISPLAY = True
 except:
     HAS_DISPLAY = False
@@ -36,34 +50,47 @@ except:
 class PicoPassHID:
     """USB HID Keyboard emulation."""
     
-    def __init__(self):
+    def __init__(self, profile=None, layout=hid_keymap.US):
         self.enabled = False
+        self.profile = profile or typing_profile.load()
+        self.layout = layout
         try:
             import usb_hid
             from adafruit_hid.keyboard import Keyboard
             from adafruit_hid.keycode import Keycode
             self.kbd = Keyboard(usb_hid.devices)
+            self.device = hid_keymap.find_keyboard(usb_hid.devices)
             self.Keycode = Keycode
+            self.engine = TypingEngine(self.device.send_report, self.profile, layout)
             self.enabled = True
         except:
             self.kbd = None
+            self.device = None
             self.Keycode = None
+            self.engine = None
+
+    def type_text(self, text, profile=None, layout=None):
+        """Type text using the active typing profile (blocks until done)."""
+        if self.start_typing(text, profile, layout=layout):
+            self.engine.wait()
 
-    def type_text(self, text):
-        """Type text character by character."""
+    def start_typing(self, text, profile=None, on_done=None, layout=None):
+        """Start typing in the background; False if HID is unavailable."""
         if not self.enabled or not self.kbd:
             print("HID not available, simulating type")
-            return
-        
-        from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
-        layout = KeyboardLayoutUS(self.kbd)
-        
-        for char in text:
-            try:
-                layout.write(char)
-                utime.sleep(0.02)  # Small delay between chars
-            except Exception as e:
-                print(f"HID error: {e}")
+            return False
+        try:
+            self.engine.start(text, profile or self.profile, on_done, layout)
+        except Exception as e:
+            print(f"HID error: {e}")
+            return False
+        return True
+
+    def cancel_typing(self):
+        return self.engine is not None and self.engine.cancel()
+
+    def is_typing(self):
+        return self.engine is not None and self.engine.busy()
 
 
 class PicoPassDevice:
@@ -81,10 +108,26 @@ class PicoPassDevice:
         # Store config for reference
         self.hw_config = hw_config
         
+        # One hardware timer drives every one-shot: typing, LEDs, display, BLE
+        timer_id = hw_config.get("timer_id")
+        timers.scheduler.configure(timers.DEFAULT_ID if timer_id is None else timer_id)
+        
         # GPIO Initialization with dynamic config
         led_gpio = hw_config.get("led_gpio", 25)
         self.led_inverted = hw_config.get("led_inverted", False)
-        self.led = machine.Pin(led_gpio, machine.Pin.OUT)
+        # has_rgb boards carry a WS2812 on led_gpio: lit green at led_brightness
+        self.pixel = None
+        if hw_config.get("has_rgb"):
+            try:
+                self.pixel = WS2812(led_gpio)
+                brightness = min(100, max(0, int(hw_config.get("led_brightness", 100))))
+                self.pixel_on = grb(0, DUTY8[brightness], 0)
+            except (OSError, ValueError) as e:
+                print(f"! RGB LED unavailable ({e}), using GPIO")
+        if self.pixel is None:
+            self.led = machine.Pin(led_gpio, machine.Pin.OUT)
+        # blink() runs from a timer instead of sleeping in the command path
+        self.led_engine = LEDEngine(self._write_led, 1)
         
         btn_gpio = hw_config.get("btn_gpio", 15)
         btn_pull_str = hw_config.get("btn_pull", "UP")
@@ -95,22 +138,31 @@ class PicoPassDevice:
         else:
             pull_mode = None
         
-        self.btn_action = machine.Pin(btn_gpio, machine.Pin.IN, pull_mode)
+        # Edges arrive through a pin IRQ; check_button() drains the queue
+        self.buttons = ButtonHandler((btn_gpio,), pull_mode, active_low=(btn_pull_str == "UP"))
+        self.btn_action = self.buttons.buttons[0]
+        self.bootsel_down = False
+        self.bootsel_since = 0
+        self.press_started = 0   # ticks_ms when the last completed press went down
+        self.typed_until = None  # ticks_ms of the last step spent typing
         
         # Components
-        self.hid = PicoPassHID()
+        config = self.license.config
+        layout = hid_keymap.load_layout((config or {}).get("layout"))
+        self.hid = PicoPassHID(typing_profile.select(config), layout)
         
         # Optional display
         if HAS_DISPLAY and hw_config.get("has_display", False):
             sda = hw_config.get("display_sda", 16)
             scl = hw_config.get("display_scl", 17)
-            self.display = PicoPassDisplay(scl_pin=scl, sda_pin=sda)
+            # Screens are drawn from a timer; handlers never wait on I2C
+            self.display = DisplayService(PicoPassDisplay(scl_pin=scl, sda_pin=sda))
         else:
             self.display = None
         
         # Optional BLE
         if HAS_BLE:
-            self.ble = BLEKeyboard(name="PicoPass-Pro")
+            self.ble = BLEKeyboard(name="PicoPass-Pro", layout=layout)
         else:
             self.ble = None
         
@@ -119,6 +171,11 @@ class PicoPassDevice:
         self.locked = True
         self.pending_password = None
         self.pending_service = None
+        self.pending_layout = None  # TYPE override of the device.cfg layout
+        self.calibration = None  # typing_profile.Calibrator in progress
+        self.typing_results = None  # on_done() results, one per transport
+        self.typing_engines = []  # (transport, TypingEngine) of the last run
+        self.typing_service = None
         
         # Serial Polling
         self.poll = uselect.poll()
@@ -126,19 +183,30 @@ class PicoPassDevice:
 
     def led_on(self):
         """Turn LED on (respects polarity)."""
+        if self.pixel is not None:
+            self.pixel[0] = self.pixel_on
+            self.pixel.write()
+            return
         self.led.value(0 if self.led_inverted else 1)
 
     def led_off(self):
         """Turn LED off (respects polarity)."""
+        if self.pixel is not None:
+            self.pixel[0] = 0
+            self.pixel.write()
+            return
         self.led.value(1 if self.led_inverted else 0)
 
-    def blink(self, times=1, delay=0.1):
-        """Blink LED n times."""
-        for _ in range(times):
+    def _write_led(self, channel, level):
+        if level:
             self.led_on()
-            utime.sleep(delay)
+        else:
             self.led_off()
-            utime.sleep(delay)
+
+    def blink(self, times=1, delay=0.1):
+        """Blink LED n times in the background; returns immediately."""
+        ms = int(delay * 1000)
+        self.led_engine.play(Animation([(ms, (100,)), (ms, (0,))] * times, 1))
 
     def show_status(self, title, message, extra=None):
         """Show status on display if available."""
@@ -159,6 +227,13 @@ class PicoPassDevice:
         if not line:
             return
         
+        tracebuf.record(tracebuf.CMD_BEGIN, tracebuf.command_id(line.split(":", 1)[0]))
+        self.dispatch(line)
+        tracebuf.record(tracebuf.CMD_END)
+
+    @metrics.timed(metrics.DISPATCH)
+    def dispatch(self, line):
+        """Execute one command line."""
         # PING - Device discovery
         if line == "PING":
             response = self.license.get_status_response()
@@ -190,22 +265,30 @@ class PicoPassDevice:
             except Exception as e:
                 print(f"ERROR|CONFIG_PARSE_FAILED|{e}")
         
-        # TYPE:password|service - Prepare password for typing
+        # TYPE:password|service|layout - Prepare password for typing
         elif line.startswith("TYPE:"):
             if not self.activated:
                 print("ERROR|NOT_ACTIVATED")
                 self.show_status("LOCKED", "Activate First")
                 return
             
-            # Protocol: TYPE:password_content|service_name
+            # Protocol: TYPE:password_content|service_name[|layout]
             content = line[5:]
             if '|' in content:
-                parts = content.split('|', 1)
+                parts = content.split('|', 2)
                 self.pending_password = parts[0]
                 self.pending_service = parts[1] if len(parts) > 1 else "External"
+                layout = parts[2] if len(parts) > 2 else ""
             else:
                 self.pending_password = content
                 self.pending_service = "External"
+                layout = ""
+            if layout and layout not in hid_keymap.LAYOUTS:
+                self.pending_password = None
+                self.pending_service = None
+                print(f"ERROR|UNKNOWN_LAYOUT|{layout}")
+                return
+            self.pending_layout = hid_keymap.load_layout(layout) if layout else None
             
             self.show_status("READY", "Press Button", self.pending_service)
             self.blink(2)
@@ -213,9 +296,13 @@ class PicoPassDevice:
         
         # LOCK - Lock the device
         elif line == "LOCK":
+            tracebuf.record(tracebuf.LOCK)
+            if self.cancel_typing():
+                self.typing_results = None  # OK|LOCKED is the only reply
             self.locked = True
             self.pending_password = None
             self.pending_service = None
+            self.pending_layout = None
             self.show_status("LOCKED", "Device Locked")
             print("OK|LOCKED")
         
@@ -235,61 +322,158 @@ class PicoPassDevice:
         elif line == "VERSION":
             print(f"VERSION|{self.VERSION}")
         
+        # METRICS[:RESET] - Latency and heap statistics
+        elif line == "METRICS" or line == "METRICS:RESET":
+            print(metrics.stats.as_line())
+            if line == "METRICS:RESET":
+                metrics.stats.reset()
+        
+        # TRACE_DUMP[:CLEAR] - Binary event trace (base64)
+        elif line == "TRACE_DUMP" or line == "TRACE_DUMP:CLEAR":
+            if not self.activated:
+                print("ERROR|NOT_ACTIVATED")
+                return
+            snapshot = tracebuf.buffer.snapshot()
+            print("TRACE|{}|{}|{}".format(utime.ticks_us(), tracebuf.buffer.dropped(),
+                                          binascii.b2a_base64(snapshot).decode().strip()))
+            if line == "TRACE_DUMP:CLEAR":
+                tracebuf.buffer.clear()
+        
+        # CANCEL_TYPING - Abort a password being typed
+        elif line == "CANCEL_TYPING":
+            if self.cancel_typing():
+                self.check_typing()  # the OK|TYPING_CANCELLED event
+                print("OK|CANCELLED")
+            else:
+                print("OK|NOT_TYPING")
+        
+        # CALIBRATE_TYPING[:min_ms|max_ms] - Start typing speed calibration
+        elif line == "CALIBRATE_TYPING" or line.startswith("CALIBRATE_TYPING:"):
+            if not self.hid.enabled:
+                print("ERROR|HID_NOT_AVAILABLE")
+                return
+            try:
+                bounds = [int(v) for v in line[17:].split("|")] if ":" in line else []
+                self.calibration = typing_profile.Calibrator(self.hid.profile, *bounds)
+            except (ValueError, TypeError):
+                print("ERROR|INVALID_RANGE")
+                return
+            self.show_status("CALIBRATE", "Typing test...")
+            self.type_calibration_round()
+        
+        # CALIBRATE_RESULT:count - Characters the host capture tool received
+        elif line.startswith("CALIBRATE_RESULT:"):
+            if not self.calibration:
+                print("ERROR|NOT_CALIBRATING")
+                return
+            try:
+                received = int(line[17:])
+            except ValueError:
+                print("ERROR|INVALID_COUNT")
+                return
+            if self.calibration.feed(received):
+                self.type_calibration_round()
+                return
+            profile = self.calibration.result()
+            self.calibration = None
+            if profile is None:
+                print("ERROR|CALIBRATION_FAILED")
+                self.show_status("ERROR", "Calibration Failed")
+                return
+            self.license.config = typing_profile.save(profile, self.license.config_file)
+            self.hid.profile = profile
+            print(f"OK|CALIBRATED|{profile.key_ms}|{profile.release_ms}")
+            self.show_status("SUCCESS", "Calibrated", f"{profile.key_ms} ms")
+        
         else:
             print(f"ERROR|UNKNOWN_COMMAND|{line}")
 
+    def type_calibration_round(self):
+        """Announce the probe delay, then type the test text."""
+        probe = self.calibration.probe()
+        print(f"CALIBRATE|{probe.key_ms}|{typing_profile.TEST_TEXT}")
+        self.hid.type_text(typing_profile.TEST_TEXT + "\n", probe)
+
     def check_button(self):
-        """Check if action button is pressed."""
-        # Check external button (active low for PULL_UP)
-        pull = self.hw_config.get("btn_pull", "UP")
-        if pull == "UP":
-            button_pressed = not self.btn_action.value()
-        else:
-            button_pressed = self.btn_action.value()
-        
-        # Also check BOOTSEL button on RP2 boards
-        bootsel_pressed = False
+        """True once per completed press (on release) of the action button."""
+        # External button: debounced edges from the IRQ queue
+        button = self.buttons.check_buttons()
+        if button is not None:
+            self.press_started = self.buttons.press_start_time[button]
+            return True
+        
+        # BOOTSEL on RP2 boards has no IRQ; poll it for a release edge
         if HAS_RP2:
             try:
-                bootsel_pressed = rp2.bootsel_button()
+                down = bool(rp2.bootsel_button())
             except:
-                pass
-        
-        return button_pressed or bootsel_pressed
-
-    def wait_button_release(self):
-        """Wait for button release (debounce)."""
-        while self.check_button():
-            utime.sleep(0.01)
+                return False
+            released = self.bootsel_down and not down
+            if down and not self.bootsel_down:
+                self.bootsel_since = utime.ticks_ms()
+            self.bootsel_down = down
+            if released:
+                self.press_started = self.bootsel_since
+            return released
+        return False
 
     def type_password(self):
-        """Type the pending password."""
+        """Start typing the pending password on every connected transport."""
         if not self.pending_password:
             return False
         
         self.show_status("TYPING", "Processing...")
         self.blink(1, 0.3)
         
-        # USB HID first
-        if self.hid.enabled:
-            self.hid.type_text(self.pending_password)
-        
-        # BLE if connected
-        if self.ble and self.ble.is_connected():
-            self.ble.type_text(self.pending_password)
-        
-        # Security: Clear password
-        service = self.pending_service
+        # USB HID and BLE (if connected) in parallel, each on its own timer
+        self.typing_service = self.pending_service
+        self.typing_results = []
+        self.typing_engines = []
+        layout = self.pending_layout
+        if self.hid.enabled and self.hid.start_typing(
+                self.pending_password, on_done=self.typing_results.append, layout=layout):
+            self.typing_engines.append(("usb", self.hid.engine))
+        if self.ble and self.ble.start_typing(
+                self.pending_password, on_done=self.typing_results.append, layout=layout):
+            self.typing_engines.append(("ble", self.ble.engine))
+        
+        # Security: Clear password (the engines zero their queues when done)
         self.pending_password = None
         self.pending_service = None
+        self.pending_layout = None
         gc.collect()
-        
-        self.show_status("SUCCESS", "Typed!", service)
-        print("OK|TYPING_DONE")
-        
-        utime.sleep(1.5)
         return True
 
+    def is_typing(self):
+        return self.hid.is_typing() or bool(self.ble and self.ble.is_typing())
+
+    def cancel_typing(self):
+        """Abort typing on every transport; False if nothing was typing."""
+        cancelled = self.hid.cancel_typing()
+        if self.ble and self.ble.cancel_typing():
+            cancelled = True
+        return cancelled
+
+    def check_typing(self):
+        """Report a background typing run once every transport finished."""
+        if self.typing_results is None or self.is_typing():
+            return
+        # No transport started (HID unavailable, BLE down) is not a success
+        completed = bool(self.typing_engines) and all(self.typing_results)
+        service = self.typing_service
+        # transport=sent,dropped reports for each transport that typed
+        counters = "".join(f"|{name}={engine.sent},{engine.dropped}"
+                           for name, engine in self.typing_engines)
+        self.typing_results = None
+        self.typing_engines = []
+        self.typing_service = None
+        if completed:
+            self.show_status("SUCCESS", "Typed!", service)
+            print("OK|TYPING_DONE" + counters)
+        else:
+            self.show_status("CANCELLED", "Typing Aborted", service)
+            print("OK|TYPING_CANCELLED" + counters)
+
     def run(self):
         """Main loop."""
         print(f"PicoPass v{self.VERSION} Starting...")
@@ -301,26 +485,50 @@ class PicoPassDevice:
         self.show_status("PicoPass", "System Ready")
         
         while True:
-            # Handle serial commands
-            self.handle_serial()
-            
-            # Check button press
-            if self.check_button():
-                if self.pending_password:
-                    self.type_password()
-                else:
-                    # Blink error - no password pending
-                    self.show_status("ERROR", "No Password")
-                    self.blink(5, 0.05)
-                    utime.sleep(0.5)
-                    self.show_status("PicoPass", "Ready")
-                
-                # Debounce
-                self.wait_button_release()
+            self.step()
             
             # Small delay
             utime.sleep(0.01)
 
+    def step(self):
+        """One pass of the main loop."""
+        # Handle serial commands
+        self.handle_serial()
+        
+        # Background typing finished?
+        self.check_typing()
+        
+        # Check button press (presses made while typing are dropped)
+        if self.fresh_press():
+            tracebuf.record(tracebuf.BUTTON, 0)
+            if self.pending_password:
+                self.type_password()
+            else:
+                # Blink error - no password pending
+                self.show_status("ERROR", "No Password")
+                self.blink(5, 0.05)
+                utime.sleep(0.5)
+                self.show_status("PicoPass", "Ready")
+
+    def fresh_press(self):
+        """check_button(), minus presses that began while typing.
+
+        Those are consumed and dropped, even when released after the job
+        ended, so a stale press cannot start a second action.
+        """
+        if self.is_typing():
+            while self.check_button():
+                pass
+            self.typed_until = utime.ticks_ms()
+            return False
+        typed_until = self.typed_until
+        if not self.check_button():
+            if typed_until is not None and utime.ticks_diff(utime.ticks_ms(), typed_until) > STALE_PRESS_MS:
+                self.typed_until = None
+            return False
+        self.typed_until = None
+        return typed_until is None or utime.ticks_diff(self.press_started, typed_until) > 0
+
 
 if __name__ == "__main__":
     device = PicoPassDevice()
@@ -1,7 +1,19 @@
 # firmware/micropython/display_manager.py
-from machine import I2C, Pin
+#
+# Static parts are rendered once and reused: whole screens (welcome, locked)
+# are kept as frame copies, header bars as page-aligned 128x16 tiles copied
+# straight into the frame buffer, and small widgets as FrameBuffer tiles
+# placed with blit(). Only the dynamic fields are drawn on every update.
+import framebuf
+from machine import I2C, Pin, Timer
 from lib.ssd1306 import SSD1306_I2C
 import utime
+import metrics
+import timers
+
+FRAME_MS = 50  # DisplayService draws at most 20 screens per second
+HEADER_H = 16
+HEADER_TILES = 8  # cached header bars (one per distinct title)
 
 class PicoPassDisplay:
     def __init__(self, scl_pin=17, sda_pin=16, width=128, height=64):
@@ -9,55 +21,160 @@ class PicoPassDisplay:
             # Standard I2C for Pico (I2C0 or I2C1)
             self.i2c = I2C(0, scl=Pin(scl_pin), sda=Pin(sda_pin), freq=400000)
             self.oled = SSD1306_I2C(width, height, self.i2c)
+            self.width = width
+            self.screens = {}   # name -> frame copy
+            self.headers = {}   # title -> header bar bytes
+            self.service_label = self._tile(64, 8)
+            self.service_label.text("SERVICE:", 0, 0)
             self.active = True
             self.show_welcome()
         except Exception as e:
             print(f"OLED Init Error: {e}")
             self.active = False
 
+    @metrics.timed(metrics.DISPLAY)
+    def refresh(self):
+        """Push the frame buffer to the panel."""
+        self.oled.show()
+
     def clear(self):
         if self.active:
             self.oled.fill(0)
-            self.oled.show()
+            self.refresh()
+
+    @staticmethod
+    def _tile(width, height):
+        return framebuf.FrameBuffer(bytearray(width * ((height + 7) // 8)),
+                                    width, height, framebuf.MONO_VLSB)
+
+    def _screen(self, name, draw):
+        # Static screen: drawn the first time, copied back afterwards
+        cached = self.screens.get(name)
+        if cached is None:
+            self.oled.fill(0)
+            draw()
+            self.screens[name] = bytearray(self.oled.buffer)
+        else:
+            self.oled.buffer[:] = cached
+        self.refresh()
 
     def show_welcome(self):
         if not self.active: return
-        self.oled.fill(0)
+        self._screen("welcome", self._draw_welcome)
+
+    def _draw_welcome(self):
         self.oled.text("PicoPass v1.0", 10, 10)
         self.oled.text("Ready to secure", 5, 30)
-        self.oled.show()
 
-    def _draw_lock_icon(self, x, y, size=10):
+    def _draw_lock_icon(self, x, y, size=10, fb=None):
         # Draw a simple padlock
-        self.oled.rect(x+2, y+size//2, size-4, size-size//2, 1) # Body
-        self.oled.rect(x+3, y, size-6, size//2, 1) # Shackle
-        self.oled.pixel(x+size//2, y+size//2+2, 0) # Keyhole
+        fb = fb or self.oled
+        fb.rect(x+2, y+size//2, size-4, size-size//2, 1) # Body
+        fb.rect(x+3, y, size-6, size//2, 1) # Shackle
+        fb.pixel(x+size//2, y+size//2+2, 0) # Keyhole
+
+    def _header(self, header):
+        # Header with background, title and icon, rendered once per title
+        bar = self.headers.get(header)
+        if bar is None:
+            bar = bytearray(self.width * HEADER_H // 8)
+            tile = framebuf.FrameBuffer(bar, self.width, HEADER_H, framebuf.MONO_VLSB)
+            tile.fill(1)
+            tile.text(header, 5, 4, 0)
+            # Lock icon in corner if relevant
+            if header == "READY":
+                self._draw_lock_icon(110, 3, fb=tile)
+            if len(self.headers) >= HEADER_TILES:
+                self.headers.pop(next(iter(self.headers)))
+            self.headers[header] = bar
+        return bar
 
     def show_status(self, header, status, service=""):
         if not self.active: return
-        self.oled.fill(0)
-        
-        # Header with background
-        self.oled.fill_rect(0, 0, 128, 16, 1)
-        self.oled.text(header, 5, 4, 0)
-        
-        # Lock icon in corner if relevant
-        if header == "READY":
-            self._draw_lock_icon(110, 3)
-        
+        oled = self.oled
+        oled.fill(0)
+
+        # Pages 0-1 are the header bar: a straight copy
+        bar = self._header(header)
+        oled.buffer[:len(bar)] = bar
+
         # Service Info
         if service:
-            self.oled.text("SERVICE:", 5, 24)
-            self.oled.text(f"> {service[:14]}", 5, 36)
-            self.oled.text(f"[{status}]", 5, 54)
+            oled.blit(self.service_label, 5, 24)
+            oled.text(f"> {service[:14]}", 5, 36)
+            oled.text(f"[{status}]", 5, 54)
         else:
-            self.oled.text(status, 15, 34)
-            
-        self.oled.show()
+            oled.text(status, 15, 34)
+
+        self.refresh()
 
     def show_locking(self):
         if not self.active: return
-        self.oled.fill(0)
+        self._screen("locking", self._draw_locking)
+
+    def _draw_locking(self):
         self._draw_lock_icon(59, 20, 15)
         self.oled.text("VAULT LOCKED", 16, 42)
-        self.oled.show()
+
+
+class DisplayService:
+    """Coalesces screen requests for a PicoPassDisplay.
+
+    Requests return at once and only the latest one is kept; a one-shot
+    timer draws it at most once per frame_ms, so a screen replaced before
+    its frame never reaches the I2C bus.
+    """
+
+    def __init__(self, display, frame_ms=FRAME_MS):
+        self.display = display
+        self.frame_ms = frame_ms
+        self.pending = None  # (draw, args) of the latest request
+        self.armed = False
+        self.last = utime.ticks_add(utime.ticks_ms(), -frame_ms)
+        self.rendered = 0
+        self.superseded = 0
+        self._timer = timers.one_shot()
+        self._render_cb = self._render  # no bound method allocated per frame
+
+    @property
+    def active(self):
+        return self.display.active
+
+    def show_status(self, header, status, service=""):
+        self._request(self.display.show_status, (header, status, service or ""))
+
+    def show_welcome(self):
+        self._request(self.display.show_welcome, ())
+
+    def show_locking(self):
+        self._request(self.display.show_locking, ())
+
+    def clear(self):
+        self._request(self.display.clear, ())
+
+    def flush(self):
+        """Draw the pending screen now (shutdown, tests)."""
+        self._timer.deinit()
+        self._render()
+
+    def _request(self, draw, args):
+        if not self.display.active:
+            return
+        if self.pending is not None:
+            self.superseded += 1
+        self.pending = (draw, args)
+        if not self.armed:
+            # Next frame slot, but never inside the caller
+            wait = self.frame_ms - utime.ticks_diff(utime.ticks_ms(), self.last)
+            self.armed = True
+            self._timer.init(mode=Timer.ONE_SHOT, period=max(1, wait), callback=self._render_cb)
+
+    def _render(self, timer=None):
+        self.armed = False
+        pending = self.pending
+        if pending is None:
+            return
+        self.pending = None
+        self.last = utime.ticks_ms()
+        self.rendered += 1
+        pending[0](*pending[1])
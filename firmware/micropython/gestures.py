@@ -0,0 +1,253 @@
+# firmware/micropython/gestures.py
+# Gestos dos botões: máquina de estados por botão sobre a fila de bordas
+#
+# device.cfg ajusta os limiares na seção "buttons" (ms, 0 desliga):
+#
+#   "buttons": {"long_press_ms": 1000, "double_click_ms": 300,
+#               "repeat_ms": 250, "chord_ms": 80}
+#
+# poll() devolve (gesto, arg) ou None:
+#   CLICK, botão          solto antes do long press
+#   DOUBLE_CLICK, botão   dois cliques dentro de double_click_ms
+#   LONG_PRESS, botão     assim que o botão completa long_press_ms preso
+#   HOLD_REPEAT, botão    a cada repeat_ms depois do LONG_PRESS
+#   CHORD, máscara        botões de chord_buttons apertados dentro de chord_ms
+#
+# Cada borda de ButtonHandler.poll_edge() é tratada em O(1); entre bordas
+# só o prazo mais próximo (self.deadline) é comparado com ticks_ms, então
+# um loop sem eventos não varre botões. Prazos vencidos são tratados na
+# ordem certa em relação às bordas já enfileiradas, mesmo com o loop lento.
+# Só os botões de double_click_buttons esperam a janela do duplo clique
+# antes do CLICK; os demais soltam o CLICK na hora.
+
+import time
+import tracebuf
+import typing_profile
+
+CLICK = 1
+DOUBLE_CLICK = 2
+LONG_PRESS = 3
+HOLD_REPEAT = 4
+CHORD = 5
+
+NAMES = ("", "CLICK", "DOUBLE_CLICK", "LONG_PRESS", "HOLD_REPEAT", "CHORD")
+
+DEFAULTS = {"long_press_ms": 1000, "double_click_ms": 300, "repeat_ms": 250, "chord_ms": 80}
+
+# Estados por botão
+_IDLE = 0
+_PENDING = 1    # no grupo de acorde ainda aberto
+_DOWN = 2       # preso, long press pendente
+_HELD = 3       # LONG_PRESS já disparou; HOLD_REPEAT a cada repeat_ms
+_WAIT = 4       # solto, esperando o segundo clique
+_DOWN2 = 5      # segundo clique preso
+_CHORDED = 6    # parte de um acorde já emitido: ignora até soltar
+
+
+def thresholds(config):
+    """Limiares da seção "buttons" de um device.cfg já lido."""
+    section = (config or {}).get("buttons") or {}
+    values = {}
+    for key, default in DEFAULTS.items():
+        try:
+            values[key] = max(0, int(section.get(key, default)))
+        except (TypeError, ValueError):
+            print(f"! Bad buttons.{key}: {section.get(key)}")
+            values[key] = default
+    return values
+
+
+class GestureRecognizer:
+    """Transforma as bordas de um ButtonHandler em gestos."""
+
+    def __init__(self, buttons, chord_buttons=(), double_click_buttons=(),
+                 long_press_ms=1000, double_click_ms=300, repeat_ms=250, chord_ms=80):
+        self.buttons = buttons
+        n = len(buttons.buttons)
+        self.long_press_ms = long_press_ms
+        self.double_click_ms = double_click_ms
+        self.repeat_ms = repeat_ms
+        self.chord_ms = chord_ms
+
+        self.chord_mask = 0
+        for i in chord_buttons:
+            self.chord_mask |= 1 << i
+        self.double_mask = 0
+        for i in double_click_buttons:
+            self.double_mask |= 1 << i
+
+        self.state = bytearray(n)
+        self.due = [None] * n           # prazo de cada botão (ticks_ms)
+        self.press_time = [0] * n
+        self.group = 0                  # máscara do acorde em formação
+        self.group_due = None
+        self.deadline = None            # o menor prazo pendente
+        self._edge = None               # borda lida antes de um prazo vencido
+
+    @classmethod
+    def from_config(cls, buttons, config=None, **kwargs):
+        """Recognizer com os limiares do device.cfg (lido se config for None)."""
+        if config is None:
+            config = typing_profile.read_config()
+        kwargs.update(thresholds(config))
+        return cls(buttons, **kwargs)
+
+    def poll(self):
+        """Próximo gesto (gesto, arg), ou None."""
+        while True:
+            edge = self._edge or self.buttons.poll_edge()
+            self._edge = None
+            deadline = self.deadline
+            if deadline is not None:
+                now = edge[0] if edge else time.ticks_ms()
+                if time.ticks_diff(now, deadline) >= 0:
+                    self._edge = edge
+                    gesture = self._expire(deadline)
+                    if gesture:
+                        return gesture
+                    continue
+            if edge is None:
+                return None
+            t, i, pressed = edge
+            gesture = self._press(t, i) if pressed else self._release(t, i)
+            if gesture:
+                return gesture
+
+    def reset(self):
+        """Descarta gestos em andamento (ex.: ao travar)."""
+        for i in range(len(self.state)):
+            self.state[i] = _CHORDED if self.buttons.is_pressed(i) else _IDLE
+            self.due[i] = None
+        self.group = 0
+        self.group_due = None
+        self.deadline = None
+        self._edge = None
+
+    def discard(self, until):
+        """Descarta as bordas até until (ticks_ms) e os gestos em andamento.
+
+        Como um reset() no instante until: os botões presos nele são
+        ignorados até soltar, e as bordas posteriores continuam na fila.
+        """
+        state = self.state
+        while True:
+            edge = self._edge or self.buttons.poll_edge()
+            self._edge = None
+            if edge is None:
+                break
+            if time.ticks_diff(edge[0], until) > 0:
+                self._edge = edge
+                break
+            state[edge[1]] = _DOWN if edge[2] else _IDLE
+        for i in range(len(state)):
+            state[i] = _IDLE if state[i] in (_IDLE, _WAIT) else _CHORDED
+            self.due[i] = None
+        self.group = 0
+        self.group_due = None
+        self.deadline = None
+
+    # --- bordas ---
+
+    def _press(self, t, i):
+        state = self.state[i]
+        self.press_time[i] = t
+        if state == _WAIT:
+            self.state[i] = _DOWN2
+            self._set_due(i, None)
+            return None
+        if state != _IDLE:
+            return None
+        bit = 1 << i
+        if self.chord_mask & bit and self.chord_ms:
+            if not self.group:
+                self.group_due = time.ticks_add(t, self.chord_ms)
+            self.group |= bit
+            self.state[i] = _PENDING
+            self._update_deadline()
+            return None
+        self._down(t, i)
+        return None
+
+    def _release(self, t, i):
+        state = self.state[i]
+        if state == _PENDING:
+            # Soltar um botão fecha o acorde na hora: um toque curto não
+            # espera chord_ms
+            return self._close_group(t)
+        self.state[i] = _IDLE
+        self._set_due(i, None)
+        if state == _DOWN:
+            if self.double_mask & (1 << i) and self.double_click_ms:
+                self.state[i] = _WAIT
+                self._set_due(i, time.ticks_add(t, self.double_click_ms))
+                return None
+            return self._emit(CLICK, i)
+        if state == _DOWN2:
+            return self._emit(DOUBLE_CLICK, i)
+        return None
+
+    # --- prazos ---
+
+    def _expire(self, now):
+        if self.group_due is not None and time.ticks_diff(now, self.group_due) >= 0:
+            return self._close_group(self.group_due)
+        for i in range(len(self.due)):
+            due = self.due[i]
+            if due is None or time.ticks_diff(now, due) < 0:
+                continue
+            state = self.state[i]
+            if state == _DOWN:
+                self.state[i] = _HELD
+                self._set_due(i, time.ticks_add(due, self.repeat_ms) if self.repeat_ms else None)
+                return self._emit(LONG_PRESS, i)
+            if state == _HELD:
+                self._set_due(i, time.ticks_add(due, self.repeat_ms))
+                return self._emit(HOLD_REPEAT, i)
+            if state == _WAIT:
+                self.state[i] = _IDLE
+                self._set_due(i, None)
+                return self._emit(CLICK, i)
+            self._set_due(i, None)
+        return None
+
+    def _close_group(self, t):
+        group = self.group
+        self.group = 0
+        self.group_due = None
+        if group & (group - 1):
+            # Dois ou mais botões: um acorde; cada um é ignorado até soltar
+            for i in range(len(self.state)):
+                if group & (1 << i):
+                    self.state[i] = _CHORDED if self.buttons.is_pressed(i) else _IDLE
+            self._update_deadline()
+            return self._emit(CHORD, group)
+        i = 0
+        while not group & (1 << i):
+            i += 1
+        if self.buttons.is_pressed(i):
+            self._down(self.press_time[i], i)
+            return None
+        # Solto antes de a janela fechar: clique comum
+        self.state[i] = _IDLE
+        self._update_deadline()
+        return self._emit(CLICK, i)
+
+    def _down(self, t, i):
+        self.state[i] = _DOWN
+        self._set_due(i, time.ticks_add(t, self.long_press_ms) if self.long_press_ms else None)
+
+    def _set_due(self, i, due):
+        self.due[i] = due
+        self._update_deadline()
+
+    def _update_deadline(self):
+        # Até 5 botões: recalcular o mínimo é constante por borda
+        deadline = self.group_due
+        for due in self.due:
+            if due is not None and (deadline is None or time.ticks_diff(due, deadline) < 0):
+                deadline = due
+        self.deadline = deadline
+
+    def _emit(self, gesture, arg):
+        tracebuf.record(tracebuf.GESTURE, gesture << 8 | arg)
+        return gesture, arg
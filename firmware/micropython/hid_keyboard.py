@@ -2,8 +2,11 @@
 
 import usb_hid
 from adafruit_hid.keyboard import Keyboard
-from adafruit_hid.keycode import Keycode
-import time
+import hid_keymap
+import macro
+import tracebuf
+import typing_profile
+from typing_engine import TypingEngine
 
 class USBKeyboard:
     """Controlador de teclado USB HID"""
@@ -11,50 +14,56 @@ class USBKeyboard:
     def __init__(self):
         try:
             self.keyboard = Keyboard(usb_hid.devices)
+            self.device = hid_keymap.find_keyboard(usb_hid.devices)
             self.enabled = True
         except:
             print("USB HID not available")
             self.enabled = False
             self.keyboard = None
+            self.device = None
         
-        self.delay_between_keys = 0.01  # 10ms
+        self.report = bytearray(8)  # reutilizado a cada tecla
+        config = typing_profile.read_config()
+        self.profile = typing_profile.select(config)  # pausas do device.cfg
+        self.layout = hid_keymap.load_layout((config or {}).get("layout"))
+        self.engine = TypingEngine(self.device.send_report, self.profile, self.layout) if self.enabled else None
     
-    def type_string(self, text):
-        """Digita uma string completa"""
+    def type_string(self, text, profile=None, layout=None):
+        """Digita uma string completa (bloqueia até terminar)"""
         if not self.enabled: return
-        
-        for char in text:
-            self.type_char(char)
-            time.sleep(self.delay_between_keys)
+        self.engine.start(text, profile or self.profile, None, layout)
+        self.engine.wait()
+    
+    def start_typing(self, text, profile=None, on_done=None, layout=None):
+        """Começa a digitar em segundo plano; False se HID indisponível"""
+        if not self.enabled: return False
+        self.engine.start(text, profile or self.profile, on_done, layout)
+        return True
+    
+    def play_macro(self, program, profile=None, on_done=None):
+        """Toca uma macro compilada (macro.Program) em segundo plano"""
+        if not self.enabled: return False
+        self.engine.play(program, profile or self.profile, on_done)
+        return True
+    
+    def cancel_typing(self):
+        """Interrompe a digitação em andamento"""
+        return self.enabled and self.engine.cancel()
+    
+    def is_typing(self):
+        return self.enabled and self.engine.busy()
     
     def type_char(self, char):
         """Digita um caractere"""
         if not self.enabled: return
         
-        from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
-        
-        # Simple fallback implementation if layout not fully available
-        # or use specific keycodes
-        if char == '\n':
-            self.keyboard.send(Keycode.ENTER)
-        elif char == '\t':
-            self.keyboard.send(Keycode.TAB)
-        else:
-            try:
-                # Use layout if possible, or basic write
-                # Note: adafruit_hid usually needs Layout class for ASCII->Keycode
-                # We'll assume a basic write method or create layout instance if needed
-                # For this implementation, we assume `keyboard.write` isn't standard in adafruit_hid
-                # but let's stick to the requested code which used `keyboard.write(char)` in the else block
-                # The user's code had: self.keyboard.write(char)
-                # adafruit_hid.keyboard.Keyboard has .write()? No, Layout has .write().
-                # I will create a layout instance here to match standard usage.
-                if not hasattr(self, 'layout'):
-                   self.layout = KeyboardLayoutUS(self.keyboard)
-                
-                self.layout.write(char)
-            except Exception as e:
-                print(f"Key error: {e}")
+        tracebuf.record(tracebuf.HID_KEY)
+        sent = False
+        for _ in hid_keymap.pack(char, self.report, self.layout, 1):
+            self.device.send_report(self.report)  # tecla morta: + espaço
+            sent = True
+        if not sent:
+            print(f"Key error: no key for {char!r}")
     
     def press_key(self, keycode):
         """Pressiona uma tecla específica"""
@@ -67,11 +76,10 @@ class USBKeyboard:
         self.keyboard.send(*keycodes)
     
     def type_username_password(self, username, password, tab_between=True):
-        """Digita usuário + senha (comum em logins)"""
-        self.type_string(username)
-        
-        if tab_between:
-            self.press_key(Keycode.TAB)
-            time.sleep(0.05)
-        
-        self.type_string(password)
+        """Digita usuário + senha (comum em logins), numa só passada"""
+        if not self.enabled: return
+        template = "{user}{tab}{pass}" if tab_between else "{user}{pass}"
+        program = macro.compile(template, {"user": username, "pass": password}, self.layout)
+        self.engine.play(program, self.profile)
+        self.engine.wait()
+        program.clear()
@@ -0,0 +1,128 @@
+# firmware/micropython/hid_keymap.py
+# Tabela ASCII -> relatório HID compartilhada por USB e BLE
+#
+# Um layout é um módulo layouts/kbd_<nome>.py gerado por tools/gen_layouts.py:
+# KEYMAP tem 128 entradas de 2 bytes, (modifier, keycode) para cada código
+# ASCII (keycode 0 = caractere sem tecla), e DEAD marca os caracteres em
+# tecla morta, digitados como tecla + espaço. Só o layout em uso é
+# importado. Digitar um caractere é uma indexação na tabela e um
+# send_report de um buffer de 8 bytes reutilizado.
+# pack() agrupa até 6 teclas por report (6-key rollover).
+
+import layouts.kbd_us as US
+
+MOD_SHIFT = 0x02
+MOD_ALTGR = 0x40  # Alt direito
+MAX_KEYS = 6  # boot protocol: 6 teclas por report
+SPACE = 0x2C
+
+LAYOUTS = ("us", "us_intl", "abnt2", "de", "fr")
+DEFAULT_LAYOUT = "us"
+
+KEYMAP = US.KEYMAP
+
+
+def load_layout(name=None):
+    """Módulo do layout pedido (US se None ou desconhecido)."""
+    name = name or DEFAULT_LAYOUT
+    if name not in LAYOUTS:
+        print(f"! Unknown keyboard layout: {name}")
+        name = DEFAULT_LAYOUT
+    return __import__("layouts.kbd_" + name, None, None, ("KEYMAP",))
+
+
+def press(report, char, layout=US):
+    """Preenche report (8 bytes) com a tecla de char; False se não mapeado.
+
+    Caracteres em tecla morta precisam de um espaço depois; use pack().
+    """
+    keymap = layout.KEYMAP
+    i = ord(char)
+    if i >= 128 or not keymap[2 * i + 1]:
+        return False
+    report[0] = keymap[2 * i]
+    report[2] = keymap[2 * i + 1]
+    return True
+
+
+def release(report):
+    """Zera o report (nenhuma tecla pressionada)."""
+    for i in range(8):
+        report[i] = 0
+
+
+def find_keyboard(devices):
+    """O usb_hid.Device de teclado (usage page 1, usage 6), ou None."""
+    for device in devices:
+        if device.usage_page == 0x01 and device.usage == 0x06:
+            return device
+    return None
+
+
+def _strokes(text, layout):
+    """(modifier, keycode, tecla morta) de cada tecla a digitar."""
+    keymap = layout.KEYMAP
+    dead = layout.DEAD
+    for char in text:
+        i = ord(char)
+        if i >= 128:
+            continue
+        key = keymap[2 * i + 1]
+        if not key:
+            continue
+        if dead[i >> 3] & (1 << (i & 7)):
+            yield keymap[2 * i], key, True
+            yield 0, SPACE, False
+        else:
+            yield keymap[2 * i], key, False
+
+
+def pack(text, report, layout=US, max_keys=MAX_KEYS):
+    """Gera os reports 6KRO para text, montados no buffer report.
+
+    Teclas consecutivas com o mesmo modificador entram no mesmo report
+    (na ordem do texto, que é a ordem em que o host processa o array).
+    Um release só é inserido quando uma tecla repete, o modificador muda ou
+    depois de uma tecla morta; com as 6 posições ocupadas o report seguinte
+    já traz a nova tecla.
+    Yield True para um report com teclas novas e False para um release;
+    caracteres sem tecla são ignorados.
+    """
+    release(report)
+    n = 0
+    dirty = False  # report tem teclas ainda não enviadas
+    after_dead = False
+    for mod, key, is_dead in _strokes(text, layout):
+        if n:
+            flush = after_dead or mod != report[0]
+            j = 2
+            while not flush and j < 2 + n:
+                flush = report[j] == key
+                j += 1
+            if flush or n == max_keys:
+                if dirty:
+                    yield True
+                release(report)
+                n = 0
+                if flush:
+                    yield False
+                else:
+                    # Cheio: este report solta as 6 e aperta só a nova, para
+                    # que as seguintes não coincidam com teclas ainda seguras
+                    report[0] = mod
+                    report[2] = key
+                    n = 1
+                    yield True
+                    dirty = False
+                    after_dead = is_dead
+                    continue
+        report[0] = mod
+        report[2 + n] = key
+        n += 1
+        dirty = True
+        after_dead = is_dead
+    if dirty:
+        yield True
+    if n:
+        release(report)
+        yield False
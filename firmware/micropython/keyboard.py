@@ -4,24 +4,27 @@ from adafruit_hid.keyboard import Keyboard
 from adafruit_hid.keyboard_layout_us import KeyboardLayoutUS
 from adafruit_hid.keycode import Keycode
 import time
+import typing_profile
 
 class PicoPassHID:
     def __init__(self):
         try:
             self.kbd = Keyboard(usb_hid.devices)
             self.layout = KeyboardLayoutUS(self.kbd)
+            self.profile = typing_profile.load()
             self.active = True
         except Exception as e:
             print(f"HID Init Error: {e}")
             self.active = False
 
-    def type_text(self, text, press_enter=True):
+    def type_text(self, text, press_enter=False):
         if not self.active:
             print("HID not active")
             return
         
-        # Small delay to ensure host is ready
-        time.sleep(0.5)
+        # Give the host time to get ready (profile pre_ms; "safe" waits 500 ms)
+        if self.profile.pre_ms:
+            time.sleep(self.profile.pre_ms / 1000)
         
         try:
             self.layout.write(text)
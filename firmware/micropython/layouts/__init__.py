@@ -0,0 +1,2 @@
+# firmware/micropython/layouts
+# Tabelas de layout geradas por tools/gen_layouts.py (uma por módulo)
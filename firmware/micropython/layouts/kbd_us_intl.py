@@ -0,0 +1,28 @@
+# firmware/micropython/layouts/kbd_us_intl.py
+# Gerado por tools/gen_layouts.py - não editar à mão
+# US International (Windows): ' " ` ~ ^ are dead keys
+
+NAME = "us_intl"
+
+# (modifier, keycode) por caractere ASCII; keycode 0 = sem tecla
+KEYMAP = (
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # 0x00
+    b"\x00\x2a\x00\x2b\x00\x28\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # 0x08
+    b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"  # 0x10
+    b"\x00\x00\x00\x00\x00\x00\x00\x29\x00\x00\x00\x00\x00\x00\x00\x00"  # 0x18
+    b"\x00\x2c\x02\x1e\x02\x34\x02\x20\x02\x21\x02\x22\x02\x24\x00\x34"  # 0x20 sp ! " # $ % & '
+    b"\x02\x26\x02\x27\x02\x25\x02\x2e\x00\x36\x00\x2d\x00\x37\x00\x38"  # 0x28 ( ) * + , - . /
+    b"\x00\x27\x00\x1e\x00\x1f\x00\x20\x00\x21\x00\x22\x00\x23\x00\x24"  # 0x30 0 1 2 3 4 5 6 7
+    b"\x00\x25\x00\x26\x02\x33\x00\x33\x02\x36\x00\x2e\x02\x37\x02\x38"  # 0x38 8 9 : ; < = > ?
+    b"\x02\x1f\x02\x04\x02\x05\x02\x06\x02\x07\x02\x08\x02\x09\x02\x0a"  # 0x40 @ A B C D E F G
+    b"\x02\x0b\x02\x0c\x02\x0d\x02\x0e\x02\x0f\x02\x10\x02\x11\x02\x12"  # 0x48 H I J K L M N O
+    b"\x02\x13\x02\x14\x02\x15\x02\x16\x02\x17\x02\x18\x02\x19\x02\x1a"  # 0x50 P Q R S T U V W
+    b"\x02\x1b\x02\x1c\x02\x1d\x00\x2f\x00\x31\x00\x30\x02\x23\x02\x2d"  # 0x58 X Y Z [ \ ] ^ _
+    b"\x00\x35\x00\x04\x00\x05\x00\x06\x00\x07\x00\x08\x00\x09\x00\x0a"  # 0x60 ` a b c d e f g
+    b"\x00\x0b\x00\x0c\x00\x0d\x00\x0e\x00\x0f\x00\x10\x00\x11\x00\x12"  # 0x68 h i j k l m n o
+    b"\x00\x13\x00\x14\x00\x15\x00\x16\x00\x17\x00\x18\x00\x19\x00\x1a"  # 0x70 p q r s t u v w
+    b"\x00\x1b\x00\x1c\x00\x1d\x02\x2f\x02\x31\x02\x30\x02\x35\x00\x4c"  # 0x78 x y z { | } ~
+)
+
+# Bit i: o caractere i é tecla morta (seguida de espaço)
+DEAD = b"\x00\x00\x00\x00\x84\x00\x00\x00\x00\x00\x00\x40\x01\x00\x00\x40"
@@ -1,102 +1,145 @@
 # firmware/micropython/led_controller.py
+# LEDs de status/erro/atividade em PWM, animados por led_engine
+#
+# Todos os métodos voltam na hora: piscadas, pulsos, o breathing de espera
+# e a animação de boot são Animations tocadas por um timer. set_status()
+# e afins mudam o nível base do LED, que volta quando a animação acaba.
+# Erros (HIGH) interrompem confirmações (NORMAL), que interrompem enfeites
+# (LOW); o contrário é ignorado. O brilho é percebido (0-100) e vira duty
+# pela tabela gamma led_engine.DUTY.
+#
+# Placas com "has_rgb" (um WS2812 em led_gpio) usam o pixel no lugar dos
+# três LEDs: status, erro e atividade viram os componentes verde, vermelho
+# e azul, e cada quadro da animação sai num único write() do pixel (um put
+# no PIO do RP2, RMT no ESP32). A API é a mesma; led_status e afins passam
+# a ser os números dos canais.
 
 from machine import Pin, PWM
-import time
+import led_engine
+from led_engine import DUTY, DUTY8, LEDEngine, Animation, HIGH, LOW, NORMAL
+from ws2812 import WS2812
+
+# Canais do engine
+STATUS = 0    # verde
+ERROR = 1     # vermelho
+ACTIVITY = 2  # azul
+CHANNELS = 3
+
 
 class LEDController:
     """Controlador de LEDs com PWM"""
-    
-    def __init__(self):
-        # LEDs em modo PWM para fade/blink suave
-        # Using GPIOs from specification (16, 17, 18)
-        # Note: RP2040 uses slices.
-        self.led_status = PWM(Pin(16))    # Verde
-        self.led_error = PWM(Pin(17))     # Vermelho
-        self.led_activity = PWM(Pin(18))  # Azul
-        
-        # Frequência PWM
-        self.led_status.freq(1000)
-        self.led_error.freq(1000)
-        self.led_activity.freq(1000)
-        
+
+    def __init__(self, rgb_pin=None):
+        self.pixel = None
+        if rgb_pin is not None:
+            try:
+                self.pixel = WS2812(rgb_pin)
+            except (OSError, ValueError) as e:
+                print(f"! RGB LED unavailable ({e}), using PWM")
+
+        if self.pixel is not None:
+            # Um pixel: os "LEDs" são os canais e _write só guarda a cor
+            self.led_status, self.led_error, self.led_activity = STATUS, ERROR, ACTIVITY
+            self.pwms = ()
+            self.rgb = bytearray(CHANNELS)
+            self.engine = LEDEngine(self._write_rgb, CHANNELS, self._flush_rgb)
+        else:
+            # LEDs em modo PWM para fade/blink suave
+            # Using GPIOs from specification (16, 17, 18)
+            # Note: RP2040 uses slices.
+            self.led_status = PWM(Pin(16))    # Verde
+            self.led_error = PWM(Pin(17))     # Vermelho
+            self.led_activity = PWM(Pin(18))  # Azul
+            self.pwms = (self.led_status, self.led_error, self.led_activity)
+
+            # Frequência PWM
+            for led in self.pwms:
+                led.freq(1000)
+
+            self.engine = LEDEngine(self._write, CHANNELS)
+
+        # Animações fixas montadas uma vez
+        boot = []
+        for ch in (STATUS, ACTIVITY, ERROR):
+            boot += led_engine.ramp(ch, 0, 100, 200, CHANNELS, 20)
+            boot += led_engine.ramp(ch, 100, 0, 200, CHANNELS, 20)[1:]
+        self._boot = Animation(boot, CHANNELS, LOW)
+        self._waiting = led_engine.breathe(STATUS, 560, CHANNELS, NORMAL, repeat=3)
+
         # Estado inicial
         self.all_off()
-    
+
+    @classmethod
+    def from_config(cls, config):
+        """Controlador para o device.cfg: pixel RGB em led_gpio se has_rgb."""
+        config = config or {}
+        rgb_pin = config.get("led_gpio") if config.get("has_rgb") else None
+        return cls(rgb_pin)
+
+    def _write(self, channel, brightness):
+        # Chamado do timer: só indexa a tabela gamma
+        self.pwms[channel].duty_u16(DUTY[brightness])
+
+    def _write_rgb(self, channel, brightness):
+        self.rgb[channel] = DUTY8[brightness]
+
+    def _flush_rgb(self):
+        # Um write() por quadro: status = G, erro = R, atividade = B
+        rgb = self.rgb
+        self.pixel.words[0] = rgb[STATUS] << 16 | rgb[ERROR] << 8 | rgb[ACTIVITY]
+        self.pixel.write()
+
+    def _channel(self, led):
+        if self.pixel is not None:
+            if led in (STATUS, ERROR, ACTIVITY):
+                return led
+        else:
+            for ch in range(CHANNELS):
+                if self.pwms[ch] is led:
+                    return ch
+        raise ValueError("unknown LED")
+
     def set_brightness(self, led, brightness):
-        """Define brilho do LED (0-100)"""
-        duty = int((brightness / 100) * 65535)
-        led.duty_u16(duty)
-    
+        """Define brilho do LED (0-100, brilho percebido)"""
+        self.engine.set(self._channel(led), min(100, max(0, int(brightness))))
+
     def set_status(self, on, brightness=100):
         """LED de status (verde)"""
         self.set_brightness(self.led_status, brightness if on else 0)
-    
+
     def set_error(self, on, brightness=100):
         """LED de erro (vermelho)"""
         self.set_brightness(self.led_error, brightness if on else 0)
-    
+
     def set_activity(self, on, brightness=100):
         """LED de atividade (azul)"""
         self.set_brightness(self.led_activity, brightness if on else 0)
-    
+
     def all_off(self):
-        """Desliga todos LEDs"""
-        self.set_status(False)
-        self.set_error(False)
-        self.set_activity(False)
-    
+        """Desliga todos LEDs e interrompe a animação"""
+        for ch in range(CHANNELS):
+            self.engine.base[ch] = 0
+        self.engine.stop()
+
     def blink_status(self, times, delay=0.1):
         """Pisca LED de status"""
-        original = self.led_status.duty_u16() > 0
-        for _ in range(times):
-            self.set_status(False)
-            time.sleep(delay)
-            self.set_status(True)
-            time.sleep(delay)
-        self.set_status(original)
-    
+        return self.engine.play(led_engine.blink(STATUS, times, int(delay * 1000), CHANNELS))
+
     def blink_error(self, times, delay=0.1):
         """Pisca LED de erro"""
-        original = self.led_error.duty_u16() > 0
-        for _ in range(times):
-            self.set_error(False)
-            time.sleep(delay)
-            self.set_error(True, 100)
-            time.sleep(delay)
-        self.set_error(original)
-    
+        return self.engine.play(led_engine.blink(ERROR, times, int(delay * 1000), CHANNELS, HIGH))
+
+    # Nome usado por main.py
+    error_blink = blink_error
+
     def boot_animation(self):
-        """Animação de boot"""
-        # Fade in/out sequencial
-        for led in [self.led_status, self.led_activity, self.led_error]:
-            for brightness in range(0, 101, 10):
-                self.set_brightness(led, brightness)
-                time.sleep(0.02)
-            for brightness in range(100, -1, -10):
-                self.set_brightness(led, brightness)
-                time.sleep(0.02)
-        
-        self.all_off()
-    
+        """Animação de boot (fade in/out sequencial)"""
+        return self.engine.play(self._boot)
+
     def waiting_pattern(self):
         """Padrão de espera (breathing)"""
-        for _ in range(3):
-            for brightness in range(0, 101, 5):
-                self.set_status(True, brightness)
-                time.sleep(0.01)
-            for brightness in range(100, -1, -5):
-                self.set_status(True, brightness)
-                time.sleep(0.01)
-    
+        return self.engine.play(self._waiting)
+
     def pulse(self, led, duration=1.0):
         """Pulso suave em um LED"""
-        steps = 50
-        delay = duration / (steps * 2)
-        
-        for brightness in range(0, 101, int(100/steps)):
-            self.set_brightness(led, brightness)
-            time.sleep(delay)
-        
-        for brightness in range(100, -1, -int(100/steps)):
-            self.set_brightness(led, brightness)
-            time.sleep(delay)
+        return self.engine.play(led_engine.pulse(self._channel(led), int(duration * 1000), CHANNELS))
@@ -0,0 +1,189 @@
+# firmware/micropython/led_engine.py
+# Animações de LED não bloqueantes: keyframes tocados por um timer one-shot (timers.py)
+#
+#   engine = LEDEngine(write, channels=3)
+#   engine.play(blink(0, 3, 100, 3))   # volta na hora; o timer troca os quadros
+#
+# Uma Animation é uma lista de quadros: duração (ms) e um nível 0-100 por
+# canal, ou KEEP para deixar o canal no nível base. O timer é one-shot e é
+# rearmado com a duração do quadro que acabou de entrar, então só há
+# trabalho quando algo muda e nada no caminho dos comandos dorme por LED.
+# play() com prioridade >= à da animação atual a substitui; com prioridade
+# menor é ignorada enquanto a atual toca. set() muda o nível base de um
+# canal, que é o que fica aceso quando as animações acabam.
+#
+# Níveis são de brilho percebido (0-100). DUTY converte para duty_u16 com
+# correção gamma, e as rampas de pulso/breathing seguem a curva EASE; as
+# duas tabelas são calculadas uma vez no import, então os quadros já saem
+# prontos e o callback do timer só indexa inteiros (nada de float, que
+# alocaria dentro de uma IRQ). DUTY8 é a mesma curva em 0-255, para LEDs
+# endereçáveis.
+#
+# flush, se dado, é chamado uma vez depois de cada quadro (e de set/stop):
+# backends que mandam todos os canais juntos (um pixel WS2812) montam o
+# quadro nos write() e o enviam de uma vez ali.
+
+import math
+import time
+from array import array
+from machine import Timer
+import timers
+
+KEEP = 255
+
+# Prioridades
+LOW = 0       # enfeite (boot, pulso)
+NORMAL = 1    # confirmações, espera
+HIGH = 2      # erros
+
+TICK_MS = 10  # passo das rampas (fade)
+
+GAMMA = 2.2
+# Nível percebido 0-100 -> duty_u16
+DUTY = array('H', [int(65535 * (i / 100) ** GAMMA + 0.5) for i in range(101)])
+# Subida suave (meia onda de cosseno): EASE[i], i = 0..EASE_STEPS, vai de 0 a 100
+EASE_STEPS = 32
+EASE = bytearray([int(50 - 50 * math.cos(math.pi * i / EASE_STEPS) + 0.5)
+                  for i in range(EASE_STEPS + 1)])
+# Nível percebido 0-100 -> componente de cor 0-255
+DUTY8 = bytearray([d >> 8 for d in DUTY])
+
+
+class Animation:
+    """Quadros (ms, níveis por canal) tocados repeat vezes (0 = sempre)."""
+
+    def __init__(self, frames, channels, priority=NORMAL, repeat=1):
+        self.channels = channels
+        self.priority = priority
+        self.repeat = repeat
+        self.durations = array('H', [max(1, ms) for ms, _ in frames])
+        self.levels = bytearray(len(frames) * channels)
+        for i, (_, levels) in enumerate(frames):
+            for ch in range(channels):
+                self.levels[i * channels + ch] = levels[ch]
+
+    def __len__(self):
+        return len(self.durations)
+
+
+def _frame(channels, channel, level):
+    levels = [KEEP] * channels
+    levels[channel] = level
+    return levels
+
+
+def blink(channel, times, delay_ms, channels, priority=NORMAL, level=100):
+    """Apaga e acende o canal times vezes (como o blink bloqueante)."""
+    off = _frame(channels, channel, 0)
+    on = _frame(channels, channel, level)
+    return Animation([(delay_ms, off), (delay_ms, on)] * times, channels, priority)
+
+
+def ramp(channel, start, stop, duration_ms, channels, step_ms=TICK_MS, curve=None):
+    """Quadros de uma rampa de start a stop (níveis 0-100), linear ou
+    seguindo curve (EASE)."""
+    steps = max(1, duration_ms // step_ms)
+    step_ms = max(1, duration_ms // steps)
+    frames = []
+    for i in range(steps + 1):
+        if curve is None:
+            level = start + (stop - start) * i // steps
+        else:
+            level = start + (stop - start) * curve[i * (len(curve) - 1) // steps] // 100
+        frames.append((step_ms, _frame(channels, channel, level)))
+    return frames
+
+
+def pulse(channel, duration_ms, channels, priority=LOW, repeat=1):
+    """Sobe e desce o canal em duration_ms, com a curva EASE."""
+    half = duration_ms // 2
+    frames = (ramp(channel, 0, 100, half, channels, curve=EASE)
+              + ramp(channel, 100, 0, half, channels, curve=EASE)[1:])
+    return Animation(frames, channels, priority, repeat)
+
+
+def breathe(channel, period_ms, channels, priority=NORMAL, repeat=0):
+    """Respiração: pulso suave em 3/4 do período e apagado no resto."""
+    half = period_ms * 3 // 8
+    frames = (ramp(channel, 0, 100, half, channels, curve=EASE)
+              + ramp(channel, 100, 0, half, channels, curve=EASE)[1:])
+    rest = period_ms - sum(ms for ms, _ in frames)
+    frames.append((max(1, rest), _frame(channels, channel, 0)))
+    return Animation(frames, channels, priority, repeat)
+
+
+class LEDEngine:
+    """Toca Animations em segundo plano; write(canal, nível 0-100) acende."""
+
+    def __init__(self, write, channels, flush=None):
+        self.write = write
+        self.flush = flush
+        self.channels = channels
+        self.base = bytearray(channels)
+        self.current = None
+        self.frame = 0
+        self.loops = 0
+        self._timer = timers.one_shot()
+        self._tick_cb = self._tick  # sem alocar um bound method por quadro
+
+    def busy(self):
+        return self.current is not None
+
+    def set(self, channel, level):
+        """Nível base do canal; aparece já se a animação não o estiver usando."""
+        self.base[channel] = level
+        animation = self.current
+        if animation is None or animation.levels[self.frame * self.channels + channel] == KEEP:
+            self.write(channel, level)
+            if self.flush:
+                self.flush()
+
+    def play(self, animation):
+        """Toca animation; False se uma de prioridade maior estiver tocando."""
+        current = self.current
+        if current is not None and current.priority > animation.priority:
+            return False
+        self._timer.deinit()
+        self.current = animation
+        self.frame = 0
+        self.loops = 0
+        self._show()
+        return True
+
+    def stop(self):
+        """Interrompe a animação e volta aos níveis base."""
+        self._timer.deinit()
+        self.current = None
+        for ch in range(self.channels):
+            self.write(ch, self.base[ch])
+        if self.flush:
+            self.flush()
+
+    def wait(self):
+        """Bloqueia até a animação acabar (só testes e o desligamento)."""
+        while self.current is not None and self.current.repeat:
+            time.sleep_ms(1)
+
+    def _show(self):
+        animation = self.current
+        offset = self.frame * self.channels
+        for ch in range(self.channels):
+            level = animation.levels[offset + ch]
+            self.write(ch, self.base[ch] if level == KEEP else level)
+        if self.flush:
+            self.flush()
+        self._timer.init(mode=Timer.ONE_SHOT, period=animation.durations[self.frame],
+                         callback=self._tick_cb)
+
+    def _tick(self, timer=None):
+        animation = self.current
+        if animation is None:
+            return
+        self.frame += 1
+        if self.frame == len(animation):
+            self.frame = 0
+            self.loops += 1
+            if animation.repeat and self.loops >= animation.repeat:
+                self.stop()
+                return
+        self._show()
@@ -1,4 +1,8 @@
 # MicroPython SSD1306 OLED driver, I2C and SPI interfaces
+#
+# show() only sends what changed: a shadow copy of the panel RAM is kept and
+# each page that differs from it is sent through a SET_COL_ADDR/SET_PAGE_ADDR
+# window covering just its changed columns. show(True) sends everything.
 import framebuf
 
 # Register definitions
@@ -20,6 +24,8 @@ SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
 
+WINDOW_GAP = const(8)
+
 class SSD1306(framebuf.FrameBuffer):
     def __init__(self, width, height, external_vcc):
         self.width = width
@@ -27,6 +33,8 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self.shadow = bytearray(self.pages * self.width)  # what the panel shows
+        self.view = memoryview(self.buffer)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -50,7 +58,7 @@ class SSD1306(framebuf.FrameBuffer):
             SET_DISP | 0x01): # on
             self.write_cmd(cmd)
         self.fill(0)
-        self.show()
+        self.show(True)
 
     def poweroff(self):
         self.write_cmd(SET_DISP | 0x00)
@@ -65,9 +73,7 @@ class SSD1306(framebuf.FrameBuffer):
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def set_window(self, x0, x1, page0, page1):
         if self.width == 64:
             x0 += 32
             x1 += 32
@@ -75,9 +81,38 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(x0)
         self.write_cmd(x1)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+
+    def show(self, full=False):
+        buf = self.buffer
+        shadow = self.shadow
+        if full:
+            self.set_window(0, self.width - 1, 0, self.pages - 1)
+            self.write_data(buf)
+            shadow[:] = buf
+            return
+        width = self.width
+        for page in range(self.pages):
+            start = page * width
+            end = start + width
+            i = start
+            while i < end:
+                while i < end and buf[i] == shadow[i]:
+                    i += 1
+                if i == end:
+                    break
+                # A run of changes ends after WINDOW_GAP unchanged bytes, about
+                # what opening another window costs on the bus
+                lo = i
+                same = 0
+                while i < end and same < WINDOW_GAP:
+                    same = same + 1 if buf[i] == shadow[i] else 0
+                    i += 1
+                hi = i - same
+                self.set_window(lo - start, hi - 1 - start, page, page)
+                self.write_data(self.view[lo:hi])
+                shadow[lo:hi] = self.view[lo:hi]
 
 class SSD1306_I2C(SSD1306):
     def __init__(self, width, height, i2c, addr=0x3c, external_vcc=False):
@@ -85,6 +120,8 @@ class SSD1306_I2C(SSD1306):
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        # Co=0, D/C#=0: command stream
+        self.window = bytearray((0x00, SET_COL_ADDR, 0, 0, SET_PAGE_ADDR, 0, 0))
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
@@ -92,6 +129,18 @@ class SSD1306_I2C(SSD1306):
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def set_window(self, x0, x1, page0, page1):
+        # One transaction for the six command bytes
+        if self.width == 64:
+            x0 += 32
+            x1 += 32
+        window = self.window
+        window[2] = x0
+        window[3] = x1
+        window[5] = page0
+        window[6] = page1
+        self.i2c.writeto(self.addr, window)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
@@ -6,6 +6,8 @@ import machine
 import binascii
 import hashlib
 import json
+import metrics
+import typing_profile
 
 class LicenseManager:
     """Manages device licensing and configuration."""
@@ -14,7 +16,7 @@ class LicenseManager:
     
     def __init__(self):
         self.license_file = "license.key"
-        self.config_file = "device.cfg"
+        self.config_file = typing_profile.CONFIG_FILE  # shared with main.py
         self.board_id = self._get_board_id()
         self.board_type = self._get_board_type()
         self.config = self._load_config()
@@ -61,8 +63,13 @@ class LicenseManager:
         except:
             return None
 
+    @metrics.timed(metrics.SAVE)
     def _save_config(self, config):
         """Save configuration received from app."""
+        # Keep calibrated typing profiles the app does not know about
+        if self.config and "typing" in self.config and "typing" not in config:
+            config = dict(config)
+            config["typing"] = self.config["typing"]
         try:
             with open(self.config_file, "w") as f:
                 json.dump(config, f)
@@ -89,6 +96,7 @@ class LicenseManager:
             self._activated = False
             return False
 
+    @metrics.timed(metrics.SAVE)
     def save_license(self, key):
         """Save new license key."""
         try:
@@ -139,6 +147,8 @@ class LicenseManager:
                 "btn_gpio": 15,
                 "btn_pull": "UP",
                 "has_display": False,
+                "has_rgb": False,
+                "timer_id": None,
                 "usb_product_name": "PicoPass Security Key",
                 "usb_manufacturer_name": "PicoPass",
             }
@@ -150,6 +160,8 @@ class LicenseManager:
             "btn_gpio": self.config.get("button_gpio", 15),
             "btn_pull": self.config.get("button_pull", "UP"),
             "has_display": self.config.get("has_display", False),
+            "has_rgb": self.config.get("has_rgb", False),
+            "timer_id": self.config.get("timer_id"),
             "display_sda": self.config.get("display_sda"),
             "display_scl": self.config.get("display_scl"),
             "usb_product_name": self.config.get("usb_product_name", "PicoPass Security Key"),
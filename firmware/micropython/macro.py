@@ -0,0 +1,121 @@
+# firmware/micropython/macro.py
+# Macros de login compiladas em sequências de reports HID
+#
+#   "{user}{tab}{pass}{enter}"      usuário, TAB, senha, ENTER
+#   "{user}{enter}{delay:800}{pass}{enter}"   login em duas telas
+#
+# Tokens: {user} {pass} {tab} {enter} {delay:N} (N ms); "{{" e "}}"
+# são chaves literais, o resto é digitado como texto.
+# compile() roda no unlock e devolve um Program: os reports já montados
+# (hid_keymap.pack) e um byte de op por report, no formato da fila do
+# TypingEngine. Tocar a macro é copiar a fila; nada é interpretado por tecla.
+# Não há {totp}: a placa não tem relógio nem segredos TOTP, então o token é
+# recusado como desconhecido em vez de falhar só na hora de digitar.
+
+import hid_keymap
+from typing_engine import PAUSE, REPORT_SIZE
+
+FIELDS = ("user", "pass")
+KEYS = {"tab": "\t", "enter": "\n"}
+MAX_DELAY_MS = 10000
+
+DEFAULT = "{pass}"
+
+
+def parse(template):
+    """Lista de (kind, value): ("text", s), ("field", nome) ou ("delay", ms).
+
+    ValueError se o template for inválido.
+    """
+    parts = []
+    text = ""
+    i = 0
+    while i < len(template):
+        char = template[i]
+        if template.startswith("{{", i) or template.startswith("}}", i):
+            text += char
+            i += 2
+            continue
+        if char == "}":
+            raise ValueError("unmatched '}'")
+        if char != "{":
+            text += char
+            i += 1
+            continue
+        end = template.find("}", i)
+        if end < 0:
+            raise ValueError("unterminated '{'")
+        token = template[i + 1:end]
+        i = end + 1
+        if token in KEYS:
+            text += KEYS[token]
+            continue
+        if text:
+            parts.append(("text", text))
+            text = ""
+        if token in FIELDS:
+            parts.append(("field", token))
+        elif token.startswith("delay:"):
+            try:
+                ms = int(token[6:])
+            except ValueError:
+                raise ValueError("bad delay: " + token)
+            if not 0 <= ms <= MAX_DELAY_MS:
+                raise ValueError("delay out of range: " + token)
+            parts.append(("delay", ms))
+        else:
+            raise ValueError("unknown token: {" + token + "}")
+    if text:
+        parts.append(("text", text))
+    return parts
+
+
+def uses(template, field):
+    """True se o template usa {field}."""
+    return ("field", field) in parse(template)
+
+
+class Program:
+    """Macro compilada: reports de 8 bytes e o op de cada um."""
+
+    def __init__(self, reports, ops):
+        self.reports = reports
+        self.ops = ops
+
+    def __len__(self):
+        return len(self.ops)
+
+    def clear(self):
+        # Os reports são a senha em keycodes: zerar ao travar
+        for i in range(len(self.reports)):
+            self.reports[i] = 0
+        for i in range(len(self.ops)):
+            self.ops[i] = 0
+
+
+def compile(template, fields, layout=hid_keymap.US):
+    """Compila template com fields ({"user": .., "pass": ..})."""
+    reports = bytearray()
+    ops = bytearray()
+    report = bytearray(REPORT_SIZE)
+    pending = ""  # texto consecutivo vai num só pack()
+
+    def flush(text):
+        for pressed in hid_keymap.pack(text, report, layout):
+            reports.extend(report)
+            ops.append(pressed)
+
+    for kind, value in parse(template):
+        if kind == "text":
+            pending += value
+        elif kind == "field":
+            if fields.get(value) is None:
+                raise ValueError("no value for {" + value + "}")
+            pending += fields[value]
+        else:
+            flush(pending)
+            pending = ""
+            reports.extend(bytes((value & 0xFF, value >> 8, 0, 0, 0, 0, 0, 0)))
+            ops.append(PAUSE)
+    flush(pending)
+    return Program(reports, ops)
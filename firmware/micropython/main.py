@@ -11,14 +11,28 @@ import binascii
 from hid_keyboard import USBKeyboard
 from led_controller import LEDController
 from button_handler import ButtonHandler
+from gestures import GestureRecognizer
 from storage import PasswordStorage
 from serial_protocol import SerialProtocol
 from crypto import AESCrypto
+import gestures
+import hid_keymap
+import macro
+import metrics
+import timers
+import tracebuf
+import typing_profile
 
 # ============================================
 # CONFIGURAÇÃO DE HARDWARE
 # ============================================
 
+# Botões de slot (índices do ButtonHandler) e slots por banco
+SLOT_BUTTONS = (1, 2, 3, 4)
+BANK_SIZE = 4
+CHORD_BANK_SIZE = 15    # códigos 1-15 com 4 botões
+MAX_SLOTS = 60          # 4 bancos no modo chord
+
 # Versão do firmware
 VERSION = "1.0.0"
 try:
@@ -45,8 +59,19 @@ class PicoPassDevice:
         print("Initializing hardware...")
         
         # Hardware components
-        self.leds = LEDController()
+        self.config_file = typing_profile.CONFIG_FILE
+        config = typing_profile.read_config(self.config_file)
+        # Um timer de hardware para todos os one-shots ("timer_id" no ESP32)
+        timers.scheduler.configure((config or {}).get("timer_id", timers.DEFAULT_ID))
+        # "has_rgb": um pixel WS2812 em led_gpio no lugar dos 3 LEDs
+        self.leds = LEDController.from_config(config)
         self.buttons = ButtonHandler()
+        # Botão 0 (unlock): long press trava na hora; 1-4: slots
+        # "chord": os botões de slot apertados juntos formam um código binário
+        self.chord_slots = ((config or {}).get("buttons") or {}).get("slots") == "chord"
+        self.gestures = GestureRecognizer.from_config(
+            self.buttons, config, chord_buttons=SLOT_BUTTONS if self.chord_slots else ())
+        self.bank = 0  # banco de slots escolhido com o botão unlock
         self.keyboard = USBKeyboard()
         self.storage = PasswordStorage()
         self.serial = SerialProtocol()
@@ -58,8 +83,23 @@ class PicoPassDevice:
         self.last_activity = 0
         self.auto_lock_timeout = 120  # 2 minutos
         
-        # Password slots (4 slots)
+        # Password slots (4; crescem até MAX_SLOTS no ADD_PASSWORD)
         self.password_slots = [None, None, None, None]
+        # Layout de teclado por slot (None = o do device.cfg)
+        self.slot_layouts = [None, None, None, None]
+        # Macro de login por slot (None = só a senha) e usuário criptografado
+        self.slot_macros = [None, None, None, None]
+        self.slot_users = [None, None, None, None]
+        # Macros compiladas no unlock, zeradas no lock
+        self.programs = [None, None, None, None]
+        
+        # Calibração de velocidade de digitação em andamento
+        self.calibration = None
+        
+        # Resultado da digitação em segundo plano (None = nada a tratar)
+        self.typing_done = None
+        # ticks_ms da última passada do loop digitando (None = fora de digitação)
+        self.typed_until = None
         
         print("✓ Hardware initialized")
         
@@ -89,7 +129,11 @@ class PicoPassDevice:
             if data:
                 self.master_hash = data.get('master_hash')
                 self.password_slots = data.get('slots', [None] * 4)
+                self.slot_layouts = data.get('layouts') or [None] * len(self.password_slots)
+                self.slot_macros = data.get('macros') or [None] * len(self.password_slots)
+                self.slot_users = data.get('users') or [None] * len(self.password_slots)
                 self.auto_lock_timeout = data.get('timeout', 120)
+                self.programs = [None] * len(self.password_slots)
                 # Count valid slots
                 count = len([s for s in self.password_slots if s])
                 print(f"✓ Loaded {count} passwords")
@@ -105,6 +149,9 @@ class PicoPassDevice:
             data = {
                 'master_hash': self.master_hash,
                 'slots': self.password_slots,
+                'layouts': self.slot_layouts,
+                'macros': self.slot_macros,
+                'users': self.slot_users,
                 'timeout': self.auto_lock_timeout,
             }
             self.storage.save(data)
@@ -112,6 +159,7 @@ class PicoPassDevice:
         except Exception as e:
             print(f"✗ Error saving: {e}")
     
+    @metrics.timed(metrics.UNLOCK)
     def unlock(self, master_password=None):
         """Desbloqueia o dispositivo"""
         # Se já configurado, verificar senha
@@ -143,6 +191,7 @@ class PicoPassDevice:
         
         self.unlocked = True
         self.last_activity = time.time()
+        self.compile_macros()
         self.leds.set_status(True)
         self.leds.blink_status(2)
         
@@ -152,12 +201,18 @@ class PicoPassDevice:
     def lock(self):
         """Bloqueia o dispositivo"""
         self.unlocked = False
+        tracebuf.record(tracebuf.LOCK)
+        self.cancel_typing()
+        self.gestures.reset()
+        self.bank = 0
         self.leds.set_status(False)
         self.leds.set_error(True)
         # Clear crypto key
         self.crypto.clear_key_cache()
         
         # Limpar senhas da memória (segurança)
+        for slot in range(len(self.programs)):
+            self._clear_program(slot)
         gc.collect()
         
         print("✓ Device LOCKED")
@@ -181,48 +236,141 @@ class PicoPassDevice:
             self.leds.error_blink(2)
             return
         
+        if self.keyboard.is_typing():
+            # Nunca emendar uma senha no meio de outra
+            print(f"! Still typing - slot {slot} ignored")
+            return
+        
         try:
-            # Descriptografar senha
-            password = self.crypto.decrypt(encrypted_data)
-            
-            # Digitar via USB HID
+            # Digitar via USB HID, em segundo plano (ver check_typing)
             print(f"⌨ Typing password from slot {slot}...")
             self.leds.set_activity(True)
-            
-            self.keyboard.type_string(password)
-            
-            self.leds.set_activity(False)
-            self.leds.blink_status(2)
-            
-            print("✓ Password typed!")
+            self.typing_done = None
+            program = self.programs[slot]
+            template = self.slot_macros[slot]
+            if program is None and template:
+                # Macro que falhou no unlock: compila agora (e mostra o erro)
+                program = self.compile_macro(slot)
+                self.keyboard.play_macro(program, on_done=self._typing_finished)
+                program.clear()  # o engine já copiou os reports
+            elif program is not None:
+                # Macro pré-compilada no unlock: só copia a fila
+                self.keyboard.play_macro(program, on_done=self._typing_finished)
+            else:
+                # Descriptografar senha
+                password = self.crypto.decrypt(encrypted_data)
+                self.keyboard.start_typing(password, on_done=self._typing_finished,
+                                           layout=self._slot_layout(slot))
+                # Limpar senha da memória (a fila do engine é zerada ao terminar)
+                del password
             
             # Atualizar last_activity
             self.last_activity = time.time()
-            
-            # Limpar senha da memória
-            del password
             gc.collect()
         
         except Exception as e:
             print(f"✗ Error typing password: {e}")
+            self.leds.set_activity(False)
             self.leds.error_blink(4)
     
-    def add_password(self, slot, password):
-        """Adiciona senha em um slot"""
+    def _typing_finished(self, completed):
+        # Roda no callback do timer: só registra, check_typing() trata
+        self.typing_done = completed
+    
+    def check_typing(self):
+        """Finaliza uma digitação em segundo plano que terminou"""
+        if self.typing_done is None:
+            return
+        completed, self.typing_done = self.typing_done, None
+        self.leds.set_activity(False)
+        if completed:
+            self.leds.blink_status(2)
+            print("✓ Password typed!")
+        else:
+            print("! Typing cancelled")
+    
+    def cancel_typing(self):
+        """Interrompe a digitação (CANCEL_TYPING / lock)"""
+        if self.keyboard.cancel_typing():
+            self.check_typing()
+            return True
+        return False
+    
+    def _slot_layout(self, slot):
+        layout = self.slot_layouts[slot]
+        return hid_keymap.load_layout(layout) if layout else self.keyboard.layout
+    
+    def compile_macro(self, slot):
+        """Compila a macro de um slot em reports HID (None se não tem macro)"""
+        template = self.slot_macros[slot]
+        if not template or not self.password_slots[slot]:
+            return None
+        fields = {'pass': self.crypto.decrypt(self.password_slots[slot])}
+        if self.slot_users[slot]:
+            fields['user'] = self.crypto.decrypt(self.slot_users[slot])
+        return macro.compile(template, fields, self._slot_layout(slot))
+    
+    def _prepare_macro(self, slot):
+        self._clear_program(slot)
+        template = self.slot_macros[slot]
+        if not template:
+            return
+        try:
+            self.programs[slot] = self.compile_macro(slot)
+        except Exception as e:
+            print(f"✗ Macro error in slot {slot}: {e}")
+    
+    def _clear_program(self, slot):
+        if self.programs[slot] is not None:
+            self.programs[slot].clear()
+            self.programs[slot] = None
+    
+    def compile_macros(self):
+        """Pré-compila as macros de todos os slots (no unlock)"""
+        for slot in range(len(self.password_slots)):
+            self._prepare_macro(slot)
+    
+    def _grow_slots(self, count):
+        # As listas por slot crescem sob demanda (até MAX_SLOTS)
+        for slots in (self.password_slots, self.slot_layouts, self.slot_macros,
+                      self.slot_users, self.programs):
+            while len(slots) < count:
+                slots.append(None)
+    
+    def add_password(self, slot, password, layout=None, username=None, template=None):
+        """Adiciona senha em um slot (layout opcional sobrepõe o do device,
+        template é a macro de login, ex: "{user}{tab}{pass}{enter}")"""
         if not self.unlocked:
             print("! Device locked")
             return False
         
-        if slot < 0 or slot >= len(self.password_slots):
+        if slot < 0 or slot >= MAX_SLOTS:
             print(f"✗ Invalid slot: {slot}")
             return False
         
+        if layout and layout not in hid_keymap.LAYOUTS:
+            print(f"✗ Unknown keyboard layout: {layout}")
+            return False
+        
+        if template:
+            try:
+                macro.parse(template)
+            except ValueError as e:
+                print(f"✗ Invalid macro: {e}")
+                return False
+        
+        self._grow_slots(slot + 1)
+        
         try:
             # Criptografar senha
             encrypted_data = self.crypto.encrypt(password)
             
             # Salvar no slot
             self.password_slots[slot] = encrypted_data
+            self.slot_layouts[slot] = layout or None
+            self.slot_users[slot] = self.crypto.encrypt(username) if username else None
+            self.slot_macros[slot] = template or None
+            self._prepare_macro(slot)
             
             # Persistir na flash
             self.save_to_flash()
@@ -247,6 +395,10 @@ class PicoPassDevice:
             return False
         
         self.password_slots[slot] = None
+        self.slot_layouts[slot] = None
+        self.slot_users[slot] = None
+        self.slot_macros[slot] = None
+        self._clear_program(slot)
         self.save_to_flash()
         
         print(f"✓ Slot {slot} cleared")
@@ -260,35 +412,74 @@ class PicoPassDevice:
                 print(f"⏰ Auto-lock triggered after {int(elapsed)}s")
                 self.lock()
     
-    def handle_button_press(self, button_id):
-        """Processa pressão de botão"""
-        print(f"Button {button_id} pressed")
+    def poll_gesture(self):
+        """gestures.poll(), sem os gestos de botões apertados durante a digitação
+        
+        Enquanto digita, os gestos são lidos e descartados, menos o long press
+        do botão unlock (trava e interrompe). Ao terminar, as bordas daquele
+        período são descartadas e botões ainda presos esperam ser soltos.
+        """
+        if self.keyboard.is_typing():
+            self.typed_until = time.ticks_ms()
+            while True:
+                gesture = self.gestures.poll()
+                if gesture is None or gesture == (gestures.LONG_PRESS, 0):
+                    return gesture
+        if self.typed_until is not None:
+            self.gestures.discard(self.typed_until)
+            self.typed_until = None
+        return self.gestures.poll()
+    
+    def handle_gesture(self, gesture, arg):
+        """Processa um gesto dos botões (gestures.poll())"""
+        print(f"Button {gestures.NAMES[gesture]} {arg}")
         self.last_activity = time.time() # Reset idle timer on interaction
         
-        if button_id == 0:
-            # Botão unlock (deve ser pressão longa)
-            if self.buttons.is_long_press(button_id):
+        if arg == 0 and gesture != gestures.CHORD:
+            # Botão unlock: o long press dispara ainda com o botão preso
+            if gesture == gestures.LONG_PRESS:
                 if self.unlocked:
                     self.lock()
                 else:
                     # Aguardar master password via serial
                     print("! Waiting for master password via serial...")
                     self.leds.waiting_pattern()
-            else:
-                 # Short press on lock button: maybe show status?
-                 self.leds.pulse(self.leds.led_status if self.unlocked else self.leds.led_error, 0.5)
-        
-        elif button_id >= 1 and button_id <= 4:
-            # Botões de senha (1-4) map to slots 0-3
-            # But wait, buttons are 1-based in handler?
-            # button_handler defines pin array index 0..4.
-            # check_buttons returns index.
-            # Button 0 is Pin 15 (Unlock).
-            # Button 1 is Pin 14 (Slot 0).
-            # So slot = button_id - 1 is correct.
-            slot = button_id - 1
-            self.type_password(slot)
+            elif gesture == gestures.CLICK:
+                if self.unlocked and self.bank_count() > 1:
+                    # Próximo banco; o LED de status pisca o número dele
+                    self.bank = (self.bank + 1) % self.bank_count()
+                    print(f"Bank {self.bank}")
+                    self.leds.blink_status(self.bank + 1)
+                else:
+                    # Short press on lock button: maybe show status?
+                    self.leds.pulse(self.leds.led_status if self.unlocked else self.leds.led_error, 0.5)
+        
+        elif gesture in (gestures.CLICK, gestures.LONG_PRESS, gestures.CHORD):
+            # Segurar um botão de slot também digita
+            self.type_password(self.button_slot(gesture, arg))
+    
+    def bank_size(self):
+        return CHORD_BANK_SIZE if self.chord_slots else BANK_SIZE
     
+    def bank_count(self):
+        return max(1, (len(self.password_slots) + self.bank_size() - 1) // self.bank_size())
+    
+    def button_slot(self, gesture, arg):
+        """Slot escolhido por um gesto dos botões de slot.
+        
+        Direto: botão 1-4 -> slot 0-3 do banco. Chord: botão 1 vale 1,
+        botão 2 vale 2, botão 3 vale 4 e botão 4 vale 8; a soma dos botões
+        apertados juntos (1-15) escolhe o slot 0-14 do banco.
+        """
+        if not self.chord_slots:
+            code = SLOT_BUTTONS.index(arg) + 1
+        elif gesture == gestures.CHORD:
+            code = arg >> SLOT_BUTTONS[0]
+        else:
+            code = 1 << (arg - SLOT_BUTTONS[0])
+        return self.bank * self.bank_size() + code - 1
+    
+    @metrics.timed(metrics.DISPATCH)
     def handle_serial_command(self, command):
         """Processa comando serial do PC"""
         try:
@@ -303,6 +494,7 @@ class PicoPassDevice:
             elif cmd_type == 'UNLOCK':
                 password = command.get('password', '')
                 success = self.unlock(password)
+                tracebuf.record(tracebuf.UNLOCK, 1 if success else 0)
                 self.serial.send_response({'status': 'ok' if success else 'error'})
             
             elif cmd_type == 'LOCK':
@@ -313,13 +505,19 @@ class PicoPassDevice:
                 self.serial.send_response({
                     'unlocked': self.unlocked,
                     'slots': [s is not None for s in self.password_slots],
-                    'timeout': self.auto_lock_timeout
+                    'layout': self.keyboard.layout.NAME,
+                    'layouts': self.slot_layouts,
+                    'macros': [m is not None for m in self.slot_macros],
+                    'bank': self.bank,
+                    'timeout': self.auto_lock_timeout,
+                    'typing': self.keyboard.is_typing(),
                 })
             
             elif cmd_type == 'ADD_PASSWORD':
                 slot = command.get('slot', -1)
                 password = command.get('password', '')
-                success = self.add_password(slot, password)
+                success = self.add_password(slot, password, command.get('layout'),
+                                            command.get('username'), command.get('macro'))
                 self.serial.send_response({'status': 'ok' if success else 'error'})
             
             elif cmd_type == 'DELETE_PASSWORD':
@@ -329,8 +527,14 @@ class PicoPassDevice:
             
             elif cmd_type == 'TYPE_PASSWORD':
                 slot = command.get('slot', -1)
-                self.type_password(slot)
-                self.serial.send_response({'status': 'ok'})
+                if self.keyboard.is_typing():
+                    self.serial.send_response({'status': 'error', 'message': 'Typing in progress'})
+                else:
+                    self.type_password(slot)
+                    self.serial.send_response({'status': 'ok'})
+            
+            elif cmd_type == 'CANCEL_TYPING':
+                self.serial.send_response({'status': 'ok', 'cancelled': self.cancel_typing()})
             
             elif cmd_type == 'SET_TIMEOUT':
                 timeout = command.get('timeout', 120)
@@ -338,6 +542,48 @@ class PicoPassDevice:
                 self.save_to_flash()
                 self.serial.send_response({'status': 'ok', 'timeout': self.auto_lock_timeout})
             
+            elif cmd_type == 'METRICS':
+                frame = metrics.stats.as_dict()
+                if command.get('reset'):
+                    metrics.stats.reset()
+                self.serial.send_response(frame)
+            
+            elif cmd_type == 'TRACE_DUMP':
+                if not self.unlocked:
+                    self.serial.send_response({'status': 'error', 'message': 'Device locked'})
+                else:
+                    self.serial.send_response({
+                        'trace': binascii.b2a_base64(tracebuf.buffer.snapshot()).decode().strip(),
+                        'now': time.ticks_us(),
+                        'dropped': tracebuf.buffer.dropped(),
+                    })
+                    if command.get('clear'):
+                        tracebuf.buffer.clear()
+            
+            elif cmd_type == 'CALIBRATE_TYPING':
+                self.calibration = typing_profile.Calibrator(
+                    self.keyboard.profile,
+                    command.get('min_ms', typing_profile.CALIBRATE_MIN_MS),
+                    command.get('max_ms', typing_profile.CALIBRATE_MAX_MS))
+                self.type_calibration_round()
+            
+            elif cmd_type == 'CALIBRATE_RESULT':
+                if not self.calibration:
+                    self.serial.send_response({'status': 'error', 'message': 'Not calibrating'})
+                elif self.calibration.feed(command.get('received', 0)):
+                    self.type_calibration_round()
+                else:
+                    profile = self.calibration.result()
+                    self.calibration = None
+                    if profile is None:
+                        self.serial.send_response({'status': 'error', 'message': 'Calibration failed'})
+                    else:
+                        typing_profile.save(profile, self.config_file)
+                        self.keyboard.profile = profile
+                        print(f"✓ Typing calibrated: {profile.key_ms} ms")
+                        self.serial.send_response({'status': 'ok', 'key_ms': profile.key_ms,
+                                                   'release_ms': profile.release_ms})
+            
             else:
                 self.serial.send_response({'status': 'error', 'message': 'Unknown command'})
         
@@ -345,6 +591,15 @@ class PicoPassDevice:
             print(f"✗ Command error: {e}")
             self.serial.send_response({'status': 'error', 'message': str(e)})
 
+    def type_calibration_round(self):
+        """Anuncia a pausa da rodada e digita o texto de teste"""
+        probe = self.calibration.probe()
+        self.serial.send_response({'status': 'calibrate', 'delay_ms': probe.key_ms,
+                                   'text': typing_profile.TEST_TEXT})
+        self.leds.set_activity(True)
+        self.keyboard.type_string(typing_profile.TEST_TEXT + "\n", probe)
+        self.leds.set_activity(False)
+
 # ============================================
 # MAIN LOOP
 # ============================================
@@ -364,12 +619,17 @@ def main():
             # Processar comandos serial
             command = device.serial.read_command()
             if command:
+                tracebuf.record(tracebuf.CMD_BEGIN, tracebuf.command_id(command.get('type')))
                 device.handle_serial_command(command)
+                tracebuf.record(tracebuf.CMD_END)
+            
+            # Digitação em segundo plano terminou?
+            device.check_typing()
             
             # Verificar botões
-            button = device.buttons.check_buttons()
-            if button is not None:
-                device.handle_button_press(button)
+            gesture = device.poll_gesture()
+            if gesture is not None:
+                device.handle_gesture(*gesture)
             
             # Verificar auto-lock
             device.check_auto_lock()
@@ -0,0 +1,102 @@
+# firmware/micropython/metrics.py
+# Instrumentação leve: latência por operação (ticks_us) e heap mínimo
+#
+#   import metrics
+#
+#   @metrics.timed(metrics.UNLOCK)
+#   def unlock(...): ...
+#
+# Os contadores ficam em arrays pré-alocados (sem alocação por amostra).
+# gc.mem_free() é amostrado ao fim de cada operação medida, não a cada
+# volta do loop, para manter o custo bem abaixo de 1% do tempo do loop.
+
+import gc
+import time
+from array import array
+
+# Probe ids (índices nos arrays)
+DISPATCH = 0   # comando serial completo
+UNLOCK = 1
+TYPE = 2       # digitação HID
+SAVE = 3       # escrita na flash
+DISPLAY = 4    # refresh do OLED
+
+NAMES = ("dispatch", "unlock", "type", "save", "display")
+
+_U32_MAX = 0xFFFFFFFF
+
+# Só existe no MicroPython; resolvido uma vez
+_mem_free = getattr(gc, "mem_free", None)
+
+
+class Metrics:
+    """Contadores count/min/max/soma por probe + heap low-water."""
+
+    def __init__(self, size=len(NAMES)):
+        self.enabled = True
+        self.count = array("L", [0] * size)
+        self.min = array("L", [_U32_MAX] * size)
+        self.max = array("L", [0] * size)
+        self.total = array("Q", [0] * size)
+        self.mem_low = _mem_free() if _mem_free else -1
+
+    def reset(self):
+        for i in range(len(self.count)):
+            self.count[i] = 0
+            self.min[i] = _U32_MAX
+            self.max[i] = 0
+            self.total[i] = 0
+        self.mem_low = _mem_free() if _mem_free else -1
+
+    def record(self, probe, elapsed_us):
+        """Registra uma amostra (em us) para o probe."""
+        if not self.enabled:
+            return
+        self.count[probe] += 1
+        self.total[probe] += elapsed_us
+        if elapsed_us < self.min[probe]:
+            self.min[probe] = elapsed_us
+        if elapsed_us > self.max[probe]:
+            self.max[probe] = elapsed_us
+        if _mem_free:
+            free = _mem_free()
+            if free < self.mem_low:
+                self.mem_low = free
+
+    def probe(self, probe):
+        """[count, min, max, mean] em us (min/mean = 0 sem amostras)."""
+        n = self.count[probe]
+        if not n:
+            return [0, 0, 0, 0]
+        return [n, self.min[probe], self.max[probe], self.total[probe] // n]
+
+    def as_dict(self):
+        """Frame para o protocolo JSON (main.py)."""
+        return {
+            "metrics": {name: self.probe(i) for i, name in enumerate(NAMES)},
+            "mem": [_mem_free() if _mem_free else -1, self.mem_low],
+        }
+
+    def as_line(self):
+        """Frame para o protocolo de linha (device.py)."""
+        fields = ["METRICS"]
+        for i, name in enumerate(NAMES):
+            fields.append(name + "=" + ",".join(str(v) for v in self.probe(i)))
+        fields.append("mem={},{}".format(_mem_free() if _mem_free else -1, self.mem_low))
+        return "|".join(fields)
+
+
+stats = Metrics()
+
+
+def timed(probe):
+    """Decorator: mede a duração de cada chamada no probe dado."""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            t0 = time.ticks_us()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record(probe, time.ticks_diff(time.ticks_us(), t0))
+        return wrapper
+    return decorator
@@ -0,0 +1,30 @@
+# firmware/micropython/pio_sm.py
+# Quem usa cada state machine PIO do firmware
+#
+#   pio_sm.claim(7, "ws2812")      # OSError se outro driver já tem a SM 7
+#   sm = rp2.StateMachine(7, programa, ...)
+#   pio_sm.release(7)              # ao desistir da SM
+#
+# rp2.StateMachine(id, programa) não falha com a SM ocupada: reprograma a
+# SM em silêncio e o driver anterior para de funcionar. Os drivers com PIO
+# (debounce dos botões, WS2812) reservam as ids aqui antes, e quem chega
+# depois recebe OSError e segue pelo seu caminho sem PIO.
+
+_owners = {}
+
+
+def claim(sm_id, owner):
+    """Reserva a SM sm_id para owner; OSError se já é de outro."""
+    current = _owners.get(sm_id)
+    if current is not None and current != owner:
+        raise OSError(f"state machine {sm_id} in use by {current}")
+    _owners[sm_id] = owner
+
+
+def release(sm_id):
+    _owners.pop(sm_id, None)
+
+
+def owner(sm_id):
+    """Dono da SM sm_id, ou None se livre."""
+    return _owners.get(sm_id)
@@ -3,6 +3,11 @@
 import json
 import os
 import binascii
+import metrics
+import tracebuf
+
+# Campos com dados criptografados ({'iv', 'data'} em bytes)
+ENCRYPTED_KEYS = ('slots', 'users')
 
 class PasswordStorage:
     """Persistência de dados na Flash"""
@@ -10,8 +15,10 @@ class PasswordStorage:
     def __init__(self, filename="/picopass_data.json"):
         self.filename = filename
     
+    @metrics.timed(metrics.SAVE)
     def save(self, data):
         """Salva dados em JSON"""
+        tracebuf.record(tracebuf.SAVE_BEGIN)
         try:
             # Converter bytes para base64 para JSON
             serializable = self._make_serializable(data)
@@ -23,9 +30,12 @@ class PasswordStorage:
         except Exception as e:
             print(f"Save error: {e}")
             return False
+        finally:
+            tracebuf.record(tracebuf.SAVE_END)
     
     def load(self):
         """Carrega dados do JSON"""
+        tracebuf.record(tracebuf.LOAD_BEGIN)
         try:
             if not self.file_exists():
                 return None
@@ -39,6 +49,8 @@ class PasswordStorage:
         except Exception as e:
             print(f"Load error: {e}")
             return None
+        finally:
+            tracebuf.record(tracebuf.LOAD_END)
     
     def file_exists(self):
         """Verifica se arquivo existe"""
@@ -63,7 +75,7 @@ class PasswordStorage:
         result = {}
         
         for key, value in data.items():
-            if key == 'slots':
+            if key in ENCRYPTED_KEYS:
                 # Slots contêm dados criptografados (bytes)
                 serialized_slots = []
                 for slot in value:
@@ -85,7 +97,7 @@ class PasswordStorage:
         result = {}
         
         for key, value in data.items():
-            if key == 'slots':
+            if key in ENCRYPTED_KEYS:
                 deserialized_slots = []
                 for slot in value:
                     if slot:
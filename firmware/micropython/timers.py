@@ -0,0 +1,109 @@
+# firmware/micropython/timers.py
+# Um timer de hardware para todos os one-shots do firmware
+#
+#   timer = timers.one_shot()
+#   timer.init(mode=Timer.ONE_SHOT, period=10, callback=cb)   # API de machine.Timer
+#   timer.deinit()
+#
+# TypingEngine (USB e BLE), LEDEngine, DisplayService e o advertising BLE
+# rearmam one-shots o tempo todo. No RP2 cada um poderia ter o seu Timer(-1)
+# virtual, mas no ESP32 os timers são de hardware (0-3, menos que os
+# engines) e dois objetos com o mesmo id são o mesmo timer: o init() de um
+# troca o callback do outro, e um advertising ou um quadro do display
+# mataria uma digitação em curso. Aqui cada engine ganha um slot e um
+# único machine.Timer (scheduler.timer_id, do board config) é armado para
+# o vencimento mais próximo. Os callbacks recebem o próprio slot, como
+# recebiam o Timer. Resolução de 1 ms, a mesma do period dos engines.
+
+import sys
+import utime
+from machine import Timer
+
+# ESP32 não tem Timer(-1) virtual
+DEFAULT_ID = 0 if sys.platform == "esp32" else -1
+
+
+class OneShot:
+    """Um slot do scheduler, com init()/deinit() de machine.Timer."""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.due = 0
+        self.active = False
+        self.callback = None
+
+    def init(self, mode=Timer.ONE_SHOT, period=0, callback=None):
+        if mode != Timer.ONE_SHOT:
+            raise ValueError("one-shot timers only")
+        self.callback = callback
+        self.due = utime.ticks_add(utime.ticks_ms(), max(0, int(period)))
+        self.active = True
+        self.scheduler.arm()
+
+    def deinit(self):
+        # Sem rearmar: se ninguém mais vencer, o disparo só encontra nada a fazer
+        self.active = False
+
+
+class Scheduler:
+    """Slots OneShot multiplexados num machine.Timer."""
+
+    def __init__(self, timer_id=DEFAULT_ID):
+        self.timer_id = timer_id
+        self.slots = []
+        self.firing = False
+        self._timer = None
+        self._fire_cb = self._fire  # sem alocar um bound method por disparo
+
+    def configure(self, timer_id):
+        """Troca o timer de hardware (board config), mantendo os slots armados."""
+        if timer_id == self.timer_id:
+            return
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+        self.timer_id = timer_id
+        self.arm()
+
+    def one_shot(self):
+        slot = OneShot(self)
+        self.slots.append(slot)
+        return slot
+
+    def arm(self):
+        if self.firing:
+            return  # _fire() rearma uma vez no fim
+        now = utime.ticks_ms()
+        wait = None
+        for slot in self.slots:
+            if slot.active:
+                left = utime.ticks_diff(slot.due, now)
+                if wait is None or left < wait:
+                    wait = left
+        if wait is None:
+            if self._timer is not None:
+                self._timer.deinit()
+            return
+        if self._timer is None:
+            self._timer = Timer(self.timer_id)
+        self._timer.init(mode=Timer.ONE_SHOT, period=max(1, wait), callback=self._fire_cb)
+
+    def _fire(self, timer=None):
+        self.firing = True
+        try:
+            now = utime.ticks_ms()
+            for slot in self.slots:
+                if slot.active and utime.ticks_diff(slot.due, now) <= 0:
+                    slot.active = False
+                    slot.callback(slot)
+        finally:
+            self.firing = False
+        self.arm()
+
+
+scheduler = Scheduler()
+
+
+def one_shot():
+    """Slot no scheduler global."""
+    return scheduler.one_shot()
@@ -0,0 +1,100 @@
+# firmware/micropython/tracebuf.py
+# Trace binário em ring buffer para análise post-mortem
+#
+#   import tracebuf
+#   tracebuf.record(tracebuf.SAVE_BEGIN)
+#
+# Cada registro tem 8 bytes: ticks_us (u32), evento (u16), argumento (u16).
+# O buffer é alocado uma vez; record() não aloca (struct.pack_into com
+# inteiros pequenos), então pode ser chamado de qualquer camada.
+# TRACE_DUMP envia o conteúdo em base64 para tools/picopass_client/trace.py
+# (só com o dispositivo desbloqueado/ativado). Nenhum argumento deriva da
+# senha: nada de caracteres, tamanhos ou teclas por report.
+
+import struct
+import time
+
+RECORD = "<IHH"
+RECORD_SIZE = 8
+DEFAULT_ENTRIES = 256   # 2 KB
+
+# Event ids (espelhados em tools/picopass_client/trace.py)
+CMD_BEGIN = 1       # arg: command_id()
+CMD_END = 2
+UNLOCK = 3          # arg: 1 = ok, 0 = falhou
+LOCK = 4
+SAVE_BEGIN = 5
+SAVE_END = 6
+LOAD_BEGIN = 7
+LOAD_END = 8
+CRYPTO_BEGIN = 9    # arg: CRYPTO_*
+CRYPTO_END = 10
+HID_BEGIN = 11      # arg: 0
+HID_KEY = 12        # arg: 0
+HID_END = 13
+BUTTON = 14         # arg: id do botão, | LONG_PRESS se longo
+HID_REPORT = 15     # arg: índice do report na digitação
+HID_CANCEL = 16     # arg: reports já enviados
+GESTURE = 17        # arg: gesto << 8 | botão (máscara no CHORD)
+
+CRYPTO_DERIVE = 0
+CRYPTO_ENCRYPT = 1
+CRYPTO_DECRYPT = 2
+
+LONG_PRESS = 0x100
+
+# Comandos dos dois firmwares; o argumento de CMD_BEGIN é índice + 1
+COMMANDS = (
+    "PING", "GET_ID", "UNLOCK", "LOCK", "STATUS", "ADD_PASSWORD",
+    "DELETE_PASSWORD", "TYPE_PASSWORD", "SET_TIMEOUT", "METRICS",
+    "TRACE_DUMP", "ACTIVATE", "CONFIG", "TYPE", "INFO", "RESET", "VERSION",
+    "CALIBRATE_TYPING", "CALIBRATE_RESULT", "CANCEL_TYPING",
+)
+
+
+def command_id(name):
+    """Índice + 1 do comando em COMMANDS (0 se desconhecido)."""
+    for i in range(len(COMMANDS)):
+        if COMMANDS[i] == name:
+            return i + 1
+    return 0
+
+
+class TraceBuffer:
+    """Ring buffer pré-alocado de eventos (ticks_us, event, arg)."""
+
+    def __init__(self, entries=DEFAULT_ENTRIES):
+        self.entries = entries
+        self.buf = bytearray(entries * RECORD_SIZE)
+        self.head = 0       # próximo slot a escrever
+        self.written = 0    # total de eventos desde o boot/reset
+        self.enabled = True
+
+    def record(self, event, arg=0):
+        if not self.enabled:
+            return
+        struct.pack_into(RECORD, self.buf, self.head * RECORD_SIZE,
+                         time.ticks_us(), event, arg & 0xFFFF)
+        self.head += 1
+        if self.head == self.entries:
+            self.head = 0
+        self.written += 1
+
+    def clear(self):
+        self.head = 0
+        self.written = 0
+
+    def snapshot(self):
+        """Registros em ordem cronológica (mais antigo primeiro)."""
+        if self.written < self.entries:
+            return bytes(self.buf[:self.head * RECORD_SIZE])
+        split = self.head * RECORD_SIZE
+        return bytes(self.buf[split:]) + bytes(self.buf[:split])
+
+    def dropped(self):
+        """Eventos sobrescritos desde o último clear()."""
+        return max(0, self.written - self.entries)
+
+
+buffer = TraceBuffer()
+record = buffer.record
@@ -0,0 +1,198 @@
+# firmware/micropython/typing_engine.py
+# Digitação HID não bloqueante: fila de reports drenada por um timer one-shot (timers.py)
+#
+#   engine = TypingEngine(device.send_report, profile)
+#   engine.start("senha")      # volta na hora; o timer envia os reports
+#   engine.cancel()            # LOCK / CANCEL_TYPING: solta as teclas
+#
+# start() monta os reports (hid_keymap.pack) numa fila pré-alocada de
+# capacity reports; um texto maior é enfileirado em blocos, e o próximo
+# bloco é montado no tick em que a fila esvazia (senhas de qualquer tamanho).
+# O timer é one-shot e é rearmado com a pausa do report que acabou de sair
+# (key_ms após teclas, release_ms após release), então o loop principal
+# segue atendendo serial, botões e auto-lock enquanto digita.
+# USB e BLE têm cada um o seu engine e o seu slot em timers: os dois digitam ao
+# mesmo tempo e o total leva max(USB, BLE), não a soma.
+# batch > 1 envia esse número de reports em sequência antes de cada pausa
+# (BLE: várias notificações por evento de conexão).
+# play() toca uma macro já compilada (macro.Program): os reports vão direto
+# para a fila, e entradas PAUSE só esperam, sem enviar nada.
+# sent/dropped contam os reports da última digitação: entregues ao
+# transporte e perdidos por erro de envio (o que falhou e os que ficaram
+# na fila depois dele).
+
+import time
+from machine import Timer
+import hid_keymap
+import metrics
+import timers
+import tracebuf
+
+REPORT_SIZE = 8
+# Ops da fila (self.pressed): 0 = release, 1 = report com teclas
+PAUSE = 2  # não é enviado; bytes 0-1 = pausa em ms (little endian)
+DEFAULT_CAPACITY = 256  # reports por bloco (2 KB): ~128 caracteres
+
+
+class TypingEngine:
+    """Fila de reports HID enviada em segundo plano por um timer."""
+
+    def __init__(self, send, profile, layout=hid_keymap.US, capacity=DEFAULT_CAPACITY, batch=1):
+        self.send = send            # send(report): USB send_report / BLE notify
+        self.profile = profile
+        self.layout = layout
+        self.batch = batch
+        self.capacity = capacity
+        self.queue = bytearray(capacity * REPORT_SIZE)
+        self.pressed = bytearray(capacity)  # 1 = report com teclas
+        self.length = 0
+        self.pos = 0
+        self.cancelled = False
+        self.on_done = None
+        self.sent = 0
+        self.dropped = 0
+        self._view = memoryview(self.queue)
+        self._report = bytearray(REPORT_SIZE)
+        self._release = bytes(REPORT_SIZE)
+        self._active = profile
+        self._source = None  # hid_keymap.pack() do texto, enquanto faltar bloco
+        self._filled = 0     # maior bloco desta digitação (zerado no fim)
+        self._t0 = 0
+        self._timer = timers.one_shot()
+        self._tick_cb = self._tick  # sem alocar um bound method por report
+
+    def busy(self):
+        return self.pos < self.length or self._source is not None
+
+    def start(self, text, profile=None, on_done=None, layout=None):
+        """Enfileira text e começa a enviar; on_done(completed) ao terminar."""
+        if self.busy():
+            self.cancel()
+        self._filled = 0
+        self._source = hid_keymap.pack(text, self._report, layout or self.layout)
+        self._run(self._fill(), profile, on_done)
+
+    def _fill(self):
+        """Monta o próximo bloco de _source no início da fila; quantos reports."""
+        source = self._source
+        if source is None:
+            return 0
+        report = self._report  # pack() continua do estado deste buffer
+        n = 0
+        for pressed in source:
+            self.queue[n * REPORT_SIZE:(n + 1) * REPORT_SIZE] = report
+            self.pressed[n] = pressed
+            n += 1
+            if n == self.capacity:
+                break
+        else:
+            self._source = None
+        if n > self._filled:
+            self._filled = n
+        return n
+
+    def play(self, program, profile=None, on_done=None):
+        """Como start(), para uma macro compilada (macro.Program)."""
+        n = len(program)
+        if n > self.capacity:
+            raise ValueError("macro too long")
+        if self.busy():
+            self.cancel()
+        self.queue[:n * REPORT_SIZE] = program.reports
+        self.pressed[:n] = program.ops
+        self._filled = n
+        self._run(n, profile, on_done)
+
+    def _run(self, n, profile, on_done):
+        self.pos = 0
+        self.length = n
+        self.sent = self.dropped = 0
+        self.cancelled = False
+        self.on_done = on_done
+        self._active = profile or self.profile
+        self._t0 = time.ticks_us()
+        tracebuf.record(tracebuf.HID_BEGIN)
+        if not n:
+            self._finish(True)
+        elif self._active.pre_ms:
+            self._arm(self._active.pre_ms)
+        else:
+            self._tick()
+
+    def wait(self):
+        """Bloqueia até a fila esvaziar (timers rodam durante o sleep)."""
+        while self.busy():
+            time.sleep_ms(1)
+        return not self.cancelled
+
+    def cancel(self):
+        """Interrompe a digitação e solta todas as teclas; False se ociosa."""
+        if not self.busy():
+            return False
+        self._timer.deinit()
+        tracebuf.record(tracebuf.HID_CANCEL, self.sent)
+        self._source = None
+        self.pos = self.length
+        self.cancelled = True
+        if self.sent:
+            try:
+                self.send(self._release)
+            except Exception as e:
+                print(f"HID error: {e}")
+        self._finish(False)
+        return True
+
+    def _arm(self, delay_ms):
+        self._timer.init(mode=Timer.ONE_SHOT, period=delay_ms, callback=self._tick_cb)
+
+    def _tick(self, timer=None):
+        profile = self._active
+        burst = 0
+        while self.pos < self.length or self._next_block():
+            i = self.pos
+            self.pos += 1
+            report = self._view[i * REPORT_SIZE:(i + 1) * REPORT_SIZE]
+            if self.pressed[i] == PAUSE:
+                if self.busy():
+                    self._arm(report[0] | report[1] << 8 or 1)
+                    return
+                continue
+            tracebuf.record(tracebuf.HID_REPORT, self.sent)
+            try:
+                self.send(report)
+            except Exception as e:
+                print(f"HID error: {e}")
+                self.dropped = self.length - i
+                self.pos = i  # cancel() solta as teclas e fecha o trace
+                self.cancel()
+                return
+            self.sent += 1
+            burst += 1
+            delay = profile.key_ms if self.pressed[i] else profile.release_ms
+            if delay and burst >= self.batch and self.busy():
+                self._arm(delay)
+                return
+        self._finish(True)
+
+    def _next_block(self):
+        # Fila vazia: o próximo bloco do texto, se houver
+        n = self._fill()
+        if not n:
+            return False
+        self.pos = 0
+        self.length = n
+        return True
+
+    def _finish(self, completed):
+        # A fila guarda teclas derivadas da senha: zerar ao terminar
+        for i in range(self._filled * REPORT_SIZE):
+            self.queue[i] = 0
+        hid_keymap.release(self._report)
+        self._source = None
+        self.length = self.pos = self._filled = 0
+        tracebuf.record(tracebuf.HID_END)
+        if completed:
+            metrics.stats.record(metrics.TYPE, time.ticks_diff(time.ticks_us(), self._t0))
+        if self.on_done:
+            on_done, self.on_done = self.on_done, None
+            on_done(completed)
@@ -0,0 +1,146 @@
+# firmware/micropython/typing_profile.py
+# Perfis de velocidade de digitação e calibração automática
+#
+# device.cfg guarda os perfis na seção "typing":
+#
+#   "typing": {"profile": "rdp",
+#              "profiles": {"rdp": {"key_ms": 30, "release_ms": 15, "pre_ms": 500}}}
+#
+# key_ms: pausa após cada report com teclas; release_ms: pausa após cada
+# release; pre_ms: pausa antes de começar (host trocando o foco).
+# CALIBRATE_TYPING digita TEST_TEXT num capturador do host
+# (python -m picopass_client.calibrate), que devolve quantos caracteres
+# chegaram; a busca binária acha o menor key_ms confiável e grava o perfil
+# "calibrated".
+
+import json
+import metrics
+
+CONFIG_FILE = "device.cfg"
+
+# name -> (key_ms, release_ms, pre_ms)
+PROFILES = {
+    "default": (10, 0, 0),
+    "safe": (30, 15, 500),   # VMs, RDP, KVMs
+    "fast": (2, 0, 0),       # bare metal
+}
+
+# Maiúsculas, repetições e símbolos: os casos que perdem tecla primeiro
+TEST_TEXT = "PicoPass calibration: bookkeeper Mississippi 0123456789 The Quick Brown Fox ~!@#$%^&*()_+-=[]{};:,.<>/?"
+
+CALIBRATE_MIN_MS = 1
+CALIBRATE_MAX_MS = 40
+CALIBRATE_MARGIN = 4  # resultado += resultado // 4 (25% de folga)
+
+
+class TypingProfile:
+    """Pausas usadas ao digitar (ms)."""
+
+    def __init__(self, name="default", key_ms=10, release_ms=0, pre_ms=0):
+        self.name = name
+        self.key_ms = key_ms
+        self.release_ms = release_ms
+        self.pre_ms = pre_ms
+
+    def to_dict(self):
+        return {"key_ms": self.key_ms, "release_ms": self.release_ms, "pre_ms": self.pre_ms}
+
+    def __repr__(self):
+        return "TypingProfile({}, key_ms={}, release_ms={}, pre_ms={})".format(
+            self.name, self.key_ms, self.release_ms, self.pre_ms)
+
+
+def builtin(name="default"):
+    key_ms, release_ms, pre_ms = PROFILES[name]
+    return TypingProfile(name, key_ms, release_ms, pre_ms)
+
+
+def select(config):
+    """Perfil ativo de um device.cfg já lido (ou None)."""
+    typing = (config or {}).get("typing") or {}
+    name = typing.get("profile", "default")
+    custom = typing.get("profiles") or {}
+    if name in custom:
+        base = builtin(name if name in PROFILES else "default")
+        values = custom[name]
+        return TypingProfile(name,
+                             int(values.get("key_ms", base.key_ms)),
+                             int(values.get("release_ms", base.release_ms)),
+                             int(values.get("pre_ms", base.pre_ms)))
+    if name in PROFILES:
+        return builtin(name)
+    print(f"! Unknown typing profile: {name}")
+    return builtin()
+
+
+def read_config(path=CONFIG_FILE):
+    """device.cfg como dict, ou None."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except:
+        return None
+
+
+def load(path=CONFIG_FILE):
+    """Perfil ativo segundo device.cfg (default se não houver arquivo)."""
+    return select(read_config(path))
+
+
+@metrics.timed(metrics.SAVE)
+def save(profile, path=CONFIG_FILE):
+    """Grava profile em device.cfg e o torna ativo; devolve a config."""
+    config = read_config(path) or {}
+    typing = config.get("typing") or {}
+    profiles = typing.get("profiles") or {}
+    profiles[profile.name] = profile.to_dict()
+    typing["profiles"] = profiles
+    typing["profile"] = profile.name
+    config["typing"] = typing
+    with open(path, "w") as f:
+        json.dump(config, f)
+    return config
+
+
+class Calibrator:
+    """Busca binária do menor key_ms em que TEST_TEXT chega inteiro.
+
+    A primeira rodada testa max_ms: se nem assim o texto chega, a
+    calibração falha em vez de gravar um valor não verificado.
+    """
+
+    def __init__(self, base=None, min_ms=CALIBRATE_MIN_MS, max_ms=CALIBRATE_MAX_MS):
+        self.base = base or builtin()
+        self.lo = max(0, min_ms)
+        self.hi = max(self.lo, max_ms)
+        self.delay_ms = self.hi
+        self.rounds = 0
+        self.failed = False
+
+    def probe(self):
+        """Perfil da rodada atual (release = metade da pausa)."""
+        return TypingProfile("probe", self.delay_ms, self.delay_ms // 2, self.base.pre_ms)
+
+    def feed(self, received):
+        """Registra quantos caracteres chegaram; False quando terminou."""
+        ok = received >= len(TEST_TEXT)
+        self.rounds += 1
+        if self.rounds == 1:
+            if not ok:
+                self.failed = True
+                return False
+        elif ok:
+            self.hi = self.delay_ms
+        else:
+            self.lo = self.delay_ms + 1
+        if self.lo >= self.hi:
+            return False
+        self.delay_ms = (self.lo + self.hi) // 2
+        return True
+
+    def result(self):
+        """Perfil "calibrated" com folga, ou None se falhou."""
+        if self.failed:
+            return None
+        key_ms = self.hi + self.hi // CALIBRATE_MARGIN
+        return TypingProfile("calibrated", key_ms, key_ms // 2, self.base.pre_ms)
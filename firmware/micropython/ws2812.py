@@ -0,0 +1,93 @@
+# firmware/micropython/ws2812.py
+# LED RGB endereçável (WS2812/NeoPixel) para placas com "has_rgb"
+#
+#   pixel = WS2812(48)
+#   pixel[0] = grb(0, 255, 0)   # verde
+#   pixel.write()               # um put (PIO) ou um bitstream (RMT) por quadro
+#
+# RP2: um programa PIO gera a forma de onda de 800 kHz a partir do TX FIFO
+# (autopull de 24 bits); o frame inteiro vai num único sm.put(). ESP32:
+# machine.bitstream, que lá é feito pelo periférico RMT. Nos dois casos a
+# CPU só monta as palavras GRB do quadro; sem nenhum dos dois (ou com a SM
+# reservada por outro driver em pio_sm) o construtor levanta OSError e quem
+# chamou volta para LEDs comuns.
+
+import machine
+from array import array
+from machine import Pin
+import pio_sm
+
+SM_ID = 7           # PIO1 SM3: os botões usam as state machines a partir da 0
+FREQ = 800000       # bits por segundo
+CYCLES_PER_BIT = 10  # T1 + T2 + T3
+TIMING_NS = (400, 850, 800, 450)  # machine.bitstream: alto/baixo do 0 e do 1
+
+try:
+    import rp2
+
+    @rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT,
+                 autopull=True, pull_thresh=24)
+    def _ws2812_program():
+        # T1 = 2, T2 = 5, T3 = 3 ciclos: 0 = alto 2 baixo 8, 1 = alto 7 baixo 3
+        wrap_target()
+        label("bitloop")
+        out(x, 1)               .side(0)    [2]
+        jmp(not_x, "do_zero")   .side(1)    [1]
+        jmp("bitloop")          .side(1)    [4]
+        label("do_zero")
+        nop()                   .side(0)    [4]
+        wrap()
+except (ImportError, AttributeError):
+    _ws2812_program = None
+
+
+def grb(r, g, b):
+    """Palavra GRB de 24 bits (componentes 0-255)."""
+    return g << 16 | r << 8 | b
+
+
+class WS2812:
+    """count pixels num pino; pixel[i] = grb(r, g, b), depois write()."""
+
+    def __init__(self, pin, count=1, sm_id=SM_ID):
+        self.count = count
+        self.words = array('I', [0] * count)
+        self.sm = None
+        self.pin = Pin(pin, Pin.OUT)
+        if _ws2812_program is not None and hasattr(rp2, "StateMachine"):
+            pio_sm.claim(sm_id, "ws2812")
+            try:
+                self.sm = rp2.StateMachine(sm_id, _ws2812_program, freq=FREQ * CYCLES_PER_BIT,
+                                           sideset_base=self.pin)
+            except (OSError, ValueError):
+                pio_sm.release(sm_id)
+                raise
+            self.sm.active(1)
+        elif hasattr(machine, "bitstream"):
+            self.buf = bytearray(3 * count)
+        else:
+            raise OSError("no PIO or RMT for WS2812")
+
+    def __setitem__(self, i, word):
+        self.words[i] = word
+
+    def __getitem__(self, i):
+        return self.words[i]
+
+    def fill(self, word):
+        for i in range(self.count):
+            self.words[i] = word
+
+    def write(self):
+        """Envia o quadro: uma chamada, sem alocar."""
+        if self.sm is not None:
+            # 24 bits alinhados no topo da palavra para o autopull
+            self.sm.put(self.words, 8)
+            return
+        buf = self.buf
+        for i in range(self.count):
+            word = self.words[i]
+            buf[3 * i] = word >> 16
+            buf[3 * i + 1] = (word >> 8) & 0xFF
+            buf[3 * i + 2] = word & 0xFF
+        machine.bitstream(self.pin, 0, TIMING_NS, buf)
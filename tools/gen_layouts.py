@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# tools/gen_layouts.py
+# Generates the keyboard layout tables in firmware/micropython/layouts/.
+#
+#   python tools/gen_layouts.py          # rewrite every kbd_*.py
+#   python tools/gen_layouts.py --check  # exit 1 if a table is out of date
+#
+# Each layout becomes a small module holding two bytes literals: KEYMAP,
+# (modifier, keycode) for ASCII 0-127, and DEAD, a 128-bit bitmap of the
+# characters that sit on a dead key and need a space after them. The
+# firmware imports only the layout it uses, so the others cost no RAM.
+
+import argparse
+import os
+import sys
+
+LAYOUT_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                           "..", "firmware", "micropython", "layouts"))
+
+SHIFT = 0x02
+ALTGR = 0x40  # right Alt
+
+SPACE = 0x2C
+
+# Keys that type the same thing everywhere: \b \t \n esc space del
+CONTROL = {"\b": 0x2A, "\t": 0x2B, "\n": 0x28, "\x1b": 0x29, " ": SPACE, "\x7f": 0x4C}
+
+DIGITS = {str((i + 1) % 10): 0x1E + i for i in range(10)}
+
+
+def letters(**moved):
+    """char -> keycode for a-z, with moved letters (e.g. y=0x1D)."""
+    table = {chr(ord("a") + i): 0x04 + i for i in range(26)}
+    table.update(moved)
+    return table
+
+
+class Layout:
+    """Where each printable ASCII character lives on a national layout.
+
+    keys: keycode -> (normal, shifted) characters (None where the key
+    types something outside ASCII); altgr: keycode -> character with AltGr;
+    dead: characters that are dead keys on this layout.
+    """
+
+    def __init__(self, name, title, keys, altgr=None, dead="", letter_keys=None, digits_shifted=False):
+        self.name = name
+        self.title = title
+        self.keys = keys
+        self.altgr = altgr or {}
+        self.dead = dead
+        self.letter_keys = letter_keys or letters()
+        self.digits_shifted = digits_shifted
+
+    def strokes(self):
+        """char -> (modifier, keycode) for ASCII 0-127."""
+        table = {}
+
+        def put(char, mod, key):
+            if char is not None and ord(char) < 128 and char not in table:
+                table[char] = (mod, key)
+
+        for char, key in CONTROL.items():
+            put(char, 0, key)
+        for char, key in self.letter_keys.items():
+            put(char, 0, key)
+            put(char.upper(), SHIFT, key)
+        if not self.digits_shifted:
+            for char, key in DIGITS.items():
+                put(char, 0, key)
+        for key, (normal, shifted) in sorted(self.keys.items()):
+            put(normal, 0, key)
+            put(shifted, SHIFT, key)
+        for key, char in sorted(self.altgr.items()):
+            put(char, ALTGR, key)
+        missing = [chr(i) for i in range(0x20, 0x7F) if chr(i) not in table]
+        if missing:
+            raise ValueError(f"{self.name}: no key for {''.join(missing)!r}")
+        return table
+
+    def render(self):
+        """Source of the generated firmware module."""
+        table = self.strokes()
+        lines = [
+            f"# firmware/micropython/layouts/kbd_{self.name}.py",
+            "# Gerado por tools/gen_layouts.py - não editar à mão",
+            f"# {self.title}",
+            "",
+            f'NAME = "{self.name}"',
+            "",
+            "# (modifier, keycode) por caractere ASCII; keycode 0 = sem tecla",
+            "KEYMAP = (",
+        ]
+        for row in range(0, 128, 8):
+            chunk = bytearray()
+            shown = []
+            for i in range(row, row + 8):
+                mod, key = table.get(chr(i), (0, 0))
+                chunk += bytes((mod, key))
+                if 0x20 <= i < 0x7F:
+                    shown.append("sp" if i == 0x20 else chr(i))
+            body = "".join(f"\\x{b:02x}" for b in chunk)
+            comment = f"0x{row:02x}" + (" " + " ".join(shown) if shown else "")
+            lines.append(f'    b"{body}"  # {comment}')
+        lines.append(")")
+        bitmap = bytearray(16)
+        for char in self.dead:
+            bitmap[ord(char) >> 3] |= 1 << (ord(char) & 7)
+        lines += [
+            "",
+            "# Bit i: o caractere i é tecla morta (seguida de espaço)",
+            'DEAD = b"' + "".join(f"\\x{b:02x}" for b in bitmap) + '"',
+            "",
+        ]
+        return "\n".join(lines)
+
+
+US_KEYS = {
+    0x1E: ("1", "!"), 0x1F: ("2", "@"), 0x20: ("3", "#"), 0x21: ("4", "$"),
+    0x22: ("5", "%"), 0x23: ("6", "^"), 0x24: ("7", "&"), 0x25: ("8", "*"),
+    0x26: ("9", "("), 0x27: ("0", ")"), 0x2D: ("-", "_"), 0x2E: ("=", "+"),
+    0x2F: ("[", "{"), 0x30: ("]", "}"), 0x31: ("\\", "|"), 0x33: (";", ":"),
+    0x34: ("'", '"'), 0x35: ("`", "~"), 0x36: (",", "<"), 0x37: (".", ">"),
+    0x38: ("/", "?"),
+}
+
+LAYOUTS = {
+    "us": Layout("us", "US (ANSI)", US_KEYS),
+    "us_intl": Layout("us_intl", "US International (Windows): ' \" ` ~ ^ are dead keys",
+                      US_KEYS, dead="'\"`~^"),
+    "abnt2": Layout(
+        "abnt2", "Brazilian ABNT2: ~ ^ ` are dead keys, / and ? on AltGr+Q/W",
+        {
+            0x1E: ("1", "!"), 0x1F: ("2", "@"), 0x20: ("3", "#"), 0x21: ("4", "$"),
+            0x22: ("5", "%"), 0x23: ("6", None), 0x24: ("7", "&"), 0x25: ("8", "*"),
+            0x26: ("9", "("), 0x27: ("0", ")"), 0x2D: ("-", "_"), 0x2E: ("=", "+"),
+            0x2F: (None, "`"), 0x30: ("[", "{"), 0x32: ("]", "}"), 0x34: ("~", "^"),
+            0x35: ("'", '"'), 0x36: (",", "<"), 0x37: (".", ">"), 0x38: (";", ":"),
+            0x64: ("\\", "|"),
+        },
+        # International1 (0x87) is past the BLE report map's usage maximum
+        altgr={0x14: "/", 0x1A: "?"},
+        dead="~^`"),
+    "de": Layout(
+        "de", "German (ISO, QWERTZ): ^ ` are dead keys",
+        {
+            0x1E: ("1", "!"), 0x1F: ("2", '"'), 0x20: ("3", None), 0x21: ("4", "$"),
+            0x22: ("5", "%"), 0x23: ("6", "&"), 0x24: ("7", "/"), 0x25: ("8", "("),
+            0x26: ("9", ")"), 0x27: ("0", "="), 0x2D: (None, "?"), 0x2E: (None, "`"),
+            0x30: ("+", "*"), 0x32: ("#", "'"), 0x35: ("^", None), 0x36: (",", ";"),
+            0x37: (".", ":"), 0x38: ("-", "_"), 0x64: ("<", ">"),
+        },
+        altgr={0x14: "@", 0x24: "{", 0x25: "[", 0x26: "]", 0x27: "}", 0x2D: "\\",
+               0x30: "~", 0x64: "|"},
+        dead="^`",
+        letter_keys=letters(y=0x1D, z=0x1C)),
+    "fr": Layout(
+        "fr", "French (AZERTY, Windows): ~ ` are dead keys, digits on Shift",
+        {
+            0x1E: ("&", "1"), 0x1F: (None, "2"), 0x20: ('"', "3"), 0x21: ("'", "4"),
+            0x22: ("(", "5"), 0x23: ("-", "6"), 0x24: (None, "7"), 0x25: ("_", "8"),
+            0x26: (None, "9"), 0x27: (None, "0"), 0x2D: (")", None), 0x2E: ("=", "+"),
+            0x30: ("$", None), 0x32: ("*", None), 0x34: (None, "%"), 0x10: (",", "?"),
+            0x36: (";", "."), 0x37: (":", "/"), 0x38: ("!", None), 0x64: ("<", ">"),
+        },
+        altgr={0x1F: "~", 0x20: "#", 0x21: "{", 0x22: "[", 0x23: "|", 0x24: "`",
+               0x25: "\\", 0x26: "^", 0x27: "@", 0x2D: "]", 0x2E: "}"},
+        dead="~`",
+        letter_keys=letters(a=0x14, q=0x04, z=0x1A, w=0x1D, m=0x33),
+        digits_shifted=True),
+}
+
+
+def module_path(name, layout_dir=LAYOUT_DIR):
+    return os.path.join(layout_dir, f"kbd_{name}.py")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate PicoPass keyboard layout tables")
+    parser.add_argument("--check", action="store_true",
+                        help="only verify that the generated files are up to date")
+    parser.add_argument("--out", default=LAYOUT_DIR, help="output directory")
+    args = parser.parse_args(argv)
+
+    stale = []
+    for name, layout in sorted(LAYOUTS.items()):
+        path = module_path(name, args.out)
+        source = layout.render()
+        try:
+            with open(path, encoding="utf-8") as f:
+                current = f.read()
+        except FileNotFoundError:
+            current = None
+        if current == source:
+            continue
+        if args.check:
+            stale.append(path)
+            continue
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        print(f"✓ {path}")
+
+    if stale:
+        print("✗ Out of date (run tools/gen_layouts.py):\n  " + "\n  ".join(stale))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
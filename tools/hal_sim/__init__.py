@@ -0,0 +1,27 @@
+# tools/hal_sim
+# MicroPython HAL emulation for running firmware modules on CPython,
+# driven by a controllable (virtual or real) clock.
+
+from .bluetooth import UUID
+from .clock import RealClock, VirtualClock
+from .flash import FlashFS
+from .hal import DEFAULT_UNIQUE_ID, FIRMWARE_DIR, Hal, install, is_firmware_module
+from .ssd1306 import SSD1306Panel
+from .uselect import VirtualStream
+from .usb_hid import HIDDevice, decode_reports
+
+__all__ = [
+    "DEFAULT_UNIQUE_ID",
+    "FIRMWARE_DIR",
+    "FlashFS",
+    "HIDDevice",
+    "Hal",
+    "RealClock",
+    "SSD1306Panel",
+    "UUID",
+    "VirtualClock",
+    "VirtualStream",
+    "decode_reports",
+    "install",
+    "is_firmware_module",
+]
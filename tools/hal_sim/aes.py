@@ -0,0 +1,155 @@
+# tools/hal_sim/aes.py
+# Pure-Python AES (ECB/CBC) standing in for MicroPython's ucryptolib.aes.
+# Slow, but host runs only ever encrypt a few blocks at a time.
+
+
+def _xtime(a):
+    a <<= 1
+    return (a ^ 0x11B) if a & 0x100 else a
+
+
+def _build_sbox():
+    sbox = [0] * 256
+    p = q = 1
+    while True:
+        # p walks the multiplicative group, q tracks its inverse
+        p = p ^ _xtime(p)
+        q ^= q << 1
+        q ^= q << 2
+        q ^= q << 4
+        q &= 0xFF
+        if q & 0x80:
+            q ^= 0x09
+        x = q ^ (q << 1 | q >> 7) ^ (q << 2 | q >> 6) ^ (q << 3 | q >> 5) ^ (q << 4 | q >> 4)
+        sbox[p] = (x ^ 0x63) & 0xFF
+        if p == 1:
+            break
+    sbox[0] = 0x63
+    return sbox
+
+
+_SBOX = _build_sbox()
+_INV_SBOX = [0] * 256
+for _i, _v in enumerate(_SBOX):
+    _INV_SBOX[_v] = _i
+
+
+def _mul(a, b):
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        a = _xtime(a)
+        b >>= 1
+    return result
+
+
+def _expand_key(key):
+    nk = len(key) // 4
+    if nk not in (4, 6, 8):
+        raise ValueError("key must be 16, 24 or 32 bytes")
+    rounds = nk + 6
+    words = [list(key[4 * i:4 * i + 4]) for i in range(nk)]
+    rcon = 1
+    for i in range(nk, 4 * (rounds + 1)):
+        w = list(words[i - 1])
+        if i % nk == 0:
+            w = w[1:] + w[:1]
+            w = [_SBOX[b] for b in w]
+            w[0] ^= rcon
+            rcon = _xtime(rcon) & 0xFF
+        elif nk > 6 and i % nk == 4:
+            w = [_SBOX[b] for b in w]
+        words.append([a ^ b for a, b in zip(words[i - nk], w)])
+    return [sum(words[4 * r:4 * r + 4], []) for r in range(rounds + 1)]
+
+
+def _shift_rows(s, inverse=False):
+    out = [0] * 16
+    for c in range(4):
+        for r in range(4):
+            shift = -r if inverse else r
+            out[4 * c + r] = s[4 * ((c + shift) % 4) + r]
+    return out
+
+
+def _mix_columns(s, matrix):
+    out = [0] * 16
+    for c in range(4):
+        col = s[4 * c:4 * c + 4]
+        for r in range(4):
+            out[4 * c + r] = (_mul(col[0], matrix[r][0]) ^ _mul(col[1], matrix[r][1]) ^
+                              _mul(col[2], matrix[r][2]) ^ _mul(col[3], matrix[r][3]))
+    return out
+
+
+_MIX = [[2, 3, 1, 1], [1, 2, 3, 1], [1, 1, 2, 3], [3, 1, 1, 2]]
+_INV_MIX = [[14, 11, 13, 9], [9, 14, 11, 13], [13, 9, 14, 11], [11, 13, 9, 14]]
+
+
+def _encrypt_block(round_keys, block):
+    s = [a ^ b for a, b in zip(block, round_keys[0])]
+    for rnd in range(1, len(round_keys)):
+        s = _shift_rows([_SBOX[b] for b in s])
+        if rnd != len(round_keys) - 1:
+            s = _mix_columns(s, _MIX)
+        s = [a ^ b for a, b in zip(s, round_keys[rnd])]
+    return bytes(s)
+
+
+def _decrypt_block(round_keys, block):
+    s = [a ^ b for a, b in zip(block, round_keys[-1])]
+    for rnd in range(len(round_keys) - 2, -1, -1):
+        s = _shift_rows(s, inverse=True)
+        s = [_INV_SBOX[b] for b in s]
+        s = [a ^ b for a, b in zip(s, round_keys[rnd])]
+        if rnd:
+            s = _mix_columns(s, _INV_MIX)
+    return bytes(s)
+
+
+MODE_ECB = 1
+MODE_CBC = 2
+
+
+class aes:
+    """ucryptolib.aes(key, mode[, IV]) with encrypt()/decrypt()."""
+
+    def __init__(self, key, mode, IV=None):
+        if mode not in (MODE_ECB, MODE_CBC):
+            raise ValueError("mode")
+        self._round_keys = _expand_key(bytes(key))
+        self._mode = mode
+        self._iv = bytes(IV) if IV is not None else bytes(16)
+        self._used = None
+
+    def _check(self, direction, data):
+        # Like ucryptolib, an object can only encrypt or decrypt, not both
+        if self._used not in (None, direction):
+            raise OSError("can't encrypt & decrypt")
+        self._used = direction
+        if len(data) % 16:
+            raise ValueError("blksize")
+
+    def encrypt(self, data):
+        self._check("enc", data)
+        out = bytearray()
+        for i in range(0, len(data), 16):
+            block = data[i:i + 16]
+            if self._mode == MODE_CBC:
+                block = bytes(a ^ b for a, b in zip(block, self._iv))
+            self._iv = _encrypt_block(self._round_keys, block)
+            out += self._iv
+        return bytes(out)
+
+    def decrypt(self, data):
+        self._check("dec", data)
+        out = bytearray()
+        for i in range(0, len(data), 16):
+            block = bytes(data[i:i + 16])
+            plain = _decrypt_block(self._round_keys, block)
+            if self._mode == MODE_CBC:
+                plain = bytes(a ^ b for a, b in zip(plain, self._iv))
+                self._iv = block
+            out += plain
+        return bytes(out)
@@ -0,0 +1,129 @@
+# tools/hal_sim/bluetooth.py
+# Fake `bluetooth` module: a BLE peripheral that records what it is asked
+# to do, plus helpers for tests to play the central's part.
+
+import types
+
+_IRQ_CENTRAL_CONNECT = 1
+_IRQ_CENTRAL_DISCONNECT = 2
+_IRQ_GATTS_WRITE = 3
+_IRQ_CONNECTION_UPDATE = 27
+
+FLAG_BROADCAST = 0x0001
+FLAG_READ = 0x0002
+FLAG_WRITE_NO_RESPONSE = 0x0004
+FLAG_WRITE = 0x0008
+FLAG_NOTIFY = 0x0010
+FLAG_INDICATE = 0x0020
+
+
+class UUID:
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, UUID) and self.value == other.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return f"UUID({self.value!r})"
+
+
+class BLE:
+    _hal = None
+
+    def __init__(self):
+        self._active = False
+        self._handler = None
+        self._next_handle = 1
+        self.values = {}
+        self.notifications = []   # (t_us, conn_handle, value_handle, bytes)
+        self.advertising = []     # (t_us, interval_us or None)
+        self.conn_params = {}     # conn_handle -> (interval_us, latency, timeout_ms)
+        self._config = {"gap_name": b"MPY", "mtu": 23}
+        self._hal.ble = self
+
+    # ---- MicroPython API --------------------------------------------------
+
+    def active(self, active=None):
+        if active is None:
+            return self._active
+        self._active = bool(active)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def irq(self, handler):
+        self._handler = handler
+
+    def gap_advertise(self, interval_us, adv_data=None, resp_data=None, connectable=True):
+        self.advertising.append((self._hal.clock.now_us(), interval_us))
+
+    def gap_disconnect(self, conn_handle):
+        self.disconnect(conn_handle)
+        return True
+
+    def gatts_register_services(self, services):
+        handles = []
+        for _uuid, characteristics in services:
+            service_handles = []
+            # Value handles of characteristics and their descriptors, in order
+            for characteristic in characteristics:
+                service_handles.append(self._alloc())
+                descriptors = characteristic[2] if len(characteristic) > 2 else ()
+                if isinstance(descriptors, (tuple, list)):
+                    for _descriptor in descriptors:
+                        service_handles.append(self._alloc())
+            handles.append(tuple(service_handles))
+        return tuple(handles)
+
+    def gatts_read(self, value_handle):
+        return self.values.get(value_handle, b"")
+
+    def gatts_write(self, value_handle, data, send_update=False):
+        self.values[value_handle] = bytes(data)
+
+    def gatts_notify(self, conn_handle, value_handle, data=None):
+        if conn_handle not in self.conn_params:
+            raise OSError(128)  # ENOTCONN
+        payload = self.values.get(value_handle, b"") if data is None else bytes(data)
+        self.notifications.append((self._hal.clock.now_us(), conn_handle, value_handle, payload))
+
+    def _alloc(self):
+        handle = self._next_handle
+        self._next_handle += 1
+        return handle
+
+    # ---- test helpers (the central's side) --------------------------------
+
+    def connect(self, conn_handle=0, addr_type=0, addr=b"\x00" * 6, interval_us=50000):
+        """Simulate a central connecting with the given connection interval."""
+        self.conn_params[conn_handle] = (interval_us, 0, 4000)
+        if self._handler:
+            self._handler(_IRQ_CENTRAL_CONNECT, (conn_handle, addr_type, addr))
+
+    def disconnect(self, conn_handle=0, addr_type=0, addr=b"\x00" * 6):
+        self.conn_params.pop(conn_handle, None)
+        if self._handler:
+            self._handler(_IRQ_CENTRAL_DISCONNECT, (conn_handle, addr_type, addr))
+
+    def update_connection(self, conn_handle, interval_us, latency=0, timeout_ms=4000):
+        """Simulate the central accepting new connection parameters."""
+        self.conn_params[conn_handle] = (interval_us, latency, timeout_ms)
+        if self._handler:
+            self._handler(_IRQ_CONNECTION_UPDATE,
+                          (conn_handle, interval_us // 1250, latency, timeout_ms // 10, 0))
+
+
+def make_bluetooth(hal):
+    mod = types.ModuleType("bluetooth")
+    mod.BLE = type("BLE", (BLE,), {"_hal": hal})
+    mod.UUID = UUID
+    for name, value in globals().items():
+        if name.startswith("FLAG_"):
+            setattr(mod, name, value)
+    return mod
@@ -0,0 +1,183 @@
+# tools/hal_sim/clock.py
+# Clocks driving the fake HAL.
+#
+# Everything time-related in hal_sim (utime, machine.Timer, scripted pin
+# changes, poll timeouts) goes through one clock object:
+#
+# - VirtualClock: time only moves when the firmware sleeps/polls or the
+#   test calls advance(). Sleeps return immediately, so minutes of device
+#   time run in milliseconds and every run replays identically.
+# - RealClock: wall-clock time, for interactive use (the pty simulator).
+#
+# Scheduled callbacks run from inside clock calls, the way MicroPython
+# runs soft IRQs and Timer callbacks between bytecodes.
+
+import heapq
+import time as _time
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+
+
+class _Event:
+    __slots__ = ("due", "seq", "callback", "cancelled")
+
+    def __init__(self, due, seq, callback):
+        self.due = due
+        self.seq = seq
+        self.callback = callback
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.due, self.seq) < (other.due, other.seq)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _Clock:
+    """Shared scheduling logic; subclasses define how time passes."""
+
+    # Wall-clock seconds reported by time.time() at now_us() == 0
+    epoch = 1767225600  # 2026-01-01 00:00:00 UTC
+    realtime = False
+
+    def __init__(self):
+        self._events = []
+        self._seq = 0
+        self._dispatching = False
+
+    def now_us(self):
+        raise NotImplementedError
+
+    def sleep_us(self, us):
+        raise NotImplementedError
+
+    # ---- scheduling -------------------------------------------------------
+
+    def call_at(self, due_us, callback):
+        """Run callback() once the clock reaches due_us; returns a handle."""
+        self._seq += 1
+        event = _Event(int(due_us), self._seq, callback)
+        heapq.heappush(self._events, event)
+        return event
+
+    def call_later(self, delay_us, callback):
+        return self.call_at(self.now_us() + delay_us, callback)
+
+    def next_event_us(self):
+        """Due time of the next pending callback, or None."""
+        while self._events and self._events[0].cancelled:
+            heapq.heappop(self._events)
+        return self._events[0].due if self._events else None
+
+    def _run_until(self, limit_us, set_now=None):
+        """Fire every callback due at or before limit_us, in order."""
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            while True:
+                due = self.next_event_us()
+                if due is None or due > limit_us:
+                    return
+                event = heapq.heappop(self._events)
+                if set_now:
+                    set_now(event.due)
+                event.callback()
+        finally:
+            self._dispatching = False
+
+    # ---- MicroPython time API ---------------------------------------------
+
+    def ticks_us(self):
+        return self.now_us() & TICKS_MAX
+
+    def ticks_ms(self):
+        return (self.now_us() // 1000) & TICKS_MAX
+
+    def time(self):
+        return self.epoch + self.now_us() // 1000000
+
+    def time_ns(self):
+        return self.epoch * 1000000000 + self.now_us() * 1000
+
+    @staticmethod
+    def ticks_add(ticks, delta):
+        return (ticks + delta) & TICKS_MAX
+
+    @staticmethod
+    def ticks_diff(a, b):
+        diff = (a - b) & TICKS_MAX
+        return diff - TICKS_PERIOD if diff >= TICKS_PERIOD // 2 else diff
+
+
+class VirtualClock(_Clock):
+    """Deterministic clock that only advances when asked to."""
+
+    def __init__(self, start_us=0):
+        super().__init__()
+        self._now = int(start_us)
+
+    def now_us(self):
+        return self._now
+
+    def _set(self, t):
+        if t > self._now:
+            self._now = t
+
+    def advance(self, us):
+        """Move time forward, firing scheduled callbacks on the way."""
+        target = self._now + max(0, int(us))
+        self._run_until(target, self._set)
+        self._now = max(self._now, target)
+
+    def advance_ms(self, ms):
+        self.advance(int(ms * 1000))
+
+    def sleep_us(self, us):
+        self.advance(us)
+
+    def run_due(self):
+        self._run_until(self._now, self._set)
+
+
+class RealClock(_Clock):
+    """Wall-clock time; callbacks fire whenever the firmware touches time."""
+
+    realtime = True
+
+    def __init__(self):
+        super().__init__()
+        self._start = _time.monotonic()
+
+    def now_us(self):
+        return int((_time.monotonic() - self._start) * 1000000)
+
+    def run_due(self):
+        self._run_until(self.now_us())
+
+    def ticks_us(self):
+        self.run_due()
+        return super().ticks_us()
+
+    def ticks_ms(self):
+        self.run_due()
+        return super().ticks_ms()
+
+    def sleep_us(self, us):
+        target = self.now_us() + max(0, int(us))
+        while True:
+            self.run_due()
+            now = self.now_us()
+            if now >= target:
+                return
+            due = self.next_event_us()
+            wake = target if due is None else min(target, due)
+            _time.sleep(max(0, wake - now) / 1000000)
+
+    def advance(self, us):
+        self.sleep_us(us)
+
+    def advance_ms(self, ms):
+        self.sleep_us(int(ms * 1000))
@@ -0,0 +1,51 @@
+# tools/hal_sim/flash.py
+# The board's flash filesystem, mapped onto a host directory
+
+import builtins
+import os as _os
+import types
+
+
+class FlashFS:
+    """Maps firmware paths ("/x.json" or "x.json") into a host directory."""
+
+    def __init__(self, root):
+        self.root = _os.path.abspath(root)
+        _os.makedirs(self.root, exist_ok=True)
+        self.os = self._make_os()
+
+    def path(self, p):
+        p = _os.fspath(p)
+        return _os.path.join(self.root, p.lstrip("/"))
+
+    def open(self, file, mode="r", *args, **kwargs):
+        if isinstance(file, int):
+            return builtins.open(file, mode, *args, **kwargs)
+        return builtins.open(self.path(file), mode, *args, **kwargs)
+
+    def _make_os(self):
+        # The subset of MicroPython's os module the firmware relies on
+        mod = types.ModuleType("os")
+        mod.stat = lambda p: _os.stat(self.path(p))
+        mod.remove = lambda p: _os.remove(self.path(p))
+        mod.rename = lambda a, b: _os.replace(self.path(a), self.path(b))
+        mod.listdir = lambda p="/": sorted(_os.listdir(self.path(p)))
+        mod.mkdir = lambda p: _os.mkdir(self.path(p))
+        mod.rmdir = lambda p: _os.rmdir(self.path(p))
+        mod.urandom = _os.urandom
+        mod.sep = "/"
+        mod.uname = lambda: ("rp2", "rp2", "1.24.0", "v1.24.0", "PicoPass simulator")
+
+        def statvfs(p="/"):
+            st = _os.statvfs(self.root)
+            return (st.f_bsize, st.f_frsize, st.f_blocks, st.f_bfree,
+                    st.f_bavail, st.f_files, st.f_ffree, st.f_favail, 0, st.f_namemax)
+
+        mod.statvfs = statvfs
+        return mod
+
+    def attach(self, module):
+        """Route a firmware module's open() and os.* through this filesystem."""
+        module.open = self.open
+        if isinstance(getattr(module, "os", None), types.ModuleType):
+            module.os = self.os
@@ -0,0 +1,157 @@
+# tools/hal_sim/framebuf.py
+# Fake `framebuf` module (MONO_VLSB / MONO_HLSB / MONO_HMSB).
+#
+# Drawing semantics and clipping follow MicroPython's framebuf. The 8x8
+# glyphs are deterministic stand-ins, not the real petme128 font: text
+# occupies the same cells and changes the same pages, which is what host
+# runs measure, but it is not meant to be read.
+
+import types
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+MVLSB = MONO_VLSB
+
+
+def _glyph(code):
+    if code <= 32 or code > 126:
+        return bytes(8)
+    seed = (code * 2654435761) & 0xFFFFFFFF
+    return bytes(((seed >> (4 * i)) & 0x7E) | 0x01 for i in range(7)) + b"\x00"
+
+
+_FONT = [_glyph(c) for c in range(128)]
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buf = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+
+    # ---- pixel access -----------------------------------------------------
+
+    def _index(self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        offset = (y * self.stride + x) >> 3
+        bit = x & 7
+        return offset, (7 - bit) if self.format == MONO_HLSB else bit
+
+    def _get(self, x, y):
+        offset, bit = self._index(x, y)
+        return (self.buf[offset] >> bit) & 1
+
+    def _set(self, x, y, c):
+        offset, bit = self._index(x, y)
+        if c:
+            self.buf[offset] |= 1 << bit
+        else:
+            self.buf[offset] &= ~(1 << bit) & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    # ---- primitives -------------------------------------------------------
+
+    def fill(self, c):
+        if self.format == MONO_VLSB and self.stride == self.width:
+            value = 0xFF if c else 0
+            for i in range(len(self.buf)):
+                self.buf[i] = value
+        else:
+            self.fill_rect(0, 0, self.width, self.height, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx, dy = abs(x1 - x0), -abs(y1 - y0)
+        sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            glyph = _FONT[ord(ch) & 0x7F] if ord(ch) < 128 else _FONT[127]
+            for col in range(8):
+                xx = x + col
+                if 0 <= xx < self.width:
+                    bits = glyph[col]
+                    for row in range(8):
+                        if bits >> row & 1:
+                            yy = y + row
+                            if 0 <= yy < self.height:
+                                self._set(xx, yy, c)
+            x += 8
+
+    def scroll(self, xstep, ystep):
+        pixels = [[self._get(x, y) for x in range(self.width)] for y in range(self.height)]
+        for y in range(self.height):
+            for x in range(self.width):
+                sx, sy = x - xstep, y - ystep
+                if 0 <= sx < self.width and 0 <= sy < self.height:
+                    self._set(x, y, pixels[sy][sx])
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        for sy in range(fbuf.height):
+            yy = y + sy
+            if not 0 <= yy < self.height:
+                continue
+            for sx in range(fbuf.width):
+                xx = x + sx
+                if not 0 <= xx < self.width:
+                    continue
+                c = fbuf._get(sx, sy)
+                if palette is not None:
+                    c = palette._get(c, 0)
+                if c != key:
+                    self._set(xx, yy, c)
+
+
+def make_framebuf():
+    mod = types.ModuleType("framebuf")
+    mod.FrameBuffer = FrameBuffer
+    mod.FrameBuffer1 = FrameBuffer
+    mod.MONO_VLSB = mod.MVLSB = MONO_VLSB
+    mod.MONO_HLSB = MONO_HLSB
+    mod.MONO_HMSB = MONO_HMSB
+    return mod
@@ -0,0 +1,221 @@
+# tools/hal_sim/hal.py
+# One simulated board: the clock, its GPIO lines and peripherals, and the
+# fake modules the firmware imports.
+
+import binascii
+import builtins
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+
+from . import aes as _aes
+from .bluetooth import make_bluetooth
+from .clock import VirtualClock
+from .flash import FlashFS
+from .framebuf import make_framebuf
+from .machine import GpioLine, make_machine
+from .pio import PIO, PIOBlock, StateMachine, asm_pio
+from .uselect import VirtualStream, make_uselect
+from .usb_hid import HIDDevice, make_adafruit_hid, make_usb_hid
+from .utime import make_time
+
+DEFAULT_UNIQUE_ID = binascii.unhexlify("e6605838834c2a2f")
+
+FIRMWARE_DIR = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "firmware", "micropython"))
+
+# Imported up front so they bind the real `time`, not the HAL one
+_STDLIB_PRELOAD = ("binascii", "codecs", "gc", "hashlib", "json", "os", "select", "struct")
+
+
+class Hal:
+    """Fake MicroPython HAL for one board.
+
+        hal = Hal()                      # virtual clock
+        hal.install()
+        main = hal.import_firmware("main")
+        main = hal.boot("main", {"layout": "de"})  # on a fresh flash, hal.fs
+        hal.press(14, duration_ms=80)    # scripted button press
+        hal.clock.advance_ms(100)
+    """
+
+    def __init__(self, clock=None, unique_id=DEFAULT_UNIQUE_ID, on_report=None, pio=False):
+        self.clock = clock or VirtualClock()
+        self.unique_id = unique_id
+        self.cpu_freq = 125000000
+        self.bootsel = False
+        self.lines = {}
+        self.pwms = []
+        self.timers = set()
+        self.hw_timers = {}  # id >= 0 -> the Timer object last init()ed on it
+        self.i2c_devices = {}
+        self.fs = None  # FlashFS of the last boot()
+        self.ble = None
+        # rp2.PIO/StateMachine only with pio=True: by default the firmware
+        # takes its non-PIO paths, as on a board without PIO
+        self.pio = PIOBlock(self) if pio else None
+        self.keyboard = HIDDevice(self.clock, on_report=on_report)
+        self.time = make_time(self.clock)
+        self.machine = make_machine(self)
+        self.modules = {
+            "machine": self.machine,
+            "utime": self.time,
+            "uselect": make_uselect(self.clock),
+            "rp2": self._make_rp2(),
+            "bluetooth": make_bluetooth(self),
+            "usb_hid": make_usb_hid(self.keyboard),
+            "micropython": self._make_micropython(),
+            "framebuf": make_framebuf(),
+            "ucryptolib": self._make_module("ucryptolib", aes=_aes.aes,
+                                            MODE_ECB=_aes.MODE_ECB, MODE_CBC=_aes.MODE_CBC),
+        }
+        self.modules.update(make_adafruit_hid())
+
+    @staticmethod
+    def _make_module(name, **attrs):
+        mod = types.ModuleType(name)
+        for key, value in attrs.items():
+            setattr(mod, key, value)
+        return mod
+
+    def _make_rp2(self):
+        rp2 = self._make_module("rp2", bootsel_button=lambda: int(self.bootsel))
+        if self.pio is not None:
+            rp2.PIO = PIO
+            rp2.StateMachine = type("StateMachine", (StateMachine,), {"_hal": self})
+            rp2.asm_pio = asm_pio
+        return rp2
+
+    def _make_micropython(self):
+        return self._make_module(
+            "micropython",
+            const=lambda x: x,
+            native=lambda f: f,
+            viper=lambda f: f,
+            schedule=lambda func, arg: self.clock.call_later(0, lambda: func(arg)),
+            alloc_emergency_exception_buf=lambda size: None,
+            mem_info=lambda *args: None,
+        )
+
+    # ---- installation -----------------------------------------------------
+
+    def install(self):
+        """Put the fake modules into sys.modules."""
+        sys.modules.update(self.modules)
+        # The MicroPython compiler treats const() as a builtin
+        builtins.const = lambda x: x
+        return self
+
+    def uninstall(self):
+        for name, module in self.modules.items():
+            if sys.modules.get(name) is module:
+                del sys.modules[name]
+
+    def import_firmware(self, name, firmware_dir=FIRMWARE_DIR, fresh=True):
+        """Import a firmware module (and what it imports) against this HAL.
+
+        On the board `time` is utime; on the host it must stay the real
+        module for everything else, so it is swapped only while importing.
+        With fresh=True, firmware modules loaded for another Hal are dropped
+        first so they rebind to this one.
+        """
+        self.install()
+        for stdlib in _STDLIB_PRELOAD:
+            importlib.import_module(stdlib)
+        firmware_dir = os.path.abspath(firmware_dir)
+        if fresh:
+            for mod_name, module in list(sys.modules.items()):
+                if is_firmware_module(module, firmware_dir):
+                    del sys.modules[mod_name]
+        if firmware_dir not in sys.path:
+            sys.path.insert(0, firmware_dir)
+        real_time = sys.modules["time"]
+        sys.modules["time"] = self.time
+        try:
+            return importlib.import_module(name)
+        finally:
+            sys.modules["time"] = real_time
+
+    def boot(self, name, config=None, fs=None):
+        """Import a firmware module with every firmware module on a flash.
+
+        fs defaults to a fresh temporary FlashFS and is kept in self.fs;
+        config, if given, is written to it as device.cfg first. Output
+        printed while importing is discarded.
+        """
+        fs = fs or FlashFS(tempfile.mkdtemp(prefix="picopass-flash-"))
+        if config is not None:
+            with open(fs.path("device.cfg"), "w") as f:
+                json.dump(config, f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            module = self.import_firmware(name)
+        for loaded in list(sys.modules.values()):
+            if is_firmware_module(loaded):
+                fs.attach(loaded)
+        self.fs = fs
+        return module
+
+    # ---- board-level controls ---------------------------------------------
+
+    def gpio(self, pin_id):
+        """The shared electrical state of a GPIO."""
+        line = self.lines.get(pin_id)
+        if line is None:
+            line = self.lines[pin_id] = GpioLine(self, pin_id)
+        return line
+
+    def set_pin(self, pin_id, level, at_ms=None):
+        """Drive an input now, or at an absolute clock time (ms)."""
+        if at_ms is None:
+            self.gpio(pin_id).drive(level)
+        else:
+            self.clock.call_at(int(at_ms * 1000), lambda: self.gpio(pin_id).drive(level))
+
+    def press(self, pin_id, duration_ms=100, delay_ms=0, active_low=True, bounce=()):
+        """Schedule a button press on pin_id, relative to now.
+
+        bounce: offsets (ms) at which the contact chatters after the press
+        and after the release, to exercise debouncing.
+        """
+        start = self.clock.now_us() / 1000 + delay_ms
+        down, up = (0, 1) if active_low else (1, 0)
+        self.set_pin(pin_id, down, at_ms=start)
+        for offset in bounce:
+            self.set_pin(pin_id, up, at_ms=start + offset)
+            self.set_pin(pin_id, down, at_ms=start + offset + 0.5)
+        self.set_pin(pin_id, up, at_ms=start + duration_ms)
+        for offset in bounce:
+            self.set_pin(pin_id, down, at_ms=start + duration_ms + offset)
+            self.set_pin(pin_id, up, at_ms=start + duration_ms + offset + 0.5)
+        # Leave the line released (pull resistor) afterwards
+        self.clock.call_at(int((start + duration_ms + max(bounce or (0,)) + 1) * 1000),
+                           lambda: self.gpio(pin_id).drive(None))
+
+    def press_bootsel(self, duration_ms=100, delay_ms=0):
+        start = self.clock.now_us() + delay_ms * 1000
+        self.clock.call_at(start, lambda: setattr(self, "bootsel", True))
+        self.clock.call_at(start + duration_ms * 1000, lambda: setattr(self, "bootsel", False))
+
+    def attach_i2c(self, addr, device):
+        """Connect a peripheral (anything with write(bytes)) to the I2C bus."""
+        self.i2c_devices[addr] = device
+        return device
+
+    def console(self):
+        """A virtual stdin/stdout on this board's clock."""
+        return VirtualStream(self.clock)
+
+
+def is_firmware_module(module, firmware_dir=FIRMWARE_DIR):
+    path = getattr(module, "__file__", None)
+    return bool(path) and os.path.abspath(path).startswith(firmware_dir + os.sep)
+
+
+def install(clock=None, **kwargs):
+    """Create a Hal and install its modules; returns the Hal."""
+    return Hal(clock, **kwargs).install()
@@ -0,0 +1,271 @@
+# tools/hal_sim/machine.py
+# Fake `machine` module: Pin, PWM, I2C, Timer, unique_id and friends.
+#
+# Pin objects are views onto one shared GpioLine per pin id, as on the
+# chip: Pin(15, Pin.IN, Pin.PULL_UP) in two modules reads the same line.
+# Tests drive inputs from outside through Hal.gpio(id).drive(level).
+
+import types
+
+
+class GpioLine:
+    """Electrical state of one GPIO."""
+
+    def __init__(self, hal, pin_id):
+        self.hal = hal
+        self.id = pin_id
+        self.mode = 0
+        self.pull = None
+        self.output = 0
+        self.driven = None    # level forced from outside (button, wire)
+        self.handler = None
+        self.trigger = 0
+        self.pin = None       # Pin object handed to IRQ handlers
+        self.history = []     # (t_us, level) whenever the line changes
+        self._last = self.level()
+
+    def level(self):
+        if self.mode == Pin.OUT or self.mode == Pin.OPEN_DRAIN:
+            if self.mode == Pin.OPEN_DRAIN and self.output:
+                return 1 if self.driven is None else self.driven
+            return self.output
+        if self.driven is not None:
+            return self.driven
+        return 1 if self.pull == Pin.PULL_UP else 0
+
+    def drive(self, level):
+        """Force the input level from outside (None = release to the pull)."""
+        self.driven = None if level is None else (1 if level else 0)
+        self._changed()
+
+    def _changed(self):
+        level = self.level()
+        if level == self._last:
+            return
+        self._last = level
+        self.history.append((self.hal.clock.now_us(), level))
+        if self.handler is None:
+            return
+        edge = Pin.IRQ_RISING if level else Pin.IRQ_FALLING
+        if self.trigger & edge:
+            self.handler(self.pin)
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+    IRQ_LOW_LEVEL = 1
+    IRQ_HIGH_LEVEL = 2
+
+    _hal = None  # bound per Hal by make_machine()
+
+    def __init__(self, id, mode=-1, pull=-1, value=None, **kwargs):
+        self.id = id
+        self._line = self._hal.gpio(id)
+        self.init(mode, pull, value)
+
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        line = self._line
+        if mode != -1:
+            line.mode = mode
+        if pull != -1:
+            line.pull = pull
+        if value is not None:
+            line.output = 1 if value else 0
+        line._changed()
+
+    def value(self, v=None):
+        if v is None:
+            return self._line.level()
+        self._line.output = 1 if v else 0
+        self._line._changed()
+
+    __call__ = value
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self):
+        self.value(1 - self._line.output)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        line = self._line
+        line.handler = handler
+        line.trigger = trigger
+        line.pin = self
+        return line
+
+    def __repr__(self):
+        return f"Pin({self.id})"
+
+
+class PWM:
+    _hal = None
+
+    def __init__(self, pin, freq=None, duty_u16=None, **kwargs):
+        self.pin = pin
+        self._freq = freq or 1000
+        self._duty = 0
+        self.history = []  # (t_us, duty) on every change
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+        self._hal.pwms.append(self)
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        d = int(d)
+        if not 0 <= d <= 65535:
+            raise ValueError("duty_u16 must be from 0 to 65535")
+        if d != self._duty:
+            self._duty = d
+            self.history.append((self._hal.clock.now_us(), d))
+
+    def duty_ns(self, ns=None):
+        period_ns = 1000000000 // self._freq
+        if ns is None:
+            return self._duty * period_ns // 65535
+        self.duty_u16(min(65535, ns * 65535 // period_ns))
+
+    def deinit(self):
+        self.duty_u16(0)
+
+
+class I2C:
+    """I2C controller; peripherals come from Hal.attach_i2c()."""
+
+    _hal = None
+
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, **kwargs):
+        self.id = id
+        self.freq = freq
+        self.bytes_written = 0
+        self.transactions = 0
+
+    def _device(self, addr):
+        device = self._hal.i2c_devices.get(addr)
+        if device is None:
+            raise OSError(19)  # ENODEV, like a NAK on hardware
+        return device
+
+    def scan(self):
+        return sorted(self._hal.i2c_devices)
+
+    def _account(self, nbytes):
+        self.bytes_written += nbytes
+        self.transactions += 1
+        # address byte + payload, 9 clocks per byte
+        self._hal.clock.sleep_us((nbytes + 1) * 9 * 1000000 // self.freq)
+
+    def writeto(self, addr, buf, stop=True):
+        device = self._device(addr)
+        data = bytes(buf)
+        self._account(len(data))
+        device.write(data)
+        return 1
+
+    def writevto(self, addr, vector, stop=True):
+        device = self._device(addr)
+        data = b"".join(bytes(b) for b in vector)
+        self._account(len(data))
+        device.write(data)
+        return 1
+
+    def readfrom(self, addr, nbytes, stop=True):
+        device = self._device(addr)
+        self._account(0)
+        return device.read(nbytes) if hasattr(device, "read") else bytes(nbytes)
+
+
+class Timer:
+    """Timer(-1) is virtual; ids >= 0 are hardware timers (ESP32): every
+    Timer object with the same id is the same timer, so init() on one
+    replaces the callback of the others."""
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    _hal = None
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._event = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None, tick_hz=1000):
+        self.deinit()
+        if freq > 0:
+            period_us = 1000000 // freq
+        else:
+            period_us = int(period) * 1000000 // tick_hz
+        self._mode = mode
+        self._period_us = max(1, period_us)
+        self._callback = callback
+        if self.id >= 0:
+            other = self._hal.hw_timers.get(self.id)
+            if other is not None and other is not self:
+                other.deinit()
+            self._hal.hw_timers[self.id] = self
+        self._schedule(self._hal.clock.now_us() + self._period_us)
+        self._hal.timers.add(self)
+
+    def _schedule(self, due):
+        self._event = self._hal.clock.call_at(due, lambda: self._fire(due))
+
+    def _fire(self, due):
+        if self._mode == Timer.PERIODIC:
+            self._schedule(due + self._period_us)
+        else:
+            self._event = None
+            self._hal.timers.discard(self)
+        if self._callback:
+            self._callback(self)
+
+    def deinit(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._hal.timers.discard(self)
+
+
+def make_machine(hal):
+    """Build a `machine` module bound to hal."""
+    mod = types.ModuleType("machine")
+    namespace = {"_hal": hal}
+    mod.Pin = type("Pin", (Pin,), namespace)
+    mod.PWM = type("PWM", (PWM,), namespace)
+    mod.I2C = type("I2C", (I2C,), namespace)
+    mod.Timer = type("Timer", (Timer,), namespace)
+    mod.unique_id = lambda: hal.unique_id
+    mod.freq = lambda f=None: hal.cpu_freq if f is None else setattr(hal, "cpu_freq", f)
+    mod.idle = lambda: hal.clock.sleep_us(1000)
+    mod.lightsleep = lambda ms=0: hal.clock.sleep_us(ms * 1000)
+    mod.deepsleep = mod.lightsleep
+    mod.disable_irq = lambda: 0
+    mod.enable_irq = lambda state=0: None
+    mod.time_pulse_us = lambda pin, level, timeout_us=1000000: -1
+
+    def reset():
+        raise SystemExit("machine.reset()")
+
+    mod.reset = reset
+    mod.soft_reset = reset
+    return mod
@@ -0,0 +1,369 @@
+# tools/hal_sim/pio.py
+# PIO for the fake `rp2` module: rp2.asm_pio assembles a program the way
+# MicroPython does (two passes over the decorated function with the
+# instruction names injected into its globals), and rp2.StateMachine runs
+# it on the board clock.
+#
+# Only what the firmware's programs use is implemented: jmp (always, pin,
+# x_dec, y_dec, not_x, not_y), set x/y, in_ pins/x/y/null, push, irq, nop,
+# wrap_target/wrap, labels and [delay]. Anything else raises
+# NotImplementedError, so a new program fails loudly instead of running
+# wrong. State machines advance in batches of STEP_US of virtual time and
+# sample their pins at each cycle's own timestamp from the GPIO history,
+# so cycle timing is exact without one clock event per cycle.
+#
+# Output programs (pull/out with side-set, e.g. WS2812) are assembled but
+# not stepped: their waveforms are far below the clock's 1 us resolution.
+# put() records what reaches the TX FIFO instead (StateMachine.tx, .puts).
+
+import bisect
+
+STEP_US = 1000
+FIFO_DEPTH = 4
+
+# Operand constants, as in MicroPython's rp2 module
+_CONSTANTS = {
+    "pins": "pins", "x": "x", "y": "y", "null": "null", "isr": "isr", "osr": "osr",
+    "pin": "pin", "x_dec": "x_dec", "y_dec": "y_dec", "not_x": "not_x",
+    "not_y": "not_y", "x_not_y": "x_not_y", "not_osre": "not_osre",
+    "block": 0x21, "noblock": 0x01, "clear": 0x40, "iffull": 0x40, "ifempty": 0x40,
+}
+
+
+def rel(index):
+    return 0x10 | index
+
+
+class PIOError(Exception):
+    pass
+
+
+class _Instr:
+    __slots__ = ("op", "args", "delay")
+
+    def __init__(self, op, args):
+        self.op = op
+        self.args = args
+        self.delay = 0
+
+    def __repr__(self):
+        return f"{self.op}{self.args}[{self.delay}]"
+
+
+class Program:
+    """Assembled program: instructions, resolved labels and wrap points."""
+
+    def __init__(self, kwargs):
+        self.kwargs = kwargs
+        self.instrs = []
+        self.labels = {}
+        self.wrap_target = 0
+        self.wrap = None
+        self.steppable = True
+
+    def __len__(self):
+        return len(self.instrs)
+
+
+class _Emitter:
+    def __init__(self, program):
+        self.program = program
+        self.pass_no = 0
+
+    def start_pass(self, pass_no):
+        self.pass_no = pass_no
+        self.program.instrs = []
+
+    # `jmp(pin, "x") [6]` indexes the emitter to set the last delay
+    def __getitem__(self, delay):
+        if not 0 <= delay <= 31:
+            raise PIOError("delay out of range")
+        self.program.instrs[-1].delay = delay
+        return self
+
+    def _emit(self, op, *args):
+        self.program.instrs.append(_Instr(op, args))
+        return self
+
+    def label(self, name):
+        if self.pass_no == 0:
+            if name in self.program.labels:
+                raise PIOError(f"duplicate label {name}")
+            self.program.labels[name] = len(self.program.instrs)
+
+    def wrap_target(self):
+        self.program.wrap_target = len(self.program.instrs)
+
+    def wrap(self):
+        self.program.wrap = len(self.program.instrs) - 1
+
+    def jmp(self, cond, label=None):
+        if label is None:
+            cond, label = None, cond
+        if cond not in (None, "pin", "x_dec", "y_dec", "not_x", "not_y"):
+            raise NotImplementedError(f"jmp({cond})")
+        return self._emit("jmp", cond, label)
+
+    def set(self, dest, value):
+        if dest not in ("x", "y"):
+            raise NotImplementedError(f"set({dest})")
+        return self._emit("set", dest, value & 31)
+
+    def in_(self, src, bits):
+        if src not in ("pins", "x", "y", "null"):
+            raise NotImplementedError(f"in_({src})")
+        return self._emit("in", src, bits)
+
+    def push(self, flags=0x21):
+        # Blocking unless noblock, as on the chip
+        return self._emit("push", bool(flags & 0x20))
+
+    def irq(self, mod, index=None):
+        if index is None:
+            mod, index = 0, mod
+        return self._emit("irq", index & 0x1F)
+
+    def nop(self):
+        return self._emit("nop")
+
+    def out(self, dest, bits):
+        return self._emit("out", dest, bits)
+
+    def pull(self, flags=0x21):
+        return self._emit("pull", bool(flags & 0x20))
+
+    # `out(x, 1) .side(0) [2]`: side-set value of the last instruction
+    def side(self, value):
+        self.program.instrs[-1].args += (("side", value),)
+        return self
+
+    def _unsupported(self, name):
+        def op(*args, **kwargs):
+            raise NotImplementedError(f"hal_sim PIO has no {name}()")
+        return op
+
+
+def asm_pio(**kwargs):
+    """Decorator turning a PIO program function into a Program."""
+
+    def decorator(func):
+        program = Program(kwargs)
+        emit = _Emitter(program)
+        names = dict(_CONSTANTS)
+        names.update(rel=rel, label=emit.label, wrap_target=emit.wrap_target, wrap=emit.wrap,
+                     jmp=emit.jmp, set=emit.set, in_=emit.in_, push=emit.push,
+                     irq=emit.irq, nop=emit.nop, out=emit.out, pull=emit.pull)
+        for name in ("mov", "wait", "word"):
+            names[name] = emit._unsupported(name)
+        glob = func.__globals__
+        saved = {name: glob[name] for name in names if name in glob}
+        glob.update(names)
+        try:
+            for pass_no in (0, 1):
+                emit.start_pass(pass_no)
+                func()
+        finally:
+            for name in names:
+                if name in saved:
+                    glob[name] = saved[name]
+                else:
+                    glob.pop(name, None)
+        if program.wrap is None:
+            program.wrap = len(program.instrs) - 1
+        program.steppable = not any(i.op in ("out", "pull") for i in program.instrs)
+        return program
+
+    return decorator
+
+
+class PIO:
+    SHIFT_LEFT = 0
+    SHIFT_RIGHT = 1
+    JOIN_NONE = 0
+    JOIN_TX = 1
+    JOIN_RX = 2
+    IN_LOW = 0
+    IN_HIGH = 1
+    OUT_LOW = 2
+    OUT_HIGH = 3
+    IRQ_SM0 = 0x100
+
+
+class StateMachine:
+    """One PIO state machine (ids 0-7: PIO0 SM0-3, PIO1 SM0-3)."""
+
+    _hal = None
+
+    def __init__(self, id, program=None, freq=-1, **kwargs):
+        self.id = id
+        self._active = False
+        self._handler = None
+        self.program = None
+        # Like the real rp2 module: an id already running is reprogrammed
+        # silently, never refused
+        self._hal.pio.machines[id] = self
+        if program is not None:
+            self.init(program, freq, **kwargs)
+
+    def init(self, program, freq=-1, in_base=None, jmp_pin=None, **kwargs):
+        if not 0 <= self.id <= 7:
+            raise ValueError("invalid state machine id")
+        if not isinstance(program, Program):
+            raise TypeError("program must come from rp2.asm_pio")
+        cpu = self._hal.cpu_freq
+        freq = cpu if freq <= 0 else freq
+        if not cpu / 65536 <= freq <= cpu:
+            raise ValueError("freq out of range")
+        self.program = program
+        self.freq = freq
+        self.in_base = in_base
+        self.jmp_pin = jmp_pin
+        depth = FIFO_DEPTH * 2 if program.kwargs.get("fifo_join") == PIO.JOIN_RX else FIFO_DEPTH
+        self.rx = []
+        self.rx_depth = depth
+        self.dropped = 0  # push(noblock) into a full RX FIFO
+        self.tx = []      # every word put() into the TX FIFO
+        self.puts = 0     # put() calls
+        self.restart()
+
+    def restart(self):
+        self.pc = 0
+        self.x = 0
+        self.y = 0
+        self.isr = 0
+        self.isr_count = 0
+        self.rx = []
+        self._cycle_us = 1000000 / self.freq
+        self._t = self._hal.clock.now_us()
+
+    def active(self, value=None):
+        if value is None:
+            return self._active
+        value = bool(value)
+        if value and not self._active:
+            self._t = self._hal.clock.now_us()
+        self._active = value
+        self._hal.pio.update()
+        return value
+
+    def rx_fifo(self):
+        self._hal.pio.catch_up()
+        return len(self.rx)
+
+    def get(self, buf=None, shift=0):
+        self._hal.pio.catch_up()
+        if not self.rx:
+            raise PIOError("hal_sim: get() on an empty RX FIFO would block forever")
+        return self.rx.pop(0) >> shift
+
+    def put(self, value, shift=0):
+        """Words (int or array) into the TX FIFO, each shifted left by shift."""
+        self.puts += 1
+        words = (value,) if isinstance(value, int) else value
+        for word in words:
+            self.tx.append((word << shift) & 0xFFFFFFFF)
+
+    def tx_fifo(self):
+        return 0  # output programs drain it faster than the clock resolves
+
+    def irq(self, handler=None, trigger=0, hard=False):
+        self._handler = handler
+
+    # ---- execution ---------------------------------------------------------
+
+    def _pin_at(self, pin, t_us):
+        line = pin._line
+        history = line.history
+        i = bisect.bisect_right(history, (t_us, 2))
+        if i:
+            return history[i - 1][1]
+        return 1 - history[0][1] if history else line.level()
+
+    def run_until(self, now_us):
+        program = self.program
+        instrs = program.instrs
+        labels = program.labels
+        while self._t + self._cycle_us <= now_us:
+            t = self._t
+            instr = instrs[self.pc]
+            next_pc = self.pc + 1 if self.pc != program.wrap else program.wrap_target
+            op, args = instr.op, instr.args
+            if op == "jmp":
+                cond, label = args
+                if cond is None:
+                    taken = True
+                elif cond == "pin":
+                    taken = bool(self._pin_at(self.jmp_pin, t))
+                elif cond == "x_dec":
+                    taken = self.x != 0
+                    self.x = (self.x - 1) & 0xFFFFFFFF
+                elif cond == "y_dec":
+                    taken = self.y != 0
+                    self.y = (self.y - 1) & 0xFFFFFFFF
+                elif cond == "not_x":
+                    taken = self.x == 0
+                else:
+                    taken = self.y == 0
+                if taken:
+                    next_pc = labels[label]
+            elif op == "set":
+                setattr(self, args[0], args[1])
+            elif op == "in":
+                src, bits = args
+                if src == "pins":
+                    value = self._pin_at(self.in_base, t)
+                elif src == "null":
+                    value = 0
+                else:
+                    value = getattr(self, src)
+                mask = (1 << bits) - 1
+                self.isr = ((self.isr << bits) | (value & mask)) & 0xFFFFFFFF
+                self.isr_count = min(32, self.isr_count + bits)
+            elif op == "push":
+                if len(self.rx) < self.rx_depth:
+                    self.rx.append(self.isr)
+                elif args[0]:
+                    # push(block) stalls until the FIFO has room
+                    self._t += self._cycle_us
+                    continue
+                else:
+                    self.dropped += 1
+                self.isr = 0
+                self.isr_count = 0
+            elif op == "irq":
+                if self._handler is not None:
+                    handler = self._handler
+                    self._hal.clock.call_at(int(t), lambda: handler(self))
+            self.pc = next_pc
+            self._t += self._cycle_us * (1 + instr.delay)
+
+
+class PIOBlock:
+    """All state machines of one Hal, stepped every STEP_US."""
+
+    def __init__(self, hal):
+        self.hal = hal
+        self.machines = {}
+        self._event = None
+
+    def running(self):
+        return [sm for sm in self.machines.values()
+                if sm._active and sm.program and sm.program.steppable]
+
+    def catch_up(self):
+        now = self.hal.clock.now_us()
+        for sm in self.running():
+            sm.run_until(now)
+
+    def update(self):
+        if self.running() and self._event is None:
+            self._schedule()
+
+    def _schedule(self):
+        self._event = self.hal.clock.call_later(STEP_US, self._tick)
+
+    def _tick(self):
+        self._event = None
+        self.catch_up()
+        if self.running():
+            self._schedule()
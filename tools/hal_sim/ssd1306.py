@@ -0,0 +1,124 @@
+# tools/hal_sim/ssd1306.py
+# SSD1306 OLED controller model for the fake I2C bus.
+#
+#   panel = hal.attach_i2c(0x3C, SSD1306Panel())
+#   ... firmware draws and calls show() ...
+#   panel.gddram   -> what the glass shows (pages x columns, MONO_VLSB)
+#
+# Commands keep their parameter state across transactions, so drivers that
+# send one command per write (the stock driver) and drivers that stream
+# commands both work. Horizontal, vertical and page addressing are modelled.
+
+# Parameter bytes that follow each command opcode
+_PARAMS = {
+    0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0x8D: 1, 0xA8: 1,
+    0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1,
+}
+
+HORIZONTAL, VERTICAL, PAGE = 0, 1, 2
+
+
+class SSD1306Panel:
+    """Peripheral side of an SSD1306 (write-only, like the real I2C part)."""
+
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.pages = height // 8
+        self.gddram = bytearray(self.width * self.pages)
+        self.display_on = False
+        self.contrast = 0x7F
+        self.inverted = False
+        self.mode = PAGE  # controller reset default
+        self.col_start, self.col_end = 0, width - 1
+        self.page_start, self.page_end = 0, self.pages - 1
+        self.col, self.page = 0, 0
+        self.commands = []          # (opcode, params) in arrival order
+        self.data_bytes = 0
+        self.writes = []            # (page, column) of every GDDRAM write
+        self._pending = None        # [opcode, needed, params]
+
+    def write(self, data):
+        i = 0
+        while i < len(data):
+            control = data[i]
+            # Co=1: a single byte follows, then another control byte
+            end = i + 2 if control & 0x80 else len(data)
+            payload = data[i + 1:end]
+            if control & 0x40:
+                self._data(payload)
+            else:
+                for byte in payload:
+                    self._command_byte(byte)
+            i = end
+
+    # ---- commands ---------------------------------------------------------
+
+    def _command_byte(self, byte):
+        if self._pending is not None:
+            opcode, needed, params = self._pending
+            params.append(byte)
+            if len(params) == needed:
+                self._pending = None
+                self._execute(opcode, params)
+            return
+        needed = _PARAMS.get(byte, 0)
+        if needed:
+            self._pending = [byte, needed, []]
+        else:
+            self._execute(byte, [])
+
+    def _execute(self, opcode, params):
+        self.commands.append((opcode, tuple(params)))
+        if opcode == 0x20:
+            self.mode = params[0] & 3
+        elif opcode == 0x21:
+            self.col_start, self.col_end = params[0] % self.width, params[1] % self.width
+            self.col = self.col_start
+        elif opcode == 0x22:
+            self.page_start, self.page_end = params[0] % self.pages, params[1] % self.pages
+            self.page = self.page_start
+        elif opcode == 0x81:
+            self.contrast = params[0]
+        elif opcode in (0xA6, 0xA7):
+            self.inverted = opcode == 0xA7
+        elif opcode in (0xAE, 0xAF):
+            self.display_on = opcode == 0xAF
+        elif 0xB0 <= opcode <= 0xB7:
+            self.page = (opcode & 7) % self.pages
+        elif opcode <= 0x0F:
+            self.col = (self.col & 0xF0) | opcode
+        elif opcode <= 0x1F:
+            self.col = (self.col & 0x0F) | ((opcode & 0x0F) << 4)
+
+    # ---- GDDRAM -----------------------------------------------------------
+
+    def _data(self, payload):
+        self.data_bytes += len(payload)
+        for byte in payload:
+            self.gddram[self.page * self.width + self.col] = byte
+            self.writes.append((self.page, self.col))
+            self._advance()
+
+    def _advance(self):
+        if self.mode == PAGE:
+            self.col = (self.col + 1) % self.width
+        elif self.mode == HORIZONTAL:
+            if self.col < self.col_end:
+                self.col += 1
+            else:
+                self.col = self.col_start
+                self.page = self.page + 1 if self.page < self.page_end else self.page_start
+        else:
+            if self.page < self.page_end:
+                self.page += 1
+            else:
+                self.page = self.page_start
+                self.col = self.col + 1 if self.col < self.col_end else self.col_start
+
+    def page_bytes(self, page):
+        return bytes(self.gddram[page * self.width:(page + 1) * self.width])
+
+    def reset_counters(self):
+        self.commands.clear()
+        self.writes.clear()
+        self.data_bytes = 0
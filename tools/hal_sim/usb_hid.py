@@ -0,0 +1,184 @@
+# tools/hal_sim/usb_hid.py
+# CircuitPython-style `usb_hid` with a recording keyboard device, and the
+# subset of the adafruit_hid library the firmware uses on top of it.
+
+import types
+
+
+class HIDDevice:
+    """usb_hid.Device that records every report it is asked to send."""
+
+    def __init__(self, clock, usage_page=0x01, usage=0x06, on_report=None):
+        self.clock = clock
+        self.usage_page = usage_page
+        self.usage = usage
+        self.reports = []  # (t_us, bytes)
+        self.on_report = on_report
+
+    def send_report(self, report, report_id=None):
+        data = bytes(report)
+        self.reports.append((self.clock.now_us(), data))
+        if self.on_report:
+            self.on_report(data)
+
+    def typed(self):
+        """Text the recorded reports would type on a US-layout host."""
+        return decode_reports(r for _, r in self.reports)
+
+
+def make_usb_hid(keyboard):
+    mod = types.ModuleType("usb_hid")
+    mod.Device = HIDDevice
+    mod.devices = (keyboard,)
+    mod.enable = lambda devices, boot_device=0: None
+    return mod
+
+
+# US layout for the adafruit_hid stand-in: char -> (shift, keycode)
+_US = {"\n": (0, 0x28), "\t": (0, 0x2B), " ": (0, 0x2C)}
+for _i, _c in enumerate("abcdefghijklmnopqrstuvwxyz"):
+    _US[_c] = (0, 0x04 + _i)
+    _US[_c.upper()] = (1, 0x04 + _i)
+for _i, (_c, _s) in enumerate(zip("1234567890", "!@#$%^&*()")):
+    _US[_c] = (0, 0x1E + _i)
+    _US[_s] = (1, 0x1E + _i)
+for _code, _c, _s in ((0x2D, "-", "_"), (0x2E, "=", "+"), (0x2F, "[", "{"), (0x30, "]", "}"),
+                      (0x31, "\\", "|"), (0x33, ";", ":"), (0x34, "'", '"'), (0x35, "`", "~"),
+                      (0x36, ",", "<"), (0x37, ".", ">"), (0x38, "/", "?")):
+    _US[_c] = (0, _code)
+    _US[_s] = (1, _code)
+_US_REVERSE = {v: k for k, v in _US.items()}
+
+
+class Keycode:
+    A, B, C, D, E, F, G, H, I, J, K, L, M = range(0x04, 0x11)
+    N, O, P, Q, R, S, T, U, V, W, X, Y, Z = range(0x11, 0x1E)
+    ONE, TWO, THREE, FOUR, FIVE, SIX, SEVEN, EIGHT, NINE, ZERO = range(0x1E, 0x28)
+    ENTER = RETURN = 0x28
+    ESCAPE = 0x29
+    BACKSPACE = 0x2A
+    TAB = 0x2B
+    SPACEBAR = SPACE = 0x2C
+    MINUS = 0x2D
+    EQUALS = 0x2E
+    DELETE = 0x4C
+    RIGHT_ARROW, LEFT_ARROW, DOWN_ARROW, UP_ARROW = range(0x4F, 0x53)
+    LEFT_CONTROL = CONTROL = 0xE0
+    LEFT_SHIFT = SHIFT = 0xE1
+    LEFT_ALT = ALT = OPTION = 0xE2
+    LEFT_GUI = GUI = WINDOWS = COMMAND = 0xE3
+    RIGHT_CONTROL = 0xE4
+    RIGHT_SHIFT = 0xE5
+    RIGHT_ALT = 0xE6
+    RIGHT_GUI = 0xE7
+
+    @staticmethod
+    def modifier_bit(keycode):
+        return 1 << (keycode - 0xE0) if 0xE0 <= keycode <= 0xE7 else 0
+
+
+class Keyboard:
+    """adafruit_hid.keyboard.Keyboard: 8-byte boot reports, 6 keys."""
+
+    def __init__(self, devices):
+        for device in devices:
+            if device.usage_page == 0x01 and device.usage == 0x06:
+                self._device = device
+                break
+        else:
+            raise ValueError("Could not find matching HID device.")
+        self.report = bytearray(8)
+
+    def _add(self, keycode):
+        bit = Keycode.modifier_bit(keycode)
+        if bit:
+            self.report[0] |= bit
+            return
+        keys = self.report[2:]
+        if keycode in keys:
+            return
+        for i in range(6):
+            if keys[i] == 0:
+                self.report[2 + i] = keycode
+                return
+        raise ValueError("Trying to press more than six keys at once.")
+
+    def _remove(self, keycode):
+        bit = Keycode.modifier_bit(keycode)
+        if bit:
+            self.report[0] &= ~bit & 0xFF
+            return
+        for i in range(2, 8):
+            if self.report[i] == keycode:
+                self.report[i] = 0
+
+    def press(self, *keycodes):
+        for k in keycodes:
+            self._add(k)
+        self._device.send_report(self.report)
+
+    def release(self, *keycodes):
+        for k in keycodes:
+            self._remove(k)
+        self._device.send_report(self.report)
+
+    def release_all(self):
+        for i in range(8):
+            self.report[i] = 0
+        self._device.send_report(self.report)
+
+    def send(self, *keycodes):
+        self.press(*keycodes)
+        self.release_all()
+
+
+class KeyboardLayoutUS:
+    def __init__(self, keyboard):
+        self.keyboard = keyboard
+
+    def keycodes(self, char):
+        try:
+            shift, code = _US[char]
+        except KeyError:
+            raise ValueError(f"No keycode available for character {char!r}") from None
+        return (Keycode.SHIFT, code) if shift else (code,)
+
+    def write(self, string, delay=None):
+        for char in string:
+            self.keyboard.press(*self.keycodes(char))
+            self.keyboard.release_all()
+            if delay:
+                self.keyboard._device.clock.sleep_us(int(delay * 1000000))
+
+
+def decode_reports(reports):
+    """Text typed by a stream of 8-byte boot keyboard reports (US layout)."""
+    out = []
+    held = set()
+    for report in reports:
+        report = bytes(report)
+        shift = 1 if report[0] & 0x22 else 0
+        keys = [k for k in report[2:] if k]
+        for k in keys:
+            if k not in held:
+                out.append(_US_REVERSE.get((shift, k), "�"))
+        held = set(keys)
+    return "".join(out)
+
+
+def make_adafruit_hid():
+    pkg = types.ModuleType("adafruit_hid")
+    pkg.__path__ = []
+    keyboard = types.ModuleType("adafruit_hid.keyboard")
+    keyboard.Keyboard = Keyboard
+    keycode = types.ModuleType("adafruit_hid.keycode")
+    keycode.Keycode = Keycode
+    layout = types.ModuleType("adafruit_hid.keyboard_layout_us")
+    layout.KeyboardLayoutUS = KeyboardLayoutUS
+    pkg.keyboard, pkg.keycode, pkg.keyboard_layout_us = keyboard, keycode, layout
+    return {
+        "adafruit_hid": pkg,
+        "adafruit_hid.keyboard": keyboard,
+        "adafruit_hid.keycode": keycode,
+        "adafruit_hid.keyboard_layout_us": layout,
+    }
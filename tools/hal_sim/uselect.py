@@ -0,0 +1,116 @@
+# tools/hal_sim/uselect.py
+# Fake `uselect` module: poll objects over real fds and virtual streams
+
+import select
+import types
+
+POLLIN = 1
+POLLOUT = 4
+POLLERR = 8
+POLLHUP = 16
+
+
+class VirtualStream:
+    """In-memory stdin/stdout for firmware runs without a pty.
+
+    feed() queues host input (optionally at a later clock time); write()
+    collects everything the firmware prints.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self._input = []
+        self.output = []
+
+    def feed(self, text, at_us=None):
+        if at_us is None:
+            self._input.extend(text)
+        else:
+            self.clock.call_at(at_us, lambda: self._input.extend(text))
+
+    def any(self):
+        return len(self._input)
+
+    def read(self, size=-1):
+        n = len(self._input) if size < 0 else min(size, len(self._input))
+        out, self._input = self._input[:n], self._input[n:]
+        return "".join(out)
+
+    def readline(self):
+        if "\n" in self._input:
+            return self.read(self._input.index("\n") + 1)
+        return self.read()
+
+    def write(self, text):
+        self.output.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def lines(self):
+        """Everything written so far, split into lines."""
+        return "".join(self.output).splitlines()
+
+
+class _Poll:
+    def __init__(self, clock):
+        self._clock = clock
+        self._streams = {}
+
+    def register(self, stream, eventmask=POLLIN | POLLOUT):
+        self._streams[stream] = eventmask
+
+    def unregister(self, stream):
+        self._streams.pop(stream, None)
+
+    def modify(self, stream, eventmask):
+        self._streams[stream] = eventmask
+
+    def _ready(self, wait_s):
+        ready = [s for s in self._streams if hasattr(s, "any") and s.any()]
+        fds = [s for s in self._streams if not hasattr(s, "any") and hasattr(s, "fileno")]
+        if fds and not ready:
+            readable, _, _ = select.select(fds, [], [], wait_s)
+            ready.extend(readable)
+        elif wait_s:
+            self._clock.sleep_us(int(wait_s * 1000000))
+        return [(s, POLLIN) for s in ready]
+
+    def poll(self, timeout=-1):
+        clock = self._clock
+        deadline = None if timeout is None or timeout < 0 else clock.now_us() + timeout * 1000
+        while True:
+            clock.run_due()
+            # Wait at most until the deadline or the next scheduled callback
+            step = None if deadline is None else deadline - clock.now_us()
+            due = clock.next_event_us()
+            if due is not None:
+                gap = due - clock.now_us()
+                step = gap if step is None else min(step, gap)
+            if clock.realtime:
+                # Block in select() on real fds (pty consoles)
+                ready = self._ready(None if step is None else max(0, step) / 1000000)
+            else:
+                # Look without blocking, then jump virtual time forward
+                ready = self._ready(0)
+            if ready or (deadline is not None and clock.now_us() >= deadline):
+                return ready
+            if not clock.realtime:
+                if step is None:
+                    raise RuntimeError("poll() would block forever on a virtual clock")
+                clock.advance(max(1, step))
+
+    def ipoll(self, timeout=-1, flags=0):
+        return iter(self.poll(timeout))
+
+
+def make_uselect(clock):
+    mod = types.ModuleType("uselect")
+    mod.POLLIN = POLLIN
+    mod.POLLOUT = POLLOUT
+    mod.POLLERR = POLLERR
+    mod.POLLHUP = POLLHUP
+    mod.poll = lambda: _Poll(clock)
+    mod.select = select.select
+    return mod
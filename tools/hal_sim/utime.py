@@ -0,0 +1,24 @@
+# tools/hal_sim/utime.py
+# Fake `time`/`utime` module bound to a hal_sim clock
+
+import time as _time
+import types
+
+
+def make_time(clock):
+    """Build a MicroPython `time` module driven by clock."""
+    mod = types.ModuleType("utime")
+    mod.ticks_ms = clock.ticks_ms
+    mod.ticks_us = clock.ticks_us
+    mod.ticks_cpu = clock.ticks_us
+    mod.ticks_add = clock.ticks_add
+    mod.ticks_diff = clock.ticks_diff
+    mod.time = clock.time
+    mod.time_ns = clock.time_ns
+    mod.sleep = lambda seconds: clock.sleep_us(int(seconds * 1000000))
+    mod.sleep_ms = lambda ms: clock.sleep_us(int(ms) * 1000)
+    mod.sleep_us = lambda us: clock.sleep_us(int(us))
+    mod.localtime = lambda secs=None: _time.gmtime(clock.time() if secs is None else secs)[:8]
+    mod.gmtime = mod.localtime
+    mod.mktime = lambda t: int(_time.mktime(tuple(t) + (0,) * (9 - len(t))))
+    return mod
@@ -0,0 +1,59 @@
+# tools/picopass_client
+# Host-side Python client for the PicoPass serial protocols
+
+from .calibrate import StdinCapture, calibrate_typing
+from .client import (
+    DEFAULT_TIMEOUT,
+    ConnectionClosed,
+    PicoPassClient,
+    PicoPassError,
+    RequestTimeout,
+)
+from .discovery import (
+    DiscoveredDevice,
+    DiscoveryCache,
+    PortInfo,
+    candidate_ports,
+    discover,
+    load_board_profiles,
+    probe_port,
+)
+from .histogram import LatencyHistogram
+from .protocol import (
+    JsonProtocol,
+    LineProtocol,
+    LineResponse,
+    get_protocol,
+    parse_metrics,
+    parse_typing,
+)
+from .trace import TraceEvent, decode_trace, fetch_trace, format_timeline, to_chrome_trace
+
+__all__ = [
+    "DEFAULT_TIMEOUT",
+    "ConnectionClosed",
+    "DiscoveredDevice",
+    "DiscoveryCache",
+    "JsonProtocol",
+    "LatencyHistogram",
+    "LineProtocol",
+    "LineResponse",
+    "PicoPassClient",
+    "PicoPassError",
+    "PortInfo",
+    "RequestTimeout",
+    "StdinCapture",
+    "TraceEvent",
+    "calibrate_typing",
+    "candidate_ports",
+    "decode_trace",
+    "discover",
+    "fetch_trace",
+    "format_timeline",
+    "get_protocol",
+    "load_board_profiles",
+    "parse_metrics",
+    "parse_typing",
+    "probe_port",
+    "to_chrome_trace",
+]
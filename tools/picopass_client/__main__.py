@@ -0,0 +1,62 @@
+# tools/picopass_client/__main__.py
+# Command line front-end:
+#   python -m picopass_client /dev/ttyACM0 PING
+#   python -m picopass_client --protocol json /dev/ttyACM0 '{"type": "STATUS"}'
+#   python -m picopass_client --repeat 100 /dev/pts/5 PING   # latency test
+#   python -m picopass_client auto PING                       # discover first
+
+import argparse
+import json
+import sys
+
+from .client import PicoPassClient, PicoPassError
+from .discovery import discover
+
+
+def parse_command(protocol, text):
+    if protocol == "json":
+        if text.lstrip().startswith("{"):
+            return json.loads(text)
+        return {"type": text}
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picopass_client",
+                                     description="Send commands to a PicoPass device")
+    parser.add_argument("port", help='serial port, or "auto" to discover one')
+    parser.add_argument("commands", nargs="+")
+    parser.add_argument("--protocol", choices=("json", "line"), default="line")
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="pipeline the command list this many times")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the latency histogram summary")
+    args = parser.parse_args(argv)
+
+    if args.port == "auto":
+        devices = discover(timeout=args.timeout)
+        if not devices:
+            print("Error: no PicoPass device found", file=sys.stderr)
+            return 1
+        args.port, args.protocol = devices[0].port, devices[0].protocol
+        print(f"Using {devices[0].port} ({devices[0].protocol} protocol)", file=sys.stderr)
+
+    commands = [parse_command(args.protocol, c) for c in args.commands] * args.repeat
+
+    try:
+        with PicoPassClient(args.port, protocol=args.protocol, timeout=args.timeout) as client:
+            responses = client.pipeline(commands)
+            if args.repeat == 1:
+                for response in responses:
+                    print(response if isinstance(response, dict) else response.raw)
+            if args.stats or args.repeat > 1:
+                print(json.dumps(client.latency_summary(), indent=2))
+    except PicoPassError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
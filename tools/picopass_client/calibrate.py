@@ -0,0 +1,141 @@
+# tools/picopass_client/calibrate.py
+# Host side of CALIBRATE_TYPING: capture the test text the device types into
+# this terminal and report how much of it arrived, until the device has
+# found the fastest reliable typing speed (firmware/micropython/typing_profile.py).
+#
+#   python -m picopass_client.calibrate /dev/ttyACM0
+#   python -m picopass_client.calibrate --protocol json /dev/ttyACM0 --max-ms 60
+#
+# Keep the terminal running this tool focused: the device types into it.
+
+import argparse
+import queue
+import sys
+import threading
+
+from .client import PicoPassClient, PicoPassError
+from .protocol import LineProtocol, LineResponse
+
+# Seconds to wait for a typed line once the device announced a round
+DEFAULT_CAPTURE_TIMEOUT = 15.0
+
+
+def score(expected, received):
+    """Characters of expected that arrived intact.
+
+    A line that ends with the full text counts as complete even if junk from
+    an earlier round (a dropped Enter) precedes it; otherwise the score is
+    the length of the common prefix, since a dropped key shifts the rest.
+    """
+    if received.endswith(expected):
+        return len(expected)
+    n = 0
+    for a, b in zip(expected, received):
+        if a != b:
+            break
+        n += 1
+    return n
+
+
+class StdinCapture:
+    """Reads lines typed into this terminal on a background thread."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._lines = queue.Queue()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        for line in self.stream:
+            self._lines.put(line.rstrip("\r\n"))
+
+    def read_line(self, timeout):
+        """The next typed line, or None if nothing arrived in time."""
+        try:
+            return self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def _parse_step(response):
+    """("calibrate", delay_ms, text) for another round, ("done", key_ms, release_ms)."""
+    if isinstance(response, LineResponse):
+        if response.kind == "CALIBRATE":
+            return "calibrate", int(response.fields[0]), response.fields[1]
+        if response.kind == "OK" and response.fields[:1] == ["CALIBRATED"]:
+            return "done", int(response.fields[1]), int(response.fields[2])
+        raise PicoPassError(f"calibration failed: {response.raw}")
+    status = response.get("status")
+    if status == "calibrate":
+        return "calibrate", response["delay_ms"], response["text"]
+    if status == "ok" and "key_ms" in response:
+        return "done", response["key_ms"], response["release_ms"]
+    raise PicoPassError(f"calibration failed: {response.get('message', response)}")
+
+
+def calibrate_typing(client, read_line, min_ms=None, max_ms=None,
+                     capture_timeout=DEFAULT_CAPTURE_TIMEOUT, on_round=None):
+    """Run the device-driven binary search to completion.
+
+    read_line(timeout) returns the next line the device typed (or None).
+    on_round(delay_ms, received, expected) is called after every round.
+    Returns {"key_ms", "release_ms", "rounds"} as persisted by the device.
+    """
+    line_protocol = isinstance(client.protocol, LineProtocol)
+    if line_protocol:
+        bounds = () if min_ms is None and max_ms is None else (
+            min_ms if min_ms is not None else 1, max_ms if max_ms is not None else 40)
+        response = client.call("CALIBRATE_TYPING", *bounds)
+    else:
+        fields = {k: v for k, v in (("min_ms", min_ms), ("max_ms", max_ms)) if v is not None}
+        response = client.call("CALIBRATE_TYPING", **fields)
+
+    rounds = 0
+    while True:
+        step, first, second = _parse_step(response)
+        if step == "done":
+            return {"key_ms": first, "release_ms": second, "rounds": rounds}
+        delay_ms, text = first, second
+        received = score(text, read_line(capture_timeout) or "")
+        rounds += 1
+        if on_round:
+            on_round(delay_ms, received, len(text))
+        if line_protocol:
+            response = client.call("CALIBRATE_RESULT", received)
+        else:
+            response = client.call("CALIBRATE_RESULT", received=received)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picopass_client.calibrate",
+                                     description="Calibrate the PicoPass typing speed")
+    parser.add_argument("port")
+    parser.add_argument("--protocol", choices=("json", "line"), default="line")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--min-ms", type=int, help="fastest delay to try")
+    parser.add_argument("--max-ms", type=int, help="slowest delay to try (checked first)")
+    args = parser.parse_args(argv)
+
+    print("Keep this window focused; the device will type test lines here.", file=sys.stderr)
+    capture = StdinCapture()
+
+    def report(delay_ms, received, expected):
+        mark = "✓" if received >= expected else "✗"
+        print(f"{mark} {delay_ms:3d} ms  {received}/{expected} chars", file=sys.stderr)
+
+    try:
+        with PicoPassClient(args.port, protocol=args.protocol, timeout=args.timeout) as client:
+            result = calibrate_typing(client, capture.read_line, args.min_ms, args.max_ms,
+                                      on_round=report)
+    except PicoPassError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"✓ Saved profile 'calibrated': key {result['key_ms']} ms, "
+          f"release {result['release_ms']} ms ({result['rounds']} rounds)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# tools/picopass_client/client.py
+# Persistent-connection PicoPass client with request pipelining
+
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from .histogram import LatencyHistogram
+from .protocol import LineProtocol, get_protocol, parse_metrics
+from .transport import open_transport
+
+DEFAULT_TIMEOUT = 1.0
+
+
+class PicoPassError(Exception):
+    """Base error for client failures."""
+
+
+class RequestTimeout(PicoPassError, TimeoutError):
+    """The device did not answer a request within its timeout."""
+
+
+class ConnectionClosed(PicoPassError):
+    """The client was closed while a request was still in flight."""
+
+
+class _Pending:
+    __slots__ = ("name", "future", "sent_at", "deadline", "expired_at")
+
+    def __init__(self, name, sent_at, timeout):
+        self.name = name
+        self.future = Future()
+        self.sent_at = sent_at
+        self.deadline = sent_at + timeout
+        self.expired_at = None
+
+
+class PicoPassClient:
+    """Long-lived connection to one PicoPass device.
+
+    The firmware answers commands strictly in order, one response line per
+    command, so several requests can be written back to back and matched
+    to responses FIFO. A background thread reads the port, hands responses
+    to the waiting futures and keeps any debug output in ``log``.
+    Unsolicited events (``protocol.is_event``) never consume a request:
+    they go to ``log`` and to ``on_event(response)``, called from the
+    reader thread.
+    """
+
+    def __init__(self, port, protocol="json", baudrate=115200,
+                 timeout=DEFAULT_TIMEOUT, transport=None, log_size=256, on_event=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.protocol = get_protocol(protocol) if isinstance(protocol, str) else protocol
+        self.log = collections.deque(maxlen=log_size)
+        self.on_event = on_event
+        self.latency = LatencyHistogram()
+        self.latency_by_command = {}
+
+        self._transport = transport
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader = None
+        self._running = False
+
+    # ---- connection -------------------------------------------------------
+
+    def open(self):
+        """Open the port (once) and start the reader thread."""
+        if self._running:
+            return self
+        if self._transport is None:
+            self._transport = open_transport(self.port, self.baudrate)
+        self._transport.reset_input()
+        self._running = True
+        self._reader = threading.Thread(
+            target=self._read_loop, name=f"picopass-reader-{self.port}", daemon=True)
+        self._reader.start()
+        return self
+
+    def close(self):
+        """Stop the reader, close the port and fail outstanding requests."""
+        self._running = False
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join()
+        self._reader = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        self._fail_pending()
+
+    def _fail_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, collections.deque()
+        for entry in pending:
+            if not entry.future.done():
+                entry.future.set_exception(ConnectionClosed(f"{entry.name}: connection closed"))
+
+    @property
+    def is_open(self):
+        return self._running
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- requests ---------------------------------------------------------
+
+    def submit(self, command, timeout=None):
+        """Send a command without waiting; returns a Future for the response.
+
+        The future fails with RequestTimeout once the per-request timeout
+        elapses.
+        """
+        if not self._running:
+            raise ConnectionClosed("client is not open")
+        data = self.protocol.encode(command)
+        name = self.protocol.command_name(command)
+        with self._write_lock:
+            entry = _Pending(name, time.perf_counter(),
+                             self.timeout if timeout is None else timeout)
+            with self._lock:
+                self._pending.append(entry)
+            self._transport.write(data)
+        if not self._running:
+            self._fail_pending()  # the reader stopped in the meantime
+        return entry.future
+
+    def request(self, command, timeout=None):
+        """Send a command and wait for its response."""
+        return self.submit(command, timeout).result()
+
+    def pipeline(self, commands, timeout=None):
+        """Send all commands back to back, then collect responses in order."""
+        futures = [self.submit(c, timeout) for c in commands]
+        return [f.result() for f in futures]
+
+    def call(self, name, *args, timeout=None, **fields):
+        """Build a command for the active protocol and send it.
+
+        JSON:  client.call("UNLOCK", password="...")
+        Line:  client.call("TYPE", "secret", "github")
+        """
+        return self.request(self.protocol.build(name, *args, **fields), timeout)
+
+    def metrics(self, reset=False, timeout=None):
+        """Fetch the firmware's METRICS frame (see protocol.parse_metrics)."""
+        if not reset:
+            return parse_metrics(self.call("METRICS", timeout=timeout))
+        if isinstance(self.protocol, LineProtocol):
+            return parse_metrics(self.call("METRICS", "RESET", timeout=timeout))
+        return parse_metrics(self.call("METRICS", timeout=timeout, reset=True))
+
+    def latency_summary(self):
+        """Per-command and overall latency summaries (ms)."""
+        summary = {name: h.summary() for name, h in sorted(self.latency_by_command.items())}
+        summary["*"] = self.latency.summary()
+        return summary
+
+    # ---- reader thread ----------------------------------------------------
+
+    def _read_loop(self):
+        buffer = b""
+        while self._running:
+            try:
+                chunk = self._transport.read()
+            except (OSError, ValueError):
+                # Port gone (unplugged, pty peer closed): stop and fail the
+                # waiters now instead of at close()
+                self._running = False
+                self._fail_pending()
+                return
+            now = time.perf_counter()
+            if chunk:
+                buffer += chunk
+                while b"\n" in buffer:
+                    raw, buffer = buffer.split(b"\n", 1)
+                    self._handle_line(raw.rstrip(b"\r").decode("utf-8", "replace"), now)
+            self._expire(now)
+
+    def _handle_line(self, line, now):
+        if not line:
+            return
+        response = self.protocol.decode(line)
+        if response is None:
+            self.log.append(line)
+            return
+        if self.protocol.is_event(response):
+            self.log.append(line)
+            if self.on_event is not None:
+                self.on_event(response)
+            return
+        with self._lock:
+            entry = self._pending.popleft() if self._pending else None
+        if entry is None:
+            self.log.append(line)  # unsolicited
+            return
+        if entry.expired_at is not None or entry.future.done():
+            return  # late answer to a request that timed out or was cancelled
+        elapsed = now - entry.sent_at
+        self.latency.record(elapsed)
+        hist = self.latency_by_command.get(entry.name)
+        if hist is None:
+            hist = self.latency_by_command[entry.name] = LatencyHistogram()
+        hist.record(elapsed)
+        entry.future.set_result(response)
+
+    def _expire(self, now):
+        with self._lock:
+            for entry in self._pending:
+                if entry.expired_at is None and now >= entry.deadline:
+                    entry.expired_at = now
+                    if entry.future.done():
+                        continue
+                    entry.future.set_exception(
+                        RequestTimeout(f"{entry.name}: no response after "
+                                       f"{entry.deadline - entry.sent_at:.3f}s"))
+            # Timed-out entries stay queued so a late response is swallowed
+            # instead of being handed to the next request. Drop them once
+            # they are clearly never going to be answered.
+            while self._pending:
+                head = self._pending[0]
+                if head.expired_at is None or now - head.expired_at < self.timeout:
+                    break
+                self._pending.popleft()
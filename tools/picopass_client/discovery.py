@@ -0,0 +1,226 @@
+# tools/picopass_client/discovery.py
+# Parallel PicoPass discovery across USB serial ports
+#
+# 1. List serial ports and keep only those whose VID/PID matches a board
+#    profile in hardware/profiles/boards.json.
+# 2. Probe the candidates concurrently (one thread per port), so the whole
+#    scan costs about one probe timeout instead of one per port.
+# 3. Cache results per (port, USB serial number) for a short TTL.
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .transport import open_transport
+
+BOARDS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "..", "..", "hardware", "profiles", "boards.json")
+
+DEFAULT_PROBE_TIMEOUT = 1.0
+DEFAULT_CACHE_TTL = 30.0
+
+# Answered by device.py (PONG|...) and main.py ({"board_id": ...}) alike;
+# each firmware silently ignores or rejects the line meant for the other.
+PROBE = b'PING\n{"type":"GET_ID"}\n'
+
+
+class PortInfo:
+    """USB serial port as reported by the OS."""
+
+    __slots__ = ("device", "vid", "pid", "serial_number", "description")
+
+    def __init__(self, device, vid=None, pid=None, serial_number=None, description=""):
+        self.device = device
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.description = description
+
+    def __repr__(self):
+        return f"PortInfo({self.device!r}, vid={self.vid}, pid={self.pid})"
+
+
+class DiscoveredDevice:
+    """A port that answered the PicoPass probe."""
+
+    __slots__ = ("port", "protocol", "board_id", "board_type", "version",
+                 "activated", "serial_number", "profiles")
+
+    def __init__(self, port, protocol, board_id, board_type=None, version=None,
+                 activated=None, serial_number=None, profiles=()):
+        self.port = port
+        self.protocol = protocol
+        self.board_id = board_id
+        self.board_type = board_type
+        self.version = version
+        self.activated = activated
+        self.serial_number = serial_number
+        self.profiles = tuple(profiles)
+
+    def connect(self, **kwargs):
+        """Open a PicoPassClient speaking this device's protocol."""
+        from .client import PicoPassClient
+        return PicoPassClient(self.port, protocol=self.protocol, **kwargs).open()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"DiscoveredDevice({self.port!r}, {self.protocol}, board_id={self.board_id!r})"
+
+
+class DiscoveryCache:
+    """Probe results keyed by (port, USB serial number), valid for ttl seconds.
+
+    Negative results are cached too, so other CDC devices sharing a
+    MicroPython VID/PID are not re-probed on every scan.
+    """
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(port):
+        return (port.device, port.serial_number)
+
+    def lookup(self, port):
+        """Return (hit, result) for a port."""
+        with self._lock:
+            entry = self._entries.get(self.key(port))
+            if entry is None:
+                return False, None
+            stored_at, result = entry
+            if self.clock() - stored_at >= self.ttl:
+                del self._entries[self.key(port)]
+                return False, None
+            return True, result
+
+    def store(self, port, result):
+        with self._lock:
+            self._entries[self.key(port)] = (self.clock(), result)
+
+    def invalidate(self, port=None):
+        """Forget one port, or everything."""
+        with self._lock:
+            if port is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self.key(port), None)
+
+
+DEFAULT_CACHE = DiscoveryCache()
+
+
+def load_board_profiles(path=BOARDS_JSON):
+    """Board profiles from hardware/profiles/boards.json."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def list_serial_ports():
+    """All serial ports known to pyserial (empty without pyserial)."""
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return []
+    return [PortInfo(p.device, p.vid, p.pid, p.serial_number, p.description or "")
+            for p in list_ports.comports()]
+
+
+def candidate_ports(ports=None, profiles=None):
+    """Ports whose VID/PID matches a board profile, with the matching profile ids."""
+    if ports is None:
+        ports = list_serial_ports()
+    if profiles is None:
+        profiles = load_board_profiles()
+
+    by_usb_id = {}
+    for profile_id, profile in profiles.items():
+        by_usb_id.setdefault((profile["vid"], profile["pid"]), []).append(profile_id)
+
+    matches = []
+    for port in ports:
+        ids = by_usb_id.get((port.vid, port.pid))
+        if ids:
+            matches.append((port, ids))
+    return matches
+
+
+def parse_probe_line(line):
+    """Turn a probe answer into (protocol, fields), or None."""
+    if line.startswith("PONG|"):
+        # PONG|status|board_id|board_type|config
+        parts = line.split("|")
+        if len(parts) >= 4:
+            return "line", {
+                "activated": parts[1] == "ACTIVATED",
+                "board_id": parts[2],
+                "board_type": parts[3],
+            }
+    elif line.startswith("{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        if isinstance(data, dict) and "board_id" in data:
+            return "json", {"board_id": data["board_id"], "version": data.get("version")}
+    return None
+
+
+def probe_port(port, timeout=DEFAULT_PROBE_TIMEOUT, opener=open_transport):
+    """Probe one port; returns a DiscoveredDevice or None."""
+    try:
+        transport = opener(port.device)
+    except (OSError, ValueError):
+        return None
+    try:
+        transport.reset_input()
+        transport.write(PROBE)
+        deadline = time.monotonic() + timeout
+        buffer = b""
+        while time.monotonic() < deadline:
+            buffer += transport.read()
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                parsed = parse_probe_line(raw.strip().decode("utf-8", "replace"))
+                if parsed:
+                    protocol, fields = parsed
+                    return DiscoveredDevice(port.device, protocol,
+                                            serial_number=port.serial_number, **fields)
+        return None
+    except OSError:
+        return None
+    finally:
+        transport.close()
+
+
+def discover(ports=None, profiles=None, timeout=DEFAULT_PROBE_TIMEOUT,
+             max_workers=8, cache=DEFAULT_CACHE, probe=probe_port):
+    """Find PicoPass devices; probes all uncached candidates in parallel."""
+    candidates = candidate_ports(ports, profiles)
+    found = {}
+    to_probe = []
+    for port, profile_ids in candidates:
+        hit, result = cache.lookup(port) if cache is not None else (False, None)
+        if hit:
+            found[port.device] = result
+        else:
+            to_probe.append((port, profile_ids))
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(to_probe))) as pool:
+            futures = [(port, ids, pool.submit(probe, port, timeout)) for port, ids in to_probe]
+            for port, ids, future in futures:
+                result = future.result()
+                if result is not None:
+                    result.profiles = tuple(ids)
+                if cache is not None:
+                    cache.store(port, result)
+                found[port.device] = result
+
+    return [found[port.device] for port, _ in candidates if found[port.device] is not None]
@@ -0,0 +1,77 @@
+# tools/picopass_client/histogram.py
+# Fixed-bucket latency histogram (log2 buckets, microsecond resolution)
+
+import math
+
+
+class LatencyHistogram:
+    """Latency histogram with power-of-two buckets from 1 us to ~67 s."""
+
+    BUCKETS = 27  # bucket i holds samples < 2**i us; the last one is open
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        """Add one latency sample, in seconds."""
+        us = int(seconds * 1e6)
+        index = us.bit_length() if us > 0 else 0
+        self.counts[min(index, self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Accumulate another histogram into this one."""
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        for attr, pick in (("min", min), ("max", max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """Upper bound (seconds) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                # Never report beyond what was actually observed
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def buckets(self):
+        """Non-empty buckets as (upper_bound_seconds, count) pairs."""
+        return [((1 << i) / 1e6, n) for i, n in enumerate(self.counts) if n]
+
+    def summary(self):
+        """Compact dict with count, mean, min, max and p50/p90/p99 (ms)."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.mean),
+            "min_ms": ms(self.min),
+            "max_ms": ms(self.max),
+            "p50_ms": ms(self.percentile(50)),
+            "p90_ms": ms(self.percentile(90)),
+            "p99_ms": ms(self.percentile(99)),
+        }
@@ -0,0 +1,169 @@
+# tools/picopass_client/protocol.py
+# Wire formats spoken by the PicoPass firmwares.
+#
+# - JsonProtocol: one JSON object per line (firmware/micropython/main.py)
+# - LineProtocol: "COMMAND:arg|arg" requests and "KIND|field|field"
+#   responses (firmware/micropython/device.py)
+#
+# Both firmwares also print free-form debug text on the same stream, so
+# decode() returns None for any line that is not a protocol response.
+# is_event() picks out responses the firmware sends on its own, with no
+# request behind them (device.py: OK|TYPING_DONE after a button press).
+
+import json
+
+
+class JsonProtocol:
+    """JSON-per-line protocol used by main.py."""
+
+    name = "json"
+
+    def build(self, name, *args, **fields):
+        """Build a command dict from a command name and fields."""
+        if args:
+            raise TypeError("JSON commands take keyword fields only")
+        command = {"type": name}
+        command.update(fields)
+        return command
+
+    def encode(self, command):
+        """Serialize a command (dict) to bytes, newline terminated."""
+        return (json.dumps(command, separators=(",", ":")) + "\n").encode()
+
+    def command_name(self, command):
+        return command.get("type", "?")
+
+    def is_event(self, response):
+        """main.py answers every command and sends nothing unsolicited."""
+        return False
+
+    def decode(self, line):
+        """Parse a response line, or return None for debug output."""
+        if not line.startswith("{"):
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class LineResponse:
+    """Parsed response of the line protocol (e.g. "OK|LOCKED")."""
+
+    __slots__ = ("kind", "fields", "raw")
+
+    def __init__(self, kind, fields, raw):
+        self.kind = kind
+        self.fields = fields
+        self.raw = raw
+
+    @property
+    def ok(self):
+        return self.kind != "ERROR"
+
+    def json(self):
+        """Decode the payload of responses carrying JSON (e.g. INFO)."""
+        return json.loads(self.fields[-1])
+
+    def __eq__(self, other):
+        if isinstance(other, LineResponse):
+            return self.raw == other.raw
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LineResponse({self.raw!r})"
+
+
+class LineProtocol:
+    """Pipe-separated text protocol used by device.py."""
+
+    name = "line"
+
+    # First field of every line the firmware emits as a response
+    RESPONSE_KINDS = {"PONG", "OK", "ERROR", "INFO", "VERSION", "METRICS", "TRACE", "CALIBRATE"}
+
+    # Responses whose last field is free-form and may contain '|'
+    MAXSPLIT = {"INFO": 1, "CALIBRATE": 2}
+
+    # OK|<event>|... lines printed by the main loop, not by a command
+    EVENTS = {"TYPING_DONE", "TYPING_CANCELLED"}
+
+    def build(self, name, *args, **fields):
+        """Build a command line: NAME or NAME:arg|arg."""
+        if fields:
+            raise TypeError("line commands take positional arguments only")
+        if not args:
+            return name
+        return name + ":" + "|".join(str(a) for a in args)
+
+    def encode(self, command):
+        if "\n" in command:
+            raise ValueError("line commands cannot contain newlines")
+        return (command + "\n").encode()
+
+    def command_name(self, command):
+        return command.split(":", 1)[0]
+
+    def is_event(self, response):
+        """True for unsolicited lines (typing finished or cancelled)."""
+        return response.kind == "OK" and bool(response.fields) and response.fields[0] in self.EVENTS
+
+    def decode(self, line):
+        kind = line.split("|", 1)[0]
+        if kind not in self.RESPONSE_KINDS:
+            return None
+        parts = line.split("|", self.MAXSPLIT.get(kind, -1))
+        return LineResponse(kind, parts[1:], line)
+
+
+METRIC_FIELDS = ("count", "min_us", "max_us", "mean_us")
+
+
+def parse_metrics(response):
+    """Normalize a METRICS frame from either firmware.
+
+    Returns {"probes": {name: {"count", "min_us", "max_us", "mean_us"}},
+             "mem_free": int, "mem_low": int}; memory values are -1 where
+    the firmware cannot measure them.
+    """
+    if isinstance(response, LineResponse):
+        pairs = dict(field.split("=", 1) for field in response.fields)
+        mem = [int(v) for v in pairs.pop("mem", "-1,-1").split(",")]
+        probes = {name: [int(v) for v in value.split(",")] for name, value in pairs.items()}
+    else:
+        mem = response.get("mem", [-1, -1])
+        probes = response.get("metrics", {})
+    return {
+        "probes": {name: dict(zip(METRIC_FIELDS, values)) for name, values in probes.items()},
+        "mem_free": mem[0],
+        "mem_low": mem[1],
+    }
+
+
+def parse_typing(response):
+    """Per-transport report counters of an OK|TYPING_DONE / TYPING_CANCELLED line.
+
+    Returns {"usb": {"sent": n, "dropped": m}, "ble": {...}} for the
+    transports that typed.
+    """
+    counters = {}
+    for field in response.fields[1:]:
+        name, _, values = field.partition("=")
+        sent, dropped = (int(v) for v in values.split(","))
+        counters[name] = {"sent": sent, "dropped": dropped}
+    return counters
+
+
+PROTOCOLS = {
+    JsonProtocol.name: JsonProtocol,
+    LineProtocol.name: LineProtocol,
+}
+
+
+def get_protocol(name):
+    """Return a protocol instance by name ("json" or "line")."""
+    try:
+        return PROTOCOLS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown protocol: {name}") from None
@@ -0,0 +1,206 @@
+# tools/picopass_client/trace.py
+# Decode the firmware's TRACE_DUMP ring buffer (firmware/micropython/tracebuf.py)
+# and render it as a text timeline or Chrome trace JSON:
+#
+#   python -m picopass_client.trace /dev/ttyACM0                 # timeline
+#   python -m picopass_client.trace /dev/ttyACM0 --chrome t.json # chrome://tracing
+#   python -m picopass_client.trace --protocol json /dev/pts/5 --clear
+
+import argparse
+import base64
+import json
+import struct
+import sys
+
+from .client import PicoPassClient, PicoPassError
+from .protocol import LineProtocol, LineResponse
+
+RECORD = struct.Struct("<IHH")
+
+# MicroPython's ticks_us() wraps at 2**30 on every port
+TICKS_PERIOD = 1 << 30
+
+# Mirrors the event ids in firmware/micropython/tracebuf.py
+EVENTS = {
+    1: "cmd_begin",
+    2: "cmd_end",
+    3: "unlock",
+    4: "lock",
+    5: "save_begin",
+    6: "save_end",
+    7: "load_begin",
+    8: "load_end",
+    9: "crypto_begin",
+    10: "crypto_end",
+    11: "hid_begin",
+    12: "hid_key",
+    13: "hid_end",
+    14: "button",
+    15: "hid_report",
+    16: "hid_cancel",
+    17: "gesture",
+}
+
+COMMANDS = (
+    "PING", "GET_ID", "UNLOCK", "LOCK", "STATUS", "ADD_PASSWORD",
+    "DELETE_PASSWORD", "TYPE_PASSWORD", "SET_TIMEOUT", "METRICS",
+    "TRACE_DUMP", "ACTIVATE", "CONFIG", "TYPE", "INFO", "RESET", "VERSION",
+    "CALIBRATE_TYPING", "CALIBRATE_RESULT", "CANCEL_TYPING",
+)
+
+CRYPTO_OPS = ("derive", "encrypt", "decrypt")
+
+LONG_PRESS = 0x100
+
+# Mirrors gestures.NAMES; CHORD carries a button mask instead of an id
+GESTURES = ("", "click", "double_click", "long_press", "hold_repeat", "chord")
+
+
+class TraceEvent:
+    """One decoded trace record; t_us is relative to the oldest record."""
+
+    __slots__ = ("t_us", "event", "arg")
+
+    def __init__(self, t_us, event, arg):
+        self.t_us = t_us
+        self.event = event
+        self.arg = arg
+
+    @property
+    def name(self):
+        return EVENTS.get(self.event, f"event_{self.event}")
+
+    def label(self):
+        """Human-readable argument."""
+        if self.event == 1:
+            return COMMANDS[self.arg - 1] if 0 < self.arg <= len(COMMANDS) else "?"
+        if self.event in (9, 10):
+            return CRYPTO_OPS[self.arg] if self.arg < len(CRYPTO_OPS) else str(self.arg)
+        if self.event == 14:
+            return f"{self.arg & 0xFF}" + (" long" if self.arg & LONG_PRESS else "")
+        if self.event == 3:
+            return "ok" if self.arg else "failed"
+        if self.event == 15:
+            return f"#{self.arg}"
+        if self.event == 16:
+            return f"after {self.arg}"
+        if self.event == 17:
+            kind = self.arg >> 8
+            name = GESTURES[kind] if kind < len(GESTURES) else str(kind)
+            return f"{name} {self.arg & 0xFF:#06b}" if kind == 5 else f"{name} {self.arg & 0xFF}"
+        return ""
+
+    def __repr__(self):
+        return f"TraceEvent({self.t_us}, {self.name}, {self.arg})"
+
+
+def decode_trace(data):
+    """Decode chronological raw records, unwrapping ticks_us."""
+    events = []
+    t = 0
+    last = None
+    for ticks, event, arg in RECORD.iter_unpack(data):
+        if last is not None:
+            t += (ticks - last) % TICKS_PERIOD
+        last = ticks
+        events.append(TraceEvent(t, event, arg))
+    return events
+
+
+def fetch_trace(client, clear=False, timeout=None):
+    """Send TRACE_DUMP; returns (events, dropped)."""
+    if isinstance(client.protocol, LineProtocol):
+        response = client.call("TRACE_DUMP", *(("CLEAR",) if clear else ()), timeout=timeout)
+        return parse_trace_frame(response)
+    fields = {"clear": True} if clear else {}
+    return parse_trace_frame(client.call("TRACE_DUMP", timeout=timeout, **fields))
+
+
+def parse_trace_frame(response):
+    """Decode a TRACE_DUMP response from either firmware.
+
+    Raises PicoPassError if the device refused the dump (locked or not
+    activated).
+    """
+    if isinstance(response, LineResponse):
+        if response.kind != "TRACE":
+            raise PicoPassError(f"TRACE_DUMP refused: {response.raw}")
+        _now, dropped, payload = response.fields
+    else:
+        if response.get("status") == "error":
+            raise PicoPassError(f"TRACE_DUMP refused: {response.get('message')}")
+        dropped, payload = response.get("dropped", 0), response.get("trace", "")
+    return decode_trace(base64.b64decode(payload)), int(dropped)
+
+
+# ---- rendering --------------------------------------------------------------
+
+# begin event -> (end event, span name)
+_SPANS = {1: (2, "cmd"), 5: (6, "save"), 7: (8, "load"), 9: (10, "crypto"), 11: (13, "hid")}
+_ENDS = {end: begin for begin, (end, _) in _SPANS.items()}
+
+
+def format_timeline(events):
+    """Text timeline, one line per event, nested by open spans."""
+    lines = []
+    depth = 0
+    for e in events:
+        if e.event in _ENDS:
+            depth = max(0, depth - 1)
+        lines.append(f"{e.t_us / 1000:10.3f} ms  {'  ' * depth}{e.name:<12} {e.label()}".rstrip())
+        if e.event in _SPANS:
+            depth += 1
+    return lines
+
+
+def to_chrome_trace(events, pid=1, tid=1):
+    """Chrome trace-event JSON (load in chrome://tracing or Perfetto)."""
+    trace = []
+    stack = []
+    for e in events:
+        base = {"ts": e.t_us, "pid": pid, "tid": tid}
+        if e.event in _SPANS:
+            name = _SPANS[e.event][1]
+            label = e.label()
+            if label:
+                name = f"{name} {label}"
+            stack.append(name)
+            trace.append(dict(base, ph="B", name=name, args={"arg": e.arg}))
+        elif e.event in _ENDS:
+            if stack:
+                trace.append(dict(base, ph="E", name=stack.pop()))
+        else:
+            trace.append(dict(base, ph="i", s="t", name=e.name, args={"arg": e.label() or e.arg}))
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picopass_client.trace",
+                                     description="Dump and render the PicoPass event trace")
+    parser.add_argument("port")
+    parser.add_argument("--protocol", choices=("json", "line"), default="line")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--clear", action="store_true", help="clear the buffer after dumping")
+    parser.add_argument("--chrome", help="write Chrome trace JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        with PicoPassClient(args.port, protocol=args.protocol, timeout=args.timeout) as client:
+            events, dropped = fetch_trace(client, clear=args.clear)
+    except PicoPassError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.chrome:
+        with open(args.chrome, "w") as f:
+            json.dump(to_chrome_trace(events), f)
+        print(f"Wrote {len(events)} events to {args.chrome}", file=sys.stderr)
+    else:
+        print("\n".join(format_timeline(events)))
+    if dropped:
+        print(f"! {dropped} older events were overwritten", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
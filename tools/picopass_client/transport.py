@@ -0,0 +1,92 @@
+# tools/picopass_client/transport.py
+# Byte transports for the client: pyserial ports and raw tty/pty devices
+
+import errno
+import os
+import select
+
+try:
+    import serial
+    HAS_PYSERIAL = True
+except ImportError:
+    serial = None
+    HAS_PYSERIAL = False
+
+try:
+    import termios
+    import tty
+    HAS_TERMIOS = True
+except ImportError:
+    HAS_TERMIOS = False
+
+
+class SerialTransport:
+    """USB CDC port opened through pyserial."""
+
+    def __init__(self, port, baudrate=115200, read_timeout=0.05):
+        self.port = port
+        self._serial = serial.Serial(port, baudrate, timeout=read_timeout)
+
+    def read(self, size=4096):
+        """Read up to size bytes; returns b"" when nothing arrived in time."""
+        waiting = self._serial.in_waiting
+        return self._serial.read(min(max(waiting, 1), size))
+
+    def write(self, data):
+        self._serial.write(data)
+        self._serial.flush()
+
+    def reset_input(self):
+        self._serial.reset_input_buffer()
+
+    def close(self):
+        self._serial.close()
+
+
+class FdTransport:
+    """tty/pty device opened directly (simulator ptys, or no pyserial)."""
+
+    def __init__(self, path, read_timeout=0.05):
+        self.port = path
+        self.read_timeout = read_timeout
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        if HAS_TERMIOS and os.isatty(self.fd):
+            # Same line discipline pyserial sets up: no echo, no CR/LF mangling
+            tty.setraw(self.fd)
+
+    def read(self, size=4096):
+        """Read up to size bytes; b"" on timeout, ConnectionError once the
+        peer is gone (the fd would otherwise stay readable forever)."""
+        ready, _, _ = select.select([self.fd], [], [], self.read_timeout)
+        if not ready:
+            return b""
+        try:
+            data = os.read(self.fd, size)
+        except OSError as e:
+            # EIO on a pty whose master was closed
+            if e.errno != errno.EIO:
+                raise
+            data = b""
+        if not data:
+            raise ConnectionError(f"{self.port}: peer closed")
+        return data
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def reset_input(self):
+        if HAS_TERMIOS and os.isatty(self.fd):
+            termios.tcflush(self.fd, termios.TCIFLUSH)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_transport(port, baudrate=115200):
+    """Open port with pyserial when available, else as a raw tty device."""
+    if HAS_PYSERIAL:
+        return SerialTransport(port, baudrate)
+    return FdTransport(port)
@@ -0,0 +1,15 @@
+# tools/picopass_sim
+# Virtual PicoPass: the real firmware on CPython, exposed as a pty
+
+from hal_sim import FIRMWARE_DIR, decode_reports
+
+from .simulator import FIRMWARES, Simulator
+from .virtual import VirtualDevice
+
+__all__ = [
+    "FIRMWARE_DIR",
+    "FIRMWARES",
+    "Simulator",
+    "VirtualDevice",
+    "decode_reports",
+]
@@ -0,0 +1,54 @@
+# tools/picopass_sim/__main__.py
+# Start a simulated PicoPass on a pseudo-terminal:
+#   cd tools && python -m picopass_sim --firmware device --link /tmp/picopass
+# The pty path is printed on stdout as "PTY <path>"; connect any host tool
+# (picopass_client, the Tauri app, a terminal) to it like a real port.
+
+import argparse
+import binascii
+import os
+import sys
+
+from hal_sim import DEFAULT_UNIQUE_ID
+
+from .console import PtyConsole
+from .simulator import FIRMWARES, Simulator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picopass_sim",
+                                     description="Run the PicoPass firmware on a pty")
+    parser.add_argument("--firmware", choices=sorted(FIRMWARES), default="main",
+                        help="main.py (JSON protocol) or device.py (line protocol)")
+    parser.add_argument("--fs", dest="fsroot", help="directory backing the flash filesystem")
+    parser.add_argument("--unique-id", default=binascii.hexlify(DEFAULT_UNIQUE_ID).decode(),
+                        help="machine.unique_id() as hex")
+    parser.add_argument("--hid-log", help="append every HID report to this JSON-lines file")
+    parser.add_argument("--link", help="also expose the pty under this path (symlink)")
+    args = parser.parse_args(argv)
+
+    sim = Simulator(args.firmware, fsroot=args.fsroot,
+                    unique_id=binascii.unhexlify(args.unique_id), hid_log=args.hid_log)
+    console = PtyConsole()
+    if args.link:
+        if os.path.islink(args.link):
+            os.remove(args.link)
+        os.symlink(console.path, args.link)
+
+    out = sys.stdout
+    out.write(f"PTY {console.path}\n")
+    out.flush()
+    print(f"PicoPass simulator ({args.firmware}) on {console.path}, flash in {sim.fs.root}",
+          file=sys.stderr)
+    try:
+        sim.run(console)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
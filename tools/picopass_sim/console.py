@@ -0,0 +1,79 @@
+# tools/picopass_sim/console.py
+# The USB CDC console of the simulated board, backed by a pseudo-terminal
+
+import codecs
+import os
+import pty
+import select
+import tty
+
+
+class PtyConsole:
+    """sys.stdin/sys.stdout replacement on the master side of a pty.
+
+    Host tools open ``path`` (the slave side) like a real /dev/ttyACM*.
+    Reads are unbuffered so uselect.poll() on the fd stays accurate, and
+    output gets MicroPython's cooked "\\n" -> "\\r\\n" translation. Output
+    that the host does not drain is dropped rather than blocking the loop.
+    """
+
+    def __init__(self):
+        self.master, self._slave = pty.openpty()
+        # Raw line discipline, like a CDC ACM port: no echo, no CR/LF mapping.
+        # Keeping the slave open also stops reads failing with EIO while no
+        # host is attached.
+        tty.setraw(self._slave)
+        self.path = os.ttyname(self._slave)
+        os.set_blocking(self.master, False)
+        self.dropped = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def fileno(self):
+        return self.master
+
+    def read(self, size=-1):
+        out = []
+        while size < 0 or len(out) < size:
+            try:
+                byte = os.read(self.master, 1)
+            except BlockingIOError:
+                # Blocking semantics like sys.stdin on the board
+                select.select([self.master], [], [])
+                continue
+            if not byte:
+                break
+            char = self._decoder.decode(byte)
+            if char:
+                out.append(char)
+        return "".join(out)
+
+    def readline(self):
+        out = []
+        while True:
+            char = self.read(1)
+            out.append(char)
+            if not char or char == "\n":
+                return "".join(out)
+
+    def write(self, text):
+        data = text.replace("\n", "\r\n").encode("utf-8")
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self.master, view):]
+            except BlockingIOError:
+                # Nobody is draining the port: drop output like the CDC
+                # stack does when no host is reading, instead of stalling
+                self.dropped += len(view)
+                break
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return True
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
@@ -0,0 +1,77 @@
+# tools/picopass_sim/loadtest.py
+# Command throughput against a simulated (or real) device:
+#   cd tools && python -m picopass_sim.loadtest --firmware device --count 500 --depth 8
+#   cd tools && python -m picopass_sim.loadtest --port /dev/ttyACM0 --protocol line
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+
+from .virtual import VirtualDevice
+
+
+def run_load(client, command, count=200, depth=4):
+    """Send command count times, keeping up to depth requests in flight."""
+    in_flight = deque()
+    errors = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        if len(in_flight) >= depth:
+            errors += _settle(in_flight.popleft())
+        in_flight.append(client.submit(command))
+    while in_flight:
+        errors += _settle(in_flight.popleft())
+    elapsed = time.perf_counter() - start
+    return {
+        "command": client.protocol.command_name(command),
+        "count": count,
+        "depth": depth,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "per_second": round(count / elapsed, 1) if elapsed else None,
+        "latency": client.latency_by_command[client.protocol.command_name(command)].summary()
+        if client.latency_by_command else None,
+    }
+
+
+def _settle(future):
+    try:
+        future.result()
+        return 0
+    except Exception:
+        return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="picopass_sim.loadtest")
+    parser.add_argument("--firmware", choices=("main", "device"), default="main")
+    parser.add_argument("--port", help="use an existing device instead of a simulator")
+    parser.add_argument("--protocol", choices=("json", "line"))
+    parser.add_argument("--command", default="PING")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    from picopass_client import PicoPassClient
+
+    dev = None
+    if args.port:
+        client = PicoPassClient(args.port, protocol=args.protocol or "json", timeout=5).open()
+    else:
+        dev = VirtualDevice(args.firmware)
+        dev.start()
+        client = dev.connect(timeout=5)
+    try:
+        command = client.protocol.build(args.command)
+        print(json.dumps(run_load(client, command, args.count, args.depth), indent=2))
+    finally:
+        client.close()
+        if dev:
+            dev.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+# tools/picopass_sim/simulator.py
+# Runs the real firmware modules from firmware/micropython on CPython,
+# with the hal_sim HAL on a real-time clock and the USB CDC console on a
+# pseudo-terminal.
+
+import binascii
+import json
+import os
+import sys
+import tempfile
+
+from hal_sim import DEFAULT_UNIQUE_ID, FIRMWARE_DIR, FlashFS, Hal, RealClock, is_firmware_module
+
+from .console import PtyConsole
+
+# firmware name -> (module, entry point)
+FIRMWARES = {
+    "main": ("main", lambda module: module.main()),
+    "device": ("device", lambda module: module.PicoPassDevice().run()),
+}
+
+
+class Simulator:
+    """One simulated PicoPass board."""
+
+    def __init__(self, firmware="main", fsroot=None, unique_id=DEFAULT_UNIQUE_ID,
+                 hid_log=None, firmware_dir=FIRMWARE_DIR):
+        if firmware not in FIRMWARES:
+            raise ValueError(f"Unknown firmware: {firmware}")
+        self.firmware = firmware
+        self.firmware_dir = firmware_dir
+        self.fs = FlashFS(fsroot or tempfile.mkdtemp(prefix="picopass-flash-"))
+        self._hid_log = open(hid_log, "a") if hid_log else None
+        self.hal = Hal(RealClock(), unique_id=unique_id, on_report=self._log_report)
+        self.console = None
+        self.module = None
+
+    def _log_report(self, report):
+        if self._hid_log:
+            t = self.hal.clock.now_us() / 1000000
+            self._hid_log.write(json.dumps({"t": round(t, 6),
+                                            "report": binascii.hexlify(report).decode()}) + "\n")
+            self._hid_log.flush()
+
+    def load(self):
+        """Install the HAL and import the firmware with it."""
+        self.module = self.hal.import_firmware(FIRMWARES[self.firmware][0], self.firmware_dir)
+        for module in list(sys.modules.values()):
+            if is_firmware_module(module, self.firmware_dir):
+                self.fs.attach(module)
+        return self.module
+
+    def run(self, console=None):
+        """Attach the console as stdin/stdout and run the firmware forever."""
+        self.console = console or PtyConsole()
+        os.chdir(self.fs.root)
+        sys.stdin = sys.stdout = self.console
+        if self.module is None:
+            self.load()
+        FIRMWARES[self.firmware][1](self.module)
@@ -0,0 +1,76 @@
+# tools/picopass_sim/virtual.py
+# Host-side handle on a simulator running in a child process
+
+import os
+import subprocess
+import sys
+import tempfile
+
+TOOLS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PROTOCOLS = {"main": "json", "device": "line"}
+
+
+class VirtualDevice:
+    """Spawns ``python -m picopass_sim`` and exposes its pty path.
+
+        with VirtualDevice("device") as dev:
+            client = dev.connect()
+            client.call("PING")
+    """
+
+    def __init__(self, firmware="main", fsroot=None, hid_log=None, unique_id=None):
+        self.firmware = firmware
+        self.protocol = PROTOCOLS[firmware]
+        self.fsroot = fsroot or tempfile.mkdtemp(prefix="picopass-flash-")
+        self.hid_log = hid_log
+        self.unique_id = unique_id
+        self.path = None
+        self._proc = None
+
+    def start(self):
+        cmd = [sys.executable, "-m", "picopass_sim", "--firmware", self.firmware,
+               "--fs", self.fsroot]
+        if self.hid_log:
+            cmd += ["--hid-log", self.hid_log]
+        if self.unique_id:
+            cmd += ["--unique-id", self.unique_id]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [TOOLS_DIR] + [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p]))
+        self._proc = subprocess.Popen(cmd, cwd=TOOLS_DIR, env=env, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL, text=True)
+        line = self._proc.stdout.readline()
+        if not line.startswith("PTY "):
+            self.stop()
+            raise RuntimeError("simulator failed to start")
+        self.path = line[4:].strip()
+        return self.path
+
+    def connect(self, boot_timeout=15.0, **kwargs):
+        """Open a client once the firmware answers PING (boot may take a while)."""
+        from picopass_client import PicoPassClient
+        client = PicoPassClient(self.path, protocol=self.protocol, **kwargs).open()
+        try:
+            client.call("PING", timeout=boot_timeout)
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+            self._proc.stdout.close()
+            self._proc = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
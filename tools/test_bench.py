@@ -0,0 +1,50 @@
+# tools/test_bench.py
+# bench/ runner: deterministic cases, regression detection, device output parsing
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import run
+from cases import Board
+from hal_sim import SSD1306Panel
+
+
+def test_virtual_time_is_deterministic():
+    first = run.run_case("hid_type", iterations=3)
+    assert first["virtual_us"] == 6 * 10000  # 10 ms per packed report
+    assert run.run_case("hid_type", iterations=3)["virtual_us"] == first["virtual_us"]
+
+
+def test_display_reaches_the_panel():
+    board = Board()
+    panel = board.hal.attach_i2c(0x3C, SSD1306Panel())
+    display = board.firmware("display_manager").PicoPassDisplay()
+    display.show_status("READY", "Unlocked", "github.com")
+    assert panel.display_on
+    assert bytes(panel.gddram) == bytes(display.oled.buffer)
+    assert panel.page_bytes(0)[0] == 0xFF  # inverted header bar
+    # dirty-page show(): the blit case must still move pages every frame
+    assert run.run_case("display_blit", iterations=2)["virtual_us"] > 10000
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"a": {"virtual_us": 1000.0, "host_us": 2.0}, "b": {"virtual_us": 100.0}}
+    results = {"a": {"virtual_us": 1200.0, "host_us": 6.0}, "b": {"virtual_us": 104.0}}
+    regressions = run.compare(results, baseline, {"virtual_us": 10.0, "host_us": 50.0})
+    # b is within the noise floor, a.host_us moved only 4 us
+    assert [(c, m) for c, m, *_ in regressions] == [("a", "virtual_us")]
+    assert run.compare(results, baseline, run._parse_thresholds(["25"])) == []
+
+
+def test_parse_device_output():
+    text = 'PicoPass device benchmarks\nBENCH {"name": "kdf", "device_us": 410, "iterations": 200}\n'
+    assert run.parse_device_output(text) == {"kdf": {"device_us": 410, "iterations": 200}}
+
+
+if __name__ == "__main__":
+    test_virtual_time_is_deterministic()
+    test_display_reaches_the_panel()
+    test_compare_flags_only_real_regressions()
+    test_parse_device_output()
+    print("✅ Benchmark runner tests passed!")
@@ -0,0 +1,73 @@
+# tools/test_ble_hid.py
+# BLE keyboard: notification batching, connection interval and advertising
+import contextlib
+import io
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, decode_reports
+
+PASSPHRASE = "correct-horse-battery-staple-42x"
+
+
+def connected_keyboard(interval_us=7500):
+    hal = Hal()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ble_hid = hal.import_firmware("ble_hid")
+        keyboard = ble_hid.BLEKeyboard()
+        hal.ble.connect(conn_handle=1, interval_us=interval_us)
+        hal.ble.update_connection(1, interval_us)
+    return hal, ble_hid, keyboard
+
+
+def test_reports_go_out_in_batches_per_connection_event():
+    hal, ble_hid, keyboard = connected_keyboard(7500)
+    assert keyboard.conn_interval_us == 7500
+    assert keyboard.profile.key_ms == 8  # rounded up to whole ms
+    keyboard.type_text(PASSPHRASE)
+    times = [t for t, _, _, _ in hal.ble.notifications]
+    assert decode_reports(data for _, _, _, data in hal.ble.notifications) == PASSPHRASE
+    events = sorted(set(times))
+    assert max(times.count(t) for t in events) == ble_hid.NOTIFY_BATCH
+    assert all(b - a == 8000 for a, b in zip(events, events[1:]))
+    # one notify per 10 ms before batching
+    assert times[-1] - times[0] < len(times) * 10000 // 3
+
+    # a slower central gets the same batches, further apart
+    hal.ble.update_connection(1, 45000)
+    assert keyboard.profile.release_ms == 45
+    start = len(hal.ble.notifications)
+    keyboard.type_text("aaaa")  # 8 reports: press, release per key
+    times = [t for t, _, _, _ in hal.ble.notifications[start:]]
+    assert sorted(set(b - a for a, b in zip(times, times[1:]))) == [0, 45000]
+
+
+def test_advertising_prefers_a_short_interval_and_slows_down_when_idle():
+    hal = Hal()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ble_hid = hal.import_firmware("ble_hid")
+        keyboard = ble_hid.BLEKeyboard()
+    payload = bytes(keyboard._payload)
+    i = payload.index(b"\x05\x12")
+    assert struct.unpack_from("<HH", payload, i + 2) == (6, 12)  # 7.5-15 ms
+    assert len(payload) <= 31
+    assert hal.ble.advertising == [(0, ble_hid.ADV_FAST_US)]
+    hal.clock.advance_ms(ble_hid.ADV_FAST_MS)
+    assert hal.ble.advertising[-1] == (ble_hid.ADV_FAST_MS * 1000, ble_hid.ADV_SLOW_US)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        hal.ble.connect(conn_handle=1)
+        hal.ble.disconnect(conn_handle=1)
+        hal.ble.connect(conn_handle=2)
+    hal.clock.advance_ms(2 * ble_hid.ADV_FAST_MS)
+    # connecting stopped the fast -> slow switch
+    assert [interval for _, interval in hal.ble.advertising][-2:] == [ble_hid.ADV_SLOW_US, ble_hid.ADV_FAST_US]
+    assert keyboard.profile.key_ms == ble_hid.DEFAULT_INTERVAL_MS
+
+
+if __name__ == "__main__":
+    test_reports_go_out_in_batches_per_connection_event()
+    test_advertising_prefers_a_short_interval_and_slows_down_when_idle()
+    print("✅ BLE HID tests passed!")
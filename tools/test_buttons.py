@@ -0,0 +1,300 @@
+# tools/test_buttons.py
+# Buttons: IRQ edge queue, software and PIO debounce, gestures
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal
+
+
+def recognizer(hal, **kwargs):
+    button_handler = hal.boot("button_handler")
+    with contextlib.redirect_stdout(io.StringIO()):
+        gestures = hal.import_firmware("gestures", fresh=False)
+    return gestures, gestures.GestureRecognizer(button_handler.ButtonHandler(), **kwargs)
+
+
+def run(hal, recognizer, ms, step_ms=10):
+    """Poll like the main loop for ms; returns [(t_ms, gesture, arg)]."""
+    seen = []
+    for _ in range(ms // step_ms):
+        hal.clock.advance_ms(step_ms)
+        gesture = recognizer.poll()
+        while gesture:
+            seen.append((hal.clock.now_us() // 1000,) + gesture)
+            gesture = recognizer.poll()
+    return seen
+
+
+def loop(hal, device, ms):
+    """The main loop's button and typing steps, every 10 ms."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(ms // 10):
+            hal.clock.advance_ms(10)
+            gesture = device.poll_gesture()
+            if gesture:
+                device.handle_gesture(*gesture)
+            device.check_typing()
+
+
+def test_edges_are_timestamped_by_the_irq():
+    hal = Hal()
+    handler = hal.boot("button_handler").ButtonHandler()
+    hal.press(13, duration_ms=120, delay_ms=103, bounce=(2, 5))
+    # a slow loop: the edges still carry the time they happened
+    hal.clock.advance_ms(500)
+    assert handler.poll_edge() == (103, 2, True)
+    assert handler.poll_edge() == (223, 2, False)
+    assert handler.poll_edge() is None
+    assert not handler.events
+
+
+def test_glitch_inside_the_debounce_window_settles_on_the_pin():
+    hal = Hal()
+    handler = hal.boot("button_handler").ButtonHandler()
+    hal.press(14, duration_ms=30, delay_ms=100)
+    hal.clock.advance_ms(140)
+    assert handler.check_buttons() is None  # release still inside the window
+    hal.clock.advance_ms(20)
+    assert handler.check_buttons() == 1
+    assert not handler.is_long_press(1) and not handler.is_pressed(1)
+
+
+def test_a_full_queue_drops_edges_without_blocking():
+    hal = Hal()
+    handler = hal.boot("button_handler").ButtonHandler(queue_size=8)
+    for i in range(10):
+        hal.press(11, duration_ms=2, delay_ms=100 + 5 * i)
+    hal.clock.advance_ms(300)
+    assert len(handler.events) == 7 and handler.events.dropped == 13
+    while handler.poll_edge():
+        pass
+    assert not handler.is_pressed(4)
+
+
+def test_device_action_button_uses_the_queue():
+    hal = Hal()
+    device_module = hal.boot("device")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+    assert not device.check_button()
+    hal.press(15, duration_ms=80, delay_ms=100)
+    hal.clock.advance_ms(150)
+    assert not device.check_button()  # fires on release
+    hal.clock.advance_ms(100)
+    assert device.check_button()
+    assert not device.check_button()
+
+    hal.press_bootsel(duration_ms=80)
+    hal.clock.advance_ms(40)
+    assert not device.check_button()
+    hal.clock.advance_ms(60)
+    assert device.check_button()
+
+
+def test_presses_during_typing_are_dropped():
+    hal = Hal()
+    device_module = hal.boot("device")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+        device.activated = True
+        device.handle_serial = lambda: None  # commands go through dispatch()
+        device.dispatch("TYPE:correct-horse-battery-staple|first")
+    hal.press(15, duration_ms=80, delay_ms=100)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        while not device.is_typing():
+            hal.clock.advance_ms(10)
+            device.step()
+        # a second press and password while the first is still typing
+        device.dispatch("TYPE:second|second")
+        hal.press(15, duration_ms=80, delay_ms=20)
+        for _ in range(200):
+            hal.clock.advance_ms(10)
+            device.step()
+    assert out.getvalue().count("TYPING_DONE") == 1
+    assert hal.keyboard.typed() == "correct-horse-battery-staple"
+    assert device.pending_password == "second"  # waits for a fresh press
+
+
+def test_long_press_fires_while_held_and_repeats():
+    hal = Hal()
+    g, rec = recognizer(hal)
+    hal.press(15, duration_ms=2050, delay_ms=100)
+    seen = run(hal, rec, 3000)
+    assert seen == [(1100, g.LONG_PRESS, 0), (1350, g.HOLD_REPEAT, 0),
+                    (1600, g.HOLD_REPEAT, 0), (1850, g.HOLD_REPEAT, 0), (2100, g.HOLD_REPEAT, 0)]
+    # a slow loop sees the same gestures, in order with the release
+    hal = Hal()
+    g, rec = recognizer(hal, repeat_ms=0)
+    hal.press(15, duration_ms=1500, delay_ms=100)
+    hal.press(15, duration_ms=80, delay_ms=1800)
+    hal.clock.advance_ms(3000)
+    assert [rec.poll(), rec.poll(), rec.poll()] == [(g.LONG_PRESS, 0), (g.CLICK, 0), None]
+
+
+def test_clicks_and_double_clicks():
+    hal = Hal()
+    g, rec = recognizer(hal, double_click_buttons=(0,))
+    hal.press(15, duration_ms=80, delay_ms=100)
+    hal.press(15, duration_ms=80, delay_ms=1000)
+    hal.press(15, duration_ms=80, delay_ms=1200)
+    hal.press(14, duration_ms=80, delay_ms=2000)
+    seen = run(hal, rec, 2500)
+    # the double-click button waits out its window; the others do not
+    assert seen == [(480, g.CLICK, 0), (1280, g.DOUBLE_CLICK, 0), (2080, g.CLICK, 1)]
+    assert rec.deadline is None
+
+
+def test_chords_within_the_window():
+    hal = Hal()
+    g, rec = recognizer(hal, chord_buttons=(1, 2, 3, 4))
+    hal.press(14, duration_ms=300, delay_ms=100)
+    hal.press(12, duration_ms=300, delay_ms=130)
+    hal.press(13, duration_ms=60, delay_ms=1000)    # tap shorter than chord_ms
+    hal.press(13, duration_ms=1400, delay_ms=2000)  # single hold
+    seen = run(hal, rec, 4000)
+    assert seen == [(180, g.CHORD, 0b01010), (1060, g.CLICK, 2), (3000, g.LONG_PRESS, 2),
+                    (3250, g.HOLD_REPEAT, 2)]
+
+
+def test_thresholds_come_from_device_cfg():
+    hal = Hal()
+    g, rec = recognizer(hal)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        values = g.thresholds({"buttons": {"long_press_ms": 500, "chord_ms": "x"}})
+    assert values == dict(g.DEFAULTS, long_press_ms=500)
+    assert "chord_ms" in out.getvalue()
+    rec = g.GestureRecognizer.from_config(rec.buttons,
+                                          {"buttons": {"double_click_ms": 0}}, double_click_buttons=(0,))
+    assert rec.double_click_ms == 0 and rec.long_press_ms == 1000
+
+
+def test_main_locks_on_long_press_before_release():
+    hal = Hal()
+    main = hal.boot("main")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        device.add_password(0, "pw")
+    hal.press(14, duration_ms=80, delay_ms=100)
+    hal.press(15, duration_ms=3000, delay_ms=500)
+    loop(hal, device, 2000)
+    assert hal.keyboard.typed() == "pw"
+    assert not device.unlocked and device.buttons.is_pressed(0)
+
+
+LONG_PASSWORD = "correct-horse-battery-staple" * 4  # ~0.5 s of typing
+
+
+def test_main_drops_presses_and_type_requests_while_typing():
+    hal = Hal()
+    main = hal.boot("main")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        device.add_password(0, LONG_PASSWORD)
+        device.add_password(1, "second")
+    hal.press(14, duration_ms=80, delay_ms=100)
+    loop(hal, device, 200)
+    assert device.keyboard.is_typing()
+    hal.press(13, duration_ms=30, delay_ms=20)      # released mid-typing
+    hal.press(13, duration_ms=1500, delay_ms=200)   # still held when it ends
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device.handle_serial_command({"type": "TYPE_PASSWORD", "slot": 1})
+    assert json.loads(out.getvalue().splitlines()[-1]) == {
+        "status": "error", "message": "Typing in progress"}
+    loop(hal, device, 3000)
+    assert hal.keyboard.typed() == LONG_PASSWORD
+
+    hal.press(13, duration_ms=80, delay_ms=100)     # a fresh press types
+    loop(hal, device, 1000)
+    assert hal.keyboard.typed() == LONG_PASSWORD + "second"
+
+
+def test_chorded_slots_and_banks():
+    hal = Hal()
+    main = hal.boot("main", {"buttons": {"slots": "chord", "chord_ms": 60}})
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        for slot in range(20):
+            assert device.add_password(slot, f"<{slot}>")
+        assert not device.add_password(main.MAX_SLOTS, "x")
+    assert device.bank_count() == 2
+
+    start = hal.clock.now_us()
+    hal.press(14, duration_ms=300, delay_ms=100)   # 1
+    hal.press(12, duration_ms=300, delay_ms=120)   # + 4
+    loop(hal, device, 1000)
+    assert hal.keyboard.typed() == "<4>"
+    # the chord types as its window closes, with both buttons still held
+    assert hal.keyboard.reports[0][0] - start <= (100 + 60 + 10) * 1000
+
+    hal.press(15, duration_ms=80, delay_ms=100)    # next bank
+    hal.press(11, duration_ms=80, delay_ms=2000)   # 8 -> slot 15 + 7, empty
+    hal.press(14, duration_ms=30, delay_ms=3000)   # 1 -> slot 15
+    loop(hal, device, 4000)
+    assert device.bank == 1 and hal.keyboard.typed() == "<4><15>"
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert device.add_password(22, "<22>")
+    hal.press(11, duration_ms=80, delay_ms=100)
+    loop(hal, device, 1000)
+    assert hal.keyboard.typed() == "<4><15><22>"
+    with contextlib.redirect_stdout(io.StringIO()):
+        device.lock()
+    assert device.bank == 0
+
+
+def test_pio_debounce_pushes_only_clean_edges():
+    hal = Hal(pio=True)
+    button_handler = hal.boot("button_handler")
+    handler = button_handler.ButtonHandler()
+    assert len(handler.machines) == 5
+    hal.press(13, duration_ms=120, delay_ms=103, bounce=(2, 5))
+    hal.press(12, duration_ms=4, delay_ms=300)  # shorter than the PIO window
+    hal.clock.advance_ms(500)
+    # each edge is dated when the line settled (last bounce at 108.5 ms)
+    assert handler.poll_edge() == (109, 2, True)
+    assert handler.poll_edge() == (229, 2, False)
+    assert handler.poll_edge() is None and not handler.is_pressed(3)
+    assert handler.events.dropped == 0
+
+    # a state machine owned by another driver: rp2 would reprogram it without
+    # complaint, so the claim in pio_sm is what sends the buttons to software
+    hal = Hal(pio=True)
+    button_handler = hal.boot("button_handler")
+    ws2812 = hal.import_firmware("ws2812", fresh=False)
+    pixel = ws2812.WS2812(48, sm_id=2)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        handler = button_handler.ButtonHandler()
+    assert handler.machines is None and "in use by ws2812" in out.getvalue()
+    assert hal.pio.machines[2] is pixel.sm and pixel.sm.program is ws2812._ws2812_program
+    assert [sys.modules["pio_sm"].owner(i) for i in range(3)] == [None, None, "ws2812"]
+    hal.press(13, duration_ms=120, delay_ms=100)
+    hal.clock.advance_ms(300)
+    assert handler.check_buttons() == 2
+    assert Hal().boot("button_handler").ButtonHandler().machines is None
+
+
+if __name__ == "__main__":
+    test_edges_are_timestamped_by_the_irq()
+    test_glitch_inside_the_debounce_window_settles_on_the_pin()
+    test_a_full_queue_drops_edges_without_blocking()
+    test_device_action_button_uses_the_queue()
+    test_presses_during_typing_are_dropped()
+    test_long_press_fires_while_held_and_repeats()
+    test_clicks_and_double_clicks()
+    test_chords_within_the_window()
+    test_thresholds_come_from_device_cfg()
+    test_main_locks_on_long_press_before_release()
+    test_main_drops_presses_and_type_requests_while_typing()
+    test_chorded_slots_and_banks()
+    test_pio_debounce_pushes_only_clean_edges()
+    print("✅ Button tests passed!")
@@ -0,0 +1,125 @@
+# tools/test_display.py
+# OLED: dirty-page refresh of the SSD1306 driver, checked on the panel model,
+# the coalescing display service and the cached static tiles
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, SSD1306Panel
+
+FRAME = 128 * 64 // 8
+
+
+def boot(hal):
+    """PicoPassDisplay on a fresh panel, counters cleared after the welcome screen."""
+    panel = hal.attach_i2c(0x3C, SSD1306Panel())
+    with contextlib.redirect_stdout(io.StringIO()):
+        display = hal.import_firmware("display_manager").PicoPassDisplay()
+    assert display.active
+    panel.reset_counters()
+    return panel, display
+
+
+def test_only_changed_pages_and_columns_are_sent():
+    hal = Hal()
+    panel, display = boot(hal)
+    display.show_status("READY", "Unlocked", "github.com")
+    assert bytes(panel.gddram) == bytes(display.oled.buffer)
+
+    panel.reset_counters()
+    display.show_status("READY", "Unlocked", "gitlab.com")
+    assert bytes(panel.gddram) == bytes(display.oled.buffer)
+    assert 0 < panel.data_bytes < FRAME // 4
+    # only the service line (y 36-43: pages 4 and 5) and only its changed columns
+    assert {page for page, _ in panel.writes} == {4, 5}
+    assert min(col for _, col in panel.writes) >= 5 + 8 * 5
+
+    panel.reset_counters()
+    display.show_status("TYPING", "Typing...", "gitlab.com")
+    assert bytes(panel.gddram) == bytes(display.oled.buffer)
+    assert panel.data_bytes < FRAME // 4
+
+
+def test_unchanged_frames_send_nothing_and_full_sends_everything():
+    hal = Hal()
+    panel, display = boot(hal)
+    i2c = display.i2c
+    display.show_status("READY", "Unlocked")
+    panel.reset_counters()
+    sent = i2c.bytes_written
+    display.show_status("READY", "Unlocked")
+    assert panel.data_bytes == 0 and i2c.bytes_written == sent
+
+    display.oled.show(True)
+    assert panel.data_bytes == FRAME
+    # a window is one transaction: COL_ADDR x0 x1 PAGE_ADDR p0 p1
+    assert panel.commands[-2:] == [(0x21, (0, 127)), (0x22, (0, 7))]
+
+
+def test_status_requests_coalesce_and_never_block_the_caller():
+    hal = Hal()
+    panel = hal.attach_i2c(0x3C, SSD1306Panel())
+    device_module = hal.boot("device", {"has_display": True})
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+    service = device.display
+    hal.clock.advance_ms(100)
+    panel.reset_counters()
+
+    start = hal.clock.now_us()
+    with contextlib.redirect_stdout(io.StringIO()):
+        device.show_status("TYPING", "Processing...")
+        device.show_status("SUCCESS", "Typed!", "github.com")
+    assert hal.clock.now_us() == start and panel.data_bytes == 0
+    hal.clock.advance_ms(10)
+    assert (service.rendered, service.superseded) == (1, 1)  # TYPING never drawn
+    oled = service.display.oled
+    assert bytes(panel.gddram) == bytes(oled.buffer)
+
+    # at most one frame per FRAME_MS, always the latest request
+    frame_ms = sys.modules["display_manager"].FRAME_MS
+    drawn = oled.buffer[:]
+    with contextlib.redirect_stdout(io.StringIO()):
+        device.show_status("LOCKED", "Device Locked")
+    hal.clock.advance_ms(frame_ms // 2)
+    assert service.rendered == 1 and bytes(panel.gddram) == bytes(drawn)
+    hal.clock.advance_ms(frame_ms)
+    assert service.rendered == 2 and bytes(panel.gddram) == bytes(oled.buffer)
+    assert bytes(panel.gddram) != bytes(drawn)
+
+
+def test_static_screens_and_headers_are_rendered_once():
+    hal = Hal()
+    panel, display = boot(hal)
+    oled = display.oled
+    display.show_status("READY", "Unlocked", "github.com")
+    first = bytes(oled.buffer)
+    assert oled.buffer[1 * 128 + 115] & 0x01  # padlock drawn in the header tile
+    display.show_locking()
+    locked = bytes(oled.buffer)
+
+    calls = []
+    for name in ("text", "rect", "fill_rect", "pixel"):
+        def traced(*args, _name=name, _draw=getattr(oled, name)):
+            calls.append(_name)
+            return _draw(*args)
+        setattr(oled, name, traced)
+    display.show_status("READY", "Unlocked", "github.com")
+    assert bytes(oled.buffer) == first
+    assert calls == ["text", "text"]  # only the service and status fields
+    calls.clear()
+    display.show_locking()
+    display.show_welcome()
+    assert calls == []
+    display.show_locking()
+    assert bytes(oled.buffer) == locked == bytes(panel.gddram)
+
+
+if __name__ == "__main__":
+    test_only_changed_pages_and_columns_are_sent()
+    test_unchanged_frames_send_nothing_and_full_sends_everything()
+    test_status_requests_coalesce_and_never_block_the_caller()
+    test_static_screens_and_headers_are_rendered_once()
+    print("✅ Display tests passed!")
@@ -1,36 +1,34 @@
+import os
 import sys
-from unittest.mock import MagicMock
+import tempfile
 
-# Mocking machine and other MicroPython modules
-sys.modules['machine'] = MagicMock()
-sys.modules['utime'] = MagicMock()
-sys.modules['uselect'] = MagicMock()
-sys.modules['rp2'] = MagicMock()
-sys.modules['keyboard'] = MagicMock()
-sys.modules['display_manager'] = MagicMock()
-sys.modules['ble_hid'] = MagicMock()
-
-# Import the license manager
-sys.path.append('PicoPass/firmware/micropython')
-from license import LicenseManager
+# MicroPython HAL (machine, utime, uselect, rp2, ...) from tools/hal_sim
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import FlashFS, Hal
 
 def test_license_manager():
+    hal = Hal()
+    license_module = hal.import_firmware("license")
+    FlashFS(tempfile.mkdtemp()).attach(license_module)
+    LicenseManager = license_module.LicenseManager
+
     lm = LicenseManager()
     board_id = lm.board_id
     board_type = lm.board_type
-    
+
     print(f"Detected Board ID: {board_id}")
     print(f"Detected Board Type: {board_type}")
-    
+
     # Generate a key
     key = lm._calculate_key(board_id, board_type)
     print(f"Calculated Key: {key}")
-    
-    # Save and verify
+
+    # Save and verify (a config is part of a valid activation)
+    lm._save_config({"led_gpio": 25})
     lm.save_license(key)
     is_valid = lm.verify_license()
     print(f"License Verification: {'SUCCESS' if is_valid else 'FAILED'}")
-    
+
     assert is_valid == True
 
 if __name__ == "__main__":
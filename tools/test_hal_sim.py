@@ -0,0 +1,112 @@
+# tools/test_hal_sim.py
+# Firmware modules on the virtual clock: no wall-clock sleeps, exact replays
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, VirtualClock
+
+
+def test_boot_animation_runs_on_virtual_time():
+    hal = Hal()
+    leds = hal.import_firmware("led_controller").LEDController()
+    start = time.perf_counter()
+    leds.boot_animation()
+    # the animation runs from a timer: boot does not wait for it
+    assert hal.clock.now_us() == 0 and leds.engine.busy()
+    # 3 LEDs x 21 steps x 20 ms
+    hal.clock.advance_ms(3 * 21 * 20)
+    assert time.perf_counter() - start < 0.5
+    assert not leds.engine.busy()
+    status = hal.pwms[0]
+    assert max(duty for _, duty in status.history) == 65535
+    assert status.duty_u16() == 0
+
+
+def run_buttons(hal, handler, until_ms):
+    events = []
+    while hal.clock.now_us() < until_ms * 1000:
+        button = handler.check_buttons()
+        if button is not None:
+            events.append((hal.clock.now_us() // 1000, button, handler.is_long_press(button)))
+        hal.time.sleep(0.01)
+    return events
+
+
+def test_scripted_button_presses_replay_deterministically():
+    def scenario():
+        hal = Hal()
+        handler = hal.import_firmware("button_handler").ButtonHandler()
+        hal.press(14, duration_ms=120, delay_ms=100, bounce=(2, 5))
+        hal.press(15, duration_ms=1500, delay_ms=500)
+        return run_buttons(hal, handler, until_ms=3000)
+
+    first = scenario()
+    assert [(b, long) for _, b, long in first] == [(1, False), (0, True)]
+    assert first == scenario()
+
+
+def test_timer_and_poll_follow_the_clock():
+    clock = VirtualClock()
+    hal = Hal(clock)
+    machine, uselect = hal.modules["machine"], hal.modules["uselect"]
+    fired = []
+    timer = machine.Timer(-1)
+    timer.init(mode=machine.Timer.PERIODIC, period=250, callback=lambda t: fired.append(clock.ticks_ms()))
+
+    stdin = hal.console()
+    stdin.feed("PING\n", at_us=600000)
+    poll = uselect.poll()
+    poll.register(stdin, uselect.POLLIN)
+    assert poll.poll(0) == []
+    assert poll.poll(1000) == [(stdin, uselect.POLLIN)]
+    assert clock.ticks_ms() == 600
+    assert stdin.readline() == "PING\n"
+    assert fired == [250, 500]
+
+    clock.advance_ms(60000)  # a simulated minute
+    assert len(fired) == 242
+    timer.deinit()
+    clock.advance_ms(1000)
+    assert len(fired) == 242
+
+
+def test_ticks_wrap_like_micropython():
+    clock = VirtualClock(start_us=((1 << 30) - 5) * 1000)
+    before = clock.ticks_ms()
+    clock.advance_ms(10)
+    after = clock.ticks_ms()
+    assert after < before
+    assert clock.ticks_diff(after, before) == 10
+    assert clock.ticks_diff(before, after) == -10
+
+
+def test_ble_fake_records_notifications():
+    hal = Hal()
+    ble = hal.modules["bluetooth"].BLE()
+    ble.active(True)
+    handles = ble.gatts_register_services(((1, ((2, 0x12, ((3, 2),)), (4, 2))),))
+    assert handles == ((1, 2, 3),)
+    ble.connect(conn_handle=7)
+    hal.clock.advance_ms(5)
+    ble.gatts_notify(7, 1, b"\x00" * 8)
+    assert ble.notifications == [(5000, 7, 1, b"\x00" * 8)]
+
+
+def test_boot_puts_every_firmware_module_on_one_flash():
+    hal = Hal()
+    hal.boot("typing_profile", {"typing": {"profile": "safe"}})
+    assert sys.modules["typing_profile"].load().name == "safe"  # device.cfg on hal.fs
+    storage = hal.boot("storage", fs=hal.fs)
+    assert storage.open == hal.fs.open
+    assert sys.modules["tracebuf"].open == hal.fs.open  # imported by storage
+
+if __name__ == "__main__":
+    test_boot_animation_runs_on_virtual_time()
+    test_scripted_button_presses_replay_deterministically()
+    test_timer_and_poll_follow_the_clock()
+    test_ticks_wrap_like_micropython()
+    test_ble_fake_records_notifications()
+    test_boot_puts_every_firmware_module_on_one_flash()
+    print("✅ HAL simulator tests passed!")
@@ -0,0 +1,82 @@
+# tools/test_hid_keymap.py
+# Shared ASCII -> HID table and the keyboards that use it
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, decode_reports
+
+PRINTABLE = string.ascii_letters + string.digits + string.punctuation + " \t\n"
+
+
+def test_keymap_matches_us_layout():
+    hal = Hal()
+    keymap = hal.import_firmware("hid_keymap")
+    layout = hal.modules["adafruit_hid.keyboard_layout_us"].KeyboardLayoutUS(None)
+    assert len(keymap.KEYMAP) == 256
+    report = bytearray(8)
+    for char in PRINTABLE:
+        assert keymap.press(report, char)
+        codes = layout.keycodes(char)
+        assert report[2] == codes[-1]
+        assert report[0] == (keymap.MOD_SHIFT if len(codes) == 2 else 0)
+    assert not keymap.press(report, "é")
+    assert not keymap.press(report, "\x01")
+
+
+def test_usb_and_ble_type_through_the_table():
+    hal = Hal()
+    keyboard = hal.import_firmware("hid_keyboard").USBKeyboard()
+    keyboard.type_string(PRINTABLE)
+    assert hal.keyboard.typed() == PRINTABLE
+    keyboard.type_char("x")
+    assert hal.keyboard.typed() == PRINTABLE + "x"
+
+    ble = hal.import_firmware("ble_hid", fresh=False).BLEKeyboard()
+    hal.ble.connect(conn_handle=1)
+    ble.type_text("Tr0ub4dor&3")
+    assert decode_reports(data for _, _, _, data in hal.ble.notifications) == "Tr0ub4dor&3"
+
+
+def packed(keymap, text):
+    report = bytearray(8)
+    return [(pressed, bytes(report)) for pressed in keymap.pack(text, report)]
+
+
+def test_pack_releases_only_on_repeat_or_modifier_change():
+    keymap = Hal().import_firmware("hid_keymap")
+    a, b = 0x04, 0x05
+    assert packed(keymap, "ab") == [(True, bytes([0, 0, a, b, 0, 0, 0, 0])), (False, bytes(8))]
+    # repeated key and shift change both force a release
+    assert [p for p, _ in packed(keymap, "aab")] == [True, False, True, False]
+    assert [p for p, _ in packed(keymap, "aA")] == [True, False, True, False]
+    # a seventh distinct key rolls over into the next report, no release
+    assert [(p, r[2:].count(0)) for p, r in packed(keymap, "abcdefg")] == [
+        (True, 0), (True, 5), (False, 6)]
+    text = "correct horse battery staple!!"
+    assert decode_reports(r for _, r in packed(keymap, text)) == text
+    rng = random.Random(7)
+    for _ in range(200):
+        text = "".join(rng.choice("aAbB1!c ") for _ in range(rng.randrange(1, 40)))
+        assert decode_reports(r for _, r in packed(keymap, text)) == text
+
+
+def test_packed_typing_is_a_fraction_of_per_key_typing():
+    hal = Hal()
+    keyboard = hal.import_firmware("hid_keyboard").USBKeyboard()
+    password = "correct-horse-battery-staple-42x"
+    assert len(password) == 32
+    keyboard.type_string(password)
+    assert hal.keyboard.typed() == password
+    per_key_us = len(password) * keyboard.profile.key_ms * 1000
+    assert hal.clock.now_us() < 0.5 * per_key_us
+
+
+if __name__ == "__main__":
+    test_keymap_matches_us_layout()
+    test_usb_and_ble_type_through_the_table()
+    test_pack_releases_only_on_repeat_or_modifier_change()
+    test_packed_typing_is_a_fraction_of_per_key_typing()
+    print("✅ HID keymap tests passed!")
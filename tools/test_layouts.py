@@ -0,0 +1,151 @@
+# tools/test_layouts.py
+# Generated keyboard layouts, per-device selection and per-slot overrides
+import contextlib
+import io
+import os
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import gen_layouts
+from hal_sim import Hal
+
+PRINTABLE = string.ascii_letters + string.digits + string.punctuation + " \t\n"
+
+
+def decode(reports, name):
+    """What a host set to layout name types for these reports."""
+    layout = gen_layouts.LAYOUTS[name]
+    chars = {stroke: char for char, stroke in layout.strokes().items()}
+    out = []
+    held = set()
+    dead = None
+    for report in reports:
+        keys = [k for k in report[2:] if k]
+        for key in keys:
+            if key in held:
+                continue
+            char = chars[(report[0], key)]
+            if dead is not None:
+                assert char == " ", f"{name}: dead {dead!r} followed by {char!r}"
+                out.append(dead)
+                dead = None
+            elif char in layout.dead:
+                dead = char
+            else:
+                out.append(char)
+        held = set(keys)
+    assert dead is None, f"{name}: dangling dead key {dead!r}"
+    return "".join(out)
+
+
+def test_generated_tables_are_up_to_date():
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert gen_layouts.main(["--check"]) == 0
+    hal = Hal()
+    keymap = hal.import_firmware("hid_keymap")
+    assert set(keymap.LAYOUTS) == set(gen_layouts.LAYOUTS)
+    for name in keymap.LAYOUTS:
+        layout = keymap.load_layout(name)
+        assert layout.NAME == name
+        assert len(layout.KEYMAP) == 256 and len(layout.DEAD) == 16
+
+
+def test_every_layout_types_printable_ascii():
+    hal = Hal()
+    keymap = hal.import_firmware("hid_keymap")
+    report = bytearray(8)
+    for name in keymap.LAYOUTS:
+        layout = keymap.load_layout(name)
+        reports = [bytes(report) for _ in keymap.pack(PRINTABLE, report, layout)]
+        assert decode(reports, name) == PRINTABLE, name
+        # a repeated dead key still gets its own space
+        reports = [bytes(report) for _ in keymap.pack("~~^^''", report, layout)]
+        assert decode(reports, name) == "~~^^''", name
+
+
+def test_layout_spot_checks():
+    hal = Hal()
+    keymap = hal.import_firmware("hid_keymap")
+    report = bytearray(8)
+    expected = [
+        ("abnt2", "/", 0x40, 0x14), ("abnt2", "~", 0x00, 0x34),
+        ("de", "z", 0x00, 0x1C), ("de", "@", 0x40, 0x14),
+        ("fr", "a", 0x00, 0x14), ("fr", "1", 0x02, 0x1E),
+        ("us_intl", "'", 0x00, 0x34),
+    ]
+    for name, char, mod, key in expected:
+        keymap.release(report)
+        assert keymap.press(report, char, keymap.load_layout(name))
+        assert (report[0], report[2]) == (mod, key), (name, char)
+    # dead key: press, release, space, release
+    reports = [bytes(report) for _ in keymap.pack("'", report, keymap.load_layout("us_intl"))]
+    assert [r[2] for r in reports] == [0x34, 0, 0x2C, 0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert keymap.load_layout("dvorak") is keymap.US
+
+
+def test_device_cfg_selects_the_layout():
+    hal = Hal()
+    keyboard = hal.boot("hid_keyboard", {"layout": "de"}).USBKeyboard()
+    assert keyboard.layout.NAME == "de"
+    keyboard.type_string("yz@")
+    assert decode((r for _, r in hal.keyboard.reports), "de") == "yz@"
+    keyboard.type_char("^")
+    assert decode((r for _, r in hal.keyboard.reports), "de") == "yz@^"
+
+    hal = Hal()
+    device_module = hal.boot("device", {"layout": "fr"})
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device = device_module.PicoPassDevice()
+        device.activated = True
+        device.dispatch("TYPE:azerty|svc")
+        device.type_password()
+        device.hid.engine.wait()
+        device.dispatch("TYPE:azerty|svc|abnt2")
+        device.type_password()
+        device.hid.engine.wait()
+        device.dispatch("TYPE:azerty|svc|dvorak")
+    reports = [r for _, r in hal.keyboard.reports]
+    # as seen by a US host: AZERTY keys first, then the ABNT2 (QWERTY) override
+    assert hal.keyboard.typed() == "qwerty" + "azerty"
+    assert decode(reports, "fr").startswith("azerty")
+    assert out.getvalue().splitlines()[-1] == "ERROR|UNKNOWN_LAYOUT|dvorak"
+    assert device.pending_password is None
+
+
+def test_slot_layout_overrides_the_device():
+    hal = Hal()
+    main = hal.boot("main", {"layout": "de"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        assert device.add_password(0, "yes/no")
+        assert device.add_password(1, "yes/no", "abnt2")
+        assert not device.add_password(2, "x", "dvorak")
+        device.type_password(0)
+        device.keyboard.engine.wait()
+        de = [r for _, r in hal.keyboard.reports]
+        device.type_password(1)
+        device.keyboard.engine.wait()
+    abnt2 = [r for _, r in hal.keyboard.reports][len(de):]
+    assert decode(de, "de") == "yes/no"
+    assert decode(abnt2, "abnt2") == "yes/no"
+    assert device.slot_layouts == [None, "abnt2", None, None]
+
+    # the override survives a reboot and is cleared with the slot
+    with contextlib.redirect_stdout(io.StringIO()):
+        device.load_from_flash()
+        assert device.slot_layouts[1] == "abnt2"
+        device.delete_password(1)
+    assert device.slot_layouts[1] is None
+
+
+if __name__ == "__main__":
+    test_generated_tables_are_up_to_date()
+    test_every_layout_types_printable_ascii()
+    test_layout_spot_checks()
+    test_device_cfg_selects_the_layout()
+    test_slot_layout_overrides_the_device()
+    print("✅ Layout tests passed!")
@@ -0,0 +1,152 @@
+# tools/test_leds.py
+# LEDs: timer-driven keyframe animations, priorities, gamma and easing tables,
+# and the WS2812 pixel of has_rgb boards
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal
+
+
+def levels(pwm):
+    return [(t // 1000, duty) for t, duty in pwm.history]
+
+
+def test_blinks_run_in_the_background_and_restore_the_base_level():
+    hal = Hal()
+    led_controller = hal.boot("led_controller")
+    leds = led_controller.LEDController()
+    status = leds.led_status
+    leds.set_status(True)
+    assert leds.blink_status(2, 0.1)
+    assert hal.clock.now_us() == 0
+    leds.set_status(True, 50)  # changes the level the blink returns to
+    hal.clock.advance_ms(1000)
+    assert [duty for _, duty in levels(status)][-5:] == [0, 65535, 0, 65535, led_controller.DUTY[50]]
+    assert [t for t, _ in levels(status)][-5:] == [0, 100, 200, 300, 400]
+    assert not leds.engine.busy()
+
+
+def test_errors_preempt_and_lower_priorities_wait_their_turn():
+    hal = Hal()
+    leds = hal.boot("led_controller").LEDController()
+    assert leds.pulse(leds.led_status, 1.0)
+    hal.clock.advance_ms(200)
+    assert leds.error_blink(3)           # HIGH over the LOW pulse
+    assert not leds.waiting_pattern()    # NORMAL under the running error
+    assert leds.led_status.duty_u16() == 0
+    hal.clock.advance_ms(600)
+    assert not leds.engine.busy()
+    assert leds.waiting_pattern()
+    hal.clock.advance_ms(100)
+    assert 0 < leds.led_status.duty_u16() < 65535
+    leds.all_off()
+    assert not leds.engine.busy() and leds.led_status.duty_u16() == 0
+
+
+def test_nothing_in_boot_or_the_command_path_sleeps_for_a_led():
+    hal = Hal()
+    main = hal.boot("main")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        assert hal.clock.now_us() == 0  # the boot animation was ~1.3 s
+        device.unlock("master")
+        device.type_password(3)           # empty slot: error blink
+        assert hal.clock.now_us() == 0
+    assert device.leds.engine.current.priority == sys.modules["led_engine"].HIGH
+
+    hal = Hal()
+    device_module = hal.boot("device")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+    start = hal.clock.now_us()
+    device.blink(3)
+    assert hal.clock.now_us() == start
+    hal.clock.advance_ms(700)
+    history = hal.gpio(device.led.id).history
+    assert [(t - start) // 1000 for t, _ in history[-6:]] == [0, 100, 200, 300, 400, 500]
+    assert device.led.value() == 0
+
+
+def test_duty_and_easing_tables_are_precomputed():
+    hal = Hal()
+    led_engine = hal.boot("led_engine")
+    duty, ease = led_engine.DUTY, led_engine.EASE
+    assert duty.typecode == "H" and len(duty) == 101
+    assert duty[0] == 0 and duty[100] == 65535 and duty[50] < 65535 // 4  # gamma 2.2
+    assert all(a <= b for a, b in zip(duty, duty[1:]))
+    assert ease[0] == 0 and ease[-1] == 100 and ease[len(ease) // 2] == 50
+    assert all(a <= b for a, b in zip(ease, ease[1:]))
+    # eased: slow at the ends, fast in the middle
+    assert ease[1] - ease[0] < ease[17] - ease[16]
+
+    pulse = led_engine.pulse(0, 400, 1)
+    assert isinstance(pulse.levels, bytearray) and pulse.durations.typecode == "H"
+    rise = list(pulse.levels[:len(pulse) // 2 + 1])
+    assert rise[0] == 0 and rise[-1] == 100 and rise == sorted(rise)
+    breathe = led_engine.breathe(0, 560, 1)
+    assert sum(breathe.durations) == 560 and breathe.levels[-1] == 0
+
+
+RGB = {"has_rgb": True, "led_gpio": 20}
+
+
+def test_rgb_boards_push_one_grb_word_per_frame_through_pio():
+    hal = Hal(pio=True)
+    main = hal.boot("main", RGB)
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+    leds = device.leds
+    sm = leds.pixel.sm
+    assert sm is hal.pio.machines[sys.modules["ws2812"].SM_ID] and sm.active()
+    assert sm.program.kwargs["pull_thresh"] == 24
+    hal.clock.advance_ms(2000)  # boot animation
+    assert sm.puts == len(sm.tx)  # one frame, one put, one word
+    assert sm.tx[-1] == (255 << 8) << 8  # locked: red only
+
+    duty8 = sys.modules["led_engine"].DUTY8
+    leds.set_status(True, 50)
+    leds.set_error(True)
+    assert sm.tx[-1] == (duty8[50] << 16 | 255 << 8) << 8  # G R B, top-aligned
+    puts = sm.puts
+    assert leds.pulse(leds.led_activity, 0.2)
+    hal.clock.advance_ms(300)
+    assert not leds.engine.busy()
+    # every frame of the pulse plus the return to base: one put each
+    assert sm.puts - puts == len(sys.modules["led_engine"].pulse(2, 200, 3)) + 1
+    assert {word >> 8 & 0xFF for word in sm.tx[puts:]} > {0, 255}  # blue ramped
+    assert sm.tx[-1] == (duty8[50] << 16 | 255 << 8) << 8  # back to the base colour
+
+
+def test_rgb_falls_back_without_pio_and_uses_bitstream_when_present():
+    hal = Hal()
+    out = io.StringIO()
+    led_controller = hal.boot("led_controller")
+    with contextlib.redirect_stdout(out):
+        leds = led_controller.LEDController.from_config(RGB)
+    assert leds.pixel is None and len(leds.pwms) == 3
+    assert "RGB LED unavailable" in out.getvalue()
+
+    hal = Hal()
+    hal.modules["machine"].bitstream = lambda pin, encoding, timing, buf: sent.append(
+        (pin.id, timing, bytes(buf)))
+    sent = []
+    device_module = hal.boot("device", dict(RGB, led_brightness=100))
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+    device.led_on()
+    device.led_off()
+    assert sent[-2:] == [(20, (400, 850, 800, 450), b"\xff\x00\x00"),
+                         (20, (400, 850, 800, 450), b"\x00\x00\x00")]
+
+
+if __name__ == "__main__":
+    test_blinks_run_in_the_background_and_restore_the_base_level()
+    test_errors_preempt_and_lower_priorities_wait_their_turn()
+    test_nothing_in_boot_or_the_command_path_sleeps_for_a_led()
+    test_duty_and_easing_tables_are_precomputed()
+    test_rgb_boards_push_one_grb_word_per_frame_through_pio()
+    test_rgb_falls_back_without_pio_and_uses_bitstream_when_present()
+    print("✅ LED tests passed!")
@@ -0,0 +1,112 @@
+# tools/test_macro.py
+# Login macros: template parsing, compiled report streams and per-slot use
+import contextlib
+import io
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal
+
+LOGIN = "{user}{tab}{pass}{enter}"
+
+
+def test_templates_parse_into_parts():
+    macro = Hal().boot("macro")
+    assert macro.parse(LOGIN) == [("field", "user"), ("text", "\t"), ("field", "pass"), ("text", "\n")]
+    assert macro.parse("{user}{enter}{delay:800}{pass}") == [
+        ("field", "user"), ("text", "\n"), ("delay", 800), ("field", "pass")]
+    assert macro.parse("a{{b}}c") == [("text", "a{b}c")]
+    assert macro.uses(LOGIN, "user") and not macro.uses("{pass}{enter}", "user")
+    for bad in ("{password}", "{totp}", "{delay:x}", "{delay:20000}", "{user", "user}"):
+        try:
+            macro.parse(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} should not parse")
+
+
+def test_compiled_macro_types_in_one_pass():
+    hal = Hal()
+    hid_keyboard = hal.boot("hid_keyboard")
+    macro = sys.modules["macro"]
+    tracebuf = sys.modules["tracebuf"]
+    keyboard = hid_keyboard.USBKeyboard()
+    program = macro.compile("{user}{tab}{delay:300}{pass}{enter}", {"user": "alice", "pass": "s3cret"})
+    tracebuf.buffer.clear()
+    assert keyboard.play_macro(program)
+    keyboard.engine.wait()
+    assert hal.keyboard.typed() == "alice\ts3cret\n"
+    events = [event for _, event, _ in struct.iter_unpack("<IHH", tracebuf.buffer.snapshot())]
+    assert events.count(tracebuf.HID_BEGIN) == 1
+    # the pause sits between TAB's release and the password
+    times = [t for t, _ in hal.keyboard.reports]
+    assert max(b - a for a, b in zip(times, times[1:])) == 300 * 1000
+    program.clear()
+    assert not any(program.reports)
+
+    try:
+        macro.compile(LOGIN, {"pass": "x"})
+    except ValueError as e:
+        assert "{user}" in str(e)
+    else:
+        raise AssertionError("missing {user} should fail")
+
+    keyboard.type_username_password("bob", "pw")
+    assert hal.keyboard.typed().endswith("bob\tpw")
+
+
+def test_slot_macros_compile_at_unlock():
+    hal = Hal()
+    main = hal.boot("main")
+    fs = hal.fs
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        assert device.add_password(0, "s3cret", username="alice", template=LOGIN)
+        assert device.add_password(1, "plain")
+        assert not device.add_password(2, "x", template="{nope}")
+        program = device.programs[0]
+        assert program is not None and device.programs[1] is None
+        device.type_password(0)
+        device.keyboard.engine.wait()
+        device.check_typing()
+    assert hal.keyboard.typed() == "alice\ts3cret\n"
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        device.lock()
+    assert device.programs[0] is None and not any(program.reports)
+
+    # the username is stored encrypted; a reboot recompiles at unlock
+    with open(fs.path("picopass_data.json")) as f:
+        assert "alice" not in f.read()
+    hal = Hal()
+    main = hal.boot("main", fs=fs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        assert device.unlock("master")
+        device.type_password(0)
+        device.keyboard.engine.wait()
+    assert hal.keyboard.typed() == "alice\ts3cret\n"
+
+
+def test_totp_macros_are_rejected():
+    # no clock or TOTP secrets on the board: refused up front, not when typed
+    hal = Hal()
+    main = hal.boot("main")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        assert not device.add_password(0, "pw", template="{pass}{enter}{totp}{enter}")
+    assert "unknown token: {totp}" in out.getvalue()
+    assert device.password_slots[0] is None and device.slot_macros[0] is None
+
+
+if __name__ == "__main__":
+    test_templates_parse_into_parts()
+    test_compiled_macro_types_in_one_pass()
+    test_slot_macros_compile_at_unlock()
+    test_totp_macros_are_rejected()
+    print("✅ Macro tests passed!")
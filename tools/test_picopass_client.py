@@ -0,0 +1,262 @@
+# tools/test_picopass_client.py
+# Exercises the host client against a scripted device on a pseudo-terminal
+import json
+import os
+import pty
+import sys
+import threading
+import time
+import tty
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from picopass_client import (
+    ConnectionClosed,
+    DiscoveredDevice,
+    DiscoveryCache,
+    LatencyHistogram,
+    PicoPassClient,
+    PortInfo,
+    RequestTimeout,
+    candidate_ports,
+    discover,
+    probe_port,
+)
+from picopass_client.transport import FdTransport
+
+
+class FakeDevice:
+    """Answers line-protocol commands on the master side of a pty."""
+
+    def __init__(self, answer):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self.answer = answer
+        self.received = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        buffer = b""
+        while True:
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                return
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                line = line.decode()
+                self.received.append(line)
+                try:
+                    for out in self.answer(line):
+                        os.write(self.master, (out + "\r\n").encode())
+                except OSError:
+                    return  # closed by the test while answering
+
+    def close(self):
+        os.close(self.slave)
+        os.close(self.master)
+
+
+def line_device(line):
+    if line == "PING":
+        return ["[debug] ping", "PONG|ACTIVATED|e660|raspberry_pi_pico|CONFIGURED"]
+    if line == "SLOW":
+        time.sleep(0.3)
+        return ["OK|SLOW"]
+    if line == "INFO":
+        return ['INFO|{"board_id": "a|b"}']
+    if line == "SILENT":
+        return []
+    return [f"ERROR|UNKNOWN_COMMAND|{line}"]
+
+
+def test_line_protocol_pipelining():
+    dev = FakeDevice(line_device)
+    try:
+        with PicoPassClient(dev.path, protocol="line") as client:
+            responses = client.pipeline(["PING"] * 20 + ["INFO", "NOPE"])
+            assert all(r.kind == "PONG" for r in responses[:20])
+            assert responses[20].json() == {"board_id": "a|b"}
+            assert not responses[21].ok
+            assert responses[21].fields == ["UNKNOWN_COMMAND", "NOPE"]
+            assert "[debug] ping" in client.log
+            assert client.latency_by_command["PING"].count == 20
+            assert client.latency.count == 22
+    finally:
+        dev.close()
+
+
+def test_json_protocol():
+    def json_device(line):
+        command = json.loads(line)
+        return ["✓ handled", json.dumps({"status": "PONG", "echo": command["type"]})]
+
+    dev = FakeDevice(json_device)
+    try:
+        with PicoPassClient(dev.path, protocol="json") as client:
+            assert client.call("PING") == {"status": "PONG", "echo": "PING"}
+            assert json.loads(dev.received[0]) == {"type": "PING"}
+    finally:
+        dev.close()
+
+
+def test_timeout_does_not_shift_responses():
+    dev = FakeDevice(line_device)
+    try:
+        with PicoPassClient(dev.path, protocol="line") as client:
+            slow = client.submit("SLOW", timeout=0.1)
+            ping = client.submit("PING")
+            try:
+                slow.result()
+                assert False, "expected a timeout"
+            except RequestTimeout:
+                pass
+            # The late OK|SLOW must not be handed to PING
+            assert ping.result().kind == "PONG"
+    finally:
+        dev.close()
+
+
+def test_typing_events_do_not_consume_requests():
+    def typing_device(line):
+        if line == "VERSION":
+            # a button press finished typing just before VERSION was read
+            return ["OK|TYPING_DONE|usb=12,0", "VERSION|2.0.0"]
+        if line == "CANCEL_TYPING":
+            return ["OK|TYPING_CANCELLED|usb=3,0", "OK|CANCELLED"]
+        return line_device(line)
+
+    dev = FakeDevice(typing_device)
+    events = []
+    try:
+        with PicoPassClient(dev.path, protocol="line", on_event=events.append) as client:
+            responses = client.pipeline(["PING", "VERSION", "CANCEL_TYPING", "INFO"])
+            assert [r.kind for r in responses] == ["PONG", "VERSION", "OK", "INFO"]
+            assert responses[2].fields == ["CANCELLED"]
+            assert [e.raw for e in events] == ["OK|TYPING_DONE|usb=12,0",
+                                               "OK|TYPING_CANCELLED|usb=3,0"]
+            assert "OK|TYPING_DONE|usb=12,0" in client.log
+            assert client.latency.count == 4
+    finally:
+        dev.close()
+
+
+def test_closed_peer_stops_the_reader_and_fails_requests():
+    def unplugging_device(line):
+        if line == "UNPLUG":
+            os.close(dev.master)  # EIO on the slave side from now on
+            return []
+        return line_device(line)
+
+    dev = FakeDevice(unplugging_device)
+    client = PicoPassClient(dev.path, protocol="line", transport=FdTransport(dev.path))
+    try:
+        client.open()
+        assert client.request("PING").kind == "PONG"
+        silent = client.submit("UNPLUG", timeout=30)
+        try:
+            silent.result(timeout=2)
+            assert False, "expected ConnectionClosed"
+        except ConnectionClosed:
+            pass
+        client._reader.join(timeout=2)
+        assert not client._reader.is_alive() and not client.is_open
+    finally:
+        client.close()
+        os.close(dev.slave)
+
+
+def test_histogram():
+    h = LatencyHistogram()
+    for ms in (1, 1, 2, 4, 100):
+        h.record(ms / 1000)
+    assert h.count == 5
+    assert h.min == 0.001 and h.max == 0.1
+    assert h.percentile(50) <= 0.002048
+    assert h.percentile(100) == 0.1
+    assert h.summary()["count"] == 5
+
+
+PROFILES = {
+    "raspberry_pi_pico": {"vid": 11914, "pid": 5},
+    "esp32_s3": {"vid": 12346, "pid": 1},
+}
+
+
+def test_candidate_ports_filters_by_vid_pid():
+    ports = [
+        PortInfo("/dev/ttyACM0", 11914, 5, "E660"),
+        PortInfo("/dev/ttyACM1", 0x0403, 0x6001, "FTDI"),
+        PortInfo("/dev/ttyS0"),
+        PortInfo("/dev/ttyACM2", 12346, 1, "S3"),
+    ]
+    matches = candidate_ports(ports, PROFILES)
+    assert [(p.device, ids) for p, ids in matches] == [
+        ("/dev/ttyACM0", ["raspberry_pi_pico"]),
+        ("/dev/ttyACM2", ["esp32_s3"]),
+    ]
+
+
+def test_discover_probes_in_parallel_and_caches():
+    ports = [PortInfo(f"/dev/ttyACM{i}", 11914, 5, f"SN{i}") for i in range(8)]
+    probed = []
+
+    def slow_probe(port, timeout):
+        probed.append(port.device)
+        time.sleep(0.2)
+        if port.device.endswith(("1", "5")):
+            return DiscoveredDevice(port.device, "json", board_id=port.serial_number)
+        return None
+
+    now = [0.0]
+    cache = DiscoveryCache(ttl=30, clock=lambda: now[0])
+    start = time.monotonic()
+    devices = discover(ports, PROFILES, cache=cache, probe=slow_probe)
+    elapsed = time.monotonic() - start
+    assert [d.port for d in devices] == ["/dev/ttyACM1", "/dev/ttyACM5"]
+    assert devices[0].profiles == ("raspberry_pi_pico",)
+    assert elapsed < 0.6, f"discovery took {elapsed:.2f}s"
+
+    # Cached, positive and negative
+    probed.clear()
+    assert [d.port for d in discover(ports, PROFILES, cache=cache, probe=slow_probe)] == [
+        "/dev/ttyACM1", "/dev/ttyACM5"]
+    assert probed == []
+
+    # A different board on the same port is probed again
+    ports[1] = PortInfo("/dev/ttyACM1", 11914, 5, "OTHER")
+    discover(ports, PROFILES, cache=cache, probe=slow_probe)
+    assert probed == ["/dev/ttyACM1"]
+
+    # Expired
+    probed.clear()
+    now[0] = 31
+    discover(ports, PROFILES, cache=cache, probe=slow_probe)
+    assert len(probed) == 8
+
+
+def test_probe_port_identifies_line_firmware():
+    dev = FakeDevice(line_device)
+    try:
+        found = probe_port(PortInfo(dev.path, 11914, 5, "E660"), timeout=0.5)
+        assert found.protocol == "line"
+        assert found.board_id == "e660"
+        assert found.board_type == "raspberry_pi_pico"
+        assert found.activated is True
+    finally:
+        dev.close()
+
+
+if __name__ == "__main__":
+    test_line_protocol_pipelining()
+    test_json_protocol()
+    test_timeout_does_not_shift_responses()
+    test_typing_events_do_not_consume_requests()
+    test_closed_peer_stops_the_reader_and_fails_requests()
+    test_histogram()
+    test_candidate_ports_filters_by_vid_pid()
+    test_discover_probes_in_parallel_and_caches()
+    test_probe_port_identifies_line_firmware()
+    print("✅ Client tests passed!")
@@ -0,0 +1,86 @@
+# tools/test_picopass_sim.py
+# Drives the real firmware through the pty simulator
+import binascii
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from picopass_client import PicoPassError, fetch_trace
+from picopass_sim import VirtualDevice, decode_reports
+
+
+def read_hid_log(path):
+    with open(path) as f:
+        return [binascii.unhexlify(json.loads(line)["report"]) for line in f]
+
+
+def test_main_firmware_types_stored_password():
+    workdir = tempfile.mkdtemp()
+    hid_log = os.path.join(workdir, "hid.jsonl")
+    with VirtualDevice("main", fsroot=os.path.join(workdir, "flash"), hid_log=hid_log) as dev:
+        client = dev.connect(timeout=5)
+        try:
+            try:
+                fetch_trace(client)
+                raise AssertionError("TRACE_DUMP answered while locked")
+            except PicoPassError as e:
+                assert "locked" in str(e)
+            responses = client.pipeline([
+                {"type": "UNLOCK", "password": "master"},
+                {"type": "ADD_PASSWORD", "slot": 2, "password": "Tr0ub4dor&3"},
+                {"type": "TYPE_PASSWORD", "slot": 2},
+                {"type": "STATUS"},
+            ])
+            # TYPE_PASSWORD returns at once; the typing engine runs on a timer
+            deadline = time.monotonic() + 5
+            while client.call("STATUS")["typing"] and time.monotonic() < deadline:
+                time.sleep(0.02)
+            metrics = client.metrics()
+            events, _ = fetch_trace(client)
+        finally:
+            client.close()
+
+    assert [r.get("status") for r in responses[:3]] == ["ok", "ok", "ok"]
+    assert responses[3]["slots"] == [False, False, True, False]
+    assert decode_reports(read_hid_log(hid_log)) == "Tr0ub4dor&3"
+    probes = metrics["probes"]
+    assert probes["dispatch"]["count"] >= 6  # connect() PINGs first, then STATUS polls
+    assert probes["unlock"]["count"] == probes["type"]["count"] == 1
+    assert probes["save"]["count"] == 2  # master hash, then the slot
+    # 6 packed press reports at 10 ms each, on a real-time clock
+    assert probes["type"]["min_us"] >= 60000
+    # T | r0ub4d | o, or | & | 3: a full report rolls over without a release.
+    # Only report indices are traced, never anything derived from the password.
+    reports = [e.arg for e in events if e.name == "hid_report"]
+    assert reports == list(range(10))
+    assert [e.arg for e in events if e.name == "hid_begin"] == [0]
+    # Persisted to the simulated flash, encrypted
+    with open(os.path.join(workdir, "flash", "picopass_data.json")) as f:
+        data = json.load(f)
+    assert data["slots"][2]["data"] and "Tr0ub4dor" not in json.dumps(data)
+
+
+def test_device_firmware_line_protocol():
+    with VirtualDevice("device") as dev:
+        client = dev.connect(timeout=5)
+        try:
+            version, unknown = client.pipeline(["VERSION", "NOPE"])
+            before = client.metrics(reset=True)
+            after = client.metrics()
+        finally:
+            client.close()
+    assert version.raw == "VERSION|2.0.0"
+    assert unknown.fields == ["UNKNOWN_COMMAND", "NOPE"]
+    assert before["probes"]["dispatch"]["count"] == 3  # PING, VERSION, NOPE
+    # the reset happens after the frame is sent; only that METRICS call remains
+    assert after["probes"]["dispatch"]["count"] == 1
+    assert after["probes"]["type"] == {"count": 0, "min_us": 0, "max_us": 0, "mean_us": 0}
+
+
+if __name__ == "__main__":
+    test_main_firmware_types_stored_password()
+    test_device_firmware_line_protocol()
+    print("✅ Simulator tests passed!")
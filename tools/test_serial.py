@@ -1,32 +1,33 @@
 # tools/test_serial.py
-import serial
-import time
 import sys
 
-def test_communication(port):
+from picopass_client import PicoPassClient, PicoPassError
+
+def run_communication(port, protocol="line"):
     print(f"Connecting to {port}...")
     try:
-        ser = serial.Serial(port, 115200, timeout=1)
-        time.sleep(2) # Wait for Pico to reset
-        
-        # Enviar comando
-        print("Sending PING...")
-        ser.write(b'PING\n')
-        
-        # Receber resposta
-        response = ser.readline().strip()
-        print(f"Response: {response.decode()}")
-        
-        if response == b'PONG':
-            print("✅ Communication OK!")
-            return True
-        else:
-            print("❌ Unexpected response")
-            return False
-    except Exception as e:
+        with PicoPassClient(port, protocol=protocol) as client:
+            print("Sending PING...")
+            response = client.call("PING")
+
+            if protocol == "json":
+                print(f"Response: {response}")
+                ok = response.get("status") == "PONG"
+            else:
+                print(f"Response: {response.raw}")
+                ok = response.kind == "PONG"
+
+            if ok:
+                print("✅ Communication OK!")
+                return True
+            else:
+                print("❌ Unexpected response")
+                return False
+    except (PicoPassError, OSError) as e:
         print(f"❌ Error: {e}")
         return False
 
 if __name__ == "__main__":
     port = "/dev/ttyACM0" if len(sys.argv) < 2 else sys.argv[1]
-    test_communication(port)
+    protocol = "line" if len(sys.argv) < 3 else sys.argv[2]
+    run_communication(port, protocol)
@@ -0,0 +1,74 @@
+# tools/test_trace.py
+# Trace ring buffer (firmware) and its host-side decoder
+import hashlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, VirtualClock
+from picopass_client import PicoPassError, trace
+from picopass_sim import VirtualDevice
+
+
+def test_ring_wraps_and_decodes_across_ticks_wrap():
+    clock = VirtualClock(start_us=(1 << 30) - 250)  # ticks_us wraps mid-trace
+    tracebuf = Hal(clock).import_firmware("tracebuf")
+    ring = tracebuf.TraceBuffer(entries=4)
+    for i in range(6):
+        ring.record(tracebuf.BUTTON, i)
+        clock.advance(100)
+    assert ring.dropped() == 2
+    events = trace.decode_trace(ring.snapshot())
+    assert [e.label() for e in events] == ["2", "3", "4", "5"]
+    assert [e.t_us for e in events] == [0, 100, 200, 300]
+
+
+def test_host_tables_match_firmware():
+    tracebuf = Hal().import_firmware("tracebuf")
+    assert trace.COMMANDS == tracebuf.COMMANDS
+    for event_id, name in trace.EVENTS.items():
+        assert getattr(tracebuf, name.upper()) == event_id
+    assert tracebuf.command_id("VERSION") == trace.COMMANDS.index("VERSION") + 1
+
+
+def activation_key(pong):
+    """The key the app derives for the board in a PONG (see license.py)."""
+    _status, board_id, board_type, _config = pong.fields
+    data = f"{board_id}:{board_type}:PicoPass_Device_Secure_2026"
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+def test_device_trace_dump_renders():
+    with VirtualDevice("device") as dev:
+        client = dev.connect(timeout=5)
+        try:
+            try:
+                trace.fetch_trace(client)
+                raise AssertionError("TRACE_DUMP answered before activation")
+            except PicoPassError as e:
+                assert "NOT_ACTIVATED" in str(e)
+            assert client.call("ACTIVATE", activation_key(client.call("PING"))).ok
+            client.call("VERSION")
+            events, dropped = trace.fetch_trace(client, clear=True)
+            after, _ = trace.fetch_trace(client)
+        finally:
+            client.close()
+    assert dropped == 0
+    commands = [e.label() for e in events if e.name == "cmd_begin"]
+    assert commands[-2:] == ["VERSION", "TRACE_DUMP"]
+    # cleared after the dump: only the end of that TRACE_DUMP and this one
+    assert [e.name for e in after] == ["cmd_end", "cmd_begin"]
+
+    chrome = trace.to_chrome_trace(events)
+    json.dumps(chrome)
+    spans = [ev["name"] for ev in chrome["traceEvents"] if ev["ph"] == "B"]
+    assert "cmd VERSION" in spans
+    assert any("VERSION" in line for line in trace.format_timeline(events))
+
+
+if __name__ == "__main__":
+    test_ring_wraps_and_decodes_across_ticks_wrap()
+    test_host_tables_match_firmware()
+    test_device_trace_dump_renders()
+    print("✅ Trace tests passed!")
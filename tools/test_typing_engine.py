@@ -0,0 +1,214 @@
+# tools/test_typing_engine.py
+# Background typing: the report queue drains on a timer and can be cancelled
+import contextlib
+import io
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, decode_reports
+from picopass_client import LineProtocol, parse_typing
+
+PASSWORD = "correct-horse-battery-staple-42x"
+
+
+def test_typing_runs_in_the_background():
+    hal = Hal()
+    keyboard = hal.boot("hid_keyboard").USBKeyboard()
+    metrics = sys.modules["metrics"]
+    metrics.stats.reset()
+    done = []
+    assert keyboard.start_typing(PASSWORD, on_done=done.append)
+    # only the first report went out; the caller is free
+    assert len(hal.keyboard.reports) == 1 and hal.clock.now_us() == 0
+    assert keyboard.is_typing()
+    polls = 0
+    while keyboard.is_typing():
+        hal.clock.advance_ms(1)  # main loop tick
+        polls += 1
+    assert done == [True]
+    assert hal.keyboard.typed() == PASSWORD
+    assert polls == hal.clock.now_us() // 1000 > 50
+    assert metrics.stats.probe(metrics.TYPE)[0] == 1
+    assert not any(keyboard.engine.queue)  # zeroed after use
+
+
+def test_cancel_releases_every_key():
+    hal = Hal()
+    keyboard = hal.boot("hid_keyboard").USBKeyboard()
+    tracebuf = sys.modules["tracebuf"]
+    tracebuf.buffer.clear()
+    done = []
+    keyboard.start_typing(PASSWORD, on_done=done.append)
+    hal.clock.advance_ms(25)
+    assert keyboard.cancel_typing()
+    sent = len(hal.keyboard.reports)
+    hal.clock.advance_ms(500)
+    assert len(hal.keyboard.reports) == sent  # timer disarmed
+    assert hal.keyboard.reports[-1][1] == bytes(8)
+    typed = hal.keyboard.typed()
+    assert typed and PASSWORD.startswith(typed) and typed != PASSWORD
+    assert done == [False] and not keyboard.cancel_typing()
+    assert not any(keyboard.engine.queue)
+    events = [event for _, event, _ in struct.iter_unpack("<IHH", tracebuf.buffer.snapshot())]
+    assert events[-2:] == [tracebuf.HID_CANCEL, tracebuf.HID_END]
+
+
+def test_lock_and_cancel_typing_abort_mid_stream():
+    hal = Hal()
+    main = hal.boot("main")
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+        device.unlock("master")
+        device.add_password(1, PASSWORD)
+        device.type_password(1)
+        assert device.keyboard.is_typing()
+        hal.clock.advance_ms(20)
+        device.lock()
+    assert not device.keyboard.is_typing()
+    assert hal.keyboard.reports[-1][1] == bytes(8)
+    assert PASSWORD.startswith(decode_reports(r for _, r in hal.keyboard.reports))
+
+    hal = Hal()
+    device_module = hal.boot("device")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device = device_module.PicoPassDevice()
+        device.activated = True
+        device.dispatch("TYPE:" + PASSWORD + "|github")
+        device.type_password()
+        hal.clock.advance_ms(20)
+        device.dispatch("STATUS_PROBE")  # serial keeps being served while typing
+        device.dispatch("CANCEL_TYPING")
+        device.dispatch("CANCEL_TYPING")
+    lines = out.getvalue().splitlines()
+    assert "ERROR|UNKNOWN_COMMAND|STATUS_PROBE" in lines
+    assert lines[-3].startswith("OK|TYPING_CANCELLED|usb=")
+    assert lines[-2:] == ["OK|CANCELLED", "OK|NOT_TYPING"]
+    assert hal.keyboard.reports[-1][1] == bytes(8)
+
+
+def type_on_device(hal, ble=True, password=PASSWORD, usb=True):
+    """TYPE + button on device.py, run to completion; the final reply."""
+    device_module = hal.boot("device")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device = device_module.PicoPassDevice()
+        device.activated = True
+        device.hid.enabled = usb
+        if ble:
+            hal.ble.connect(conn_handle=1)
+        device.dispatch("TYPE:" + password + "|github")
+        device.type_password()
+        while device.is_typing():
+            hal.clock.advance_ms(1)
+        device.check_typing()
+    return LineProtocol().decode(out.getvalue().splitlines()[-1])
+
+
+def test_usb_and_ble_type_in_parallel():
+    hal = Hal()
+    type_on_device(hal, ble=False)
+    usb_alone = hal.keyboard.reports[-1][0] - hal.keyboard.reports[0][0]
+
+    hal = Hal()
+    response = type_on_device(hal)
+    usb = hal.keyboard.reports
+    ble = [(t, data) for t, _, _, data in hal.ble.notifications]
+    assert hal.keyboard.typed() == PASSWORD
+    assert decode_reports(data for _, data in ble) == PASSWORD
+    # both streams start in the same tick and neither waits for the other
+    t0 = usb[0][0]
+    assert ble[0][0] == t0
+    assert usb[-1][0] - t0 == usb_alone
+    assert hal.clock.now_us() - t0 < (usb[-1][0] - t0) + (ble[-1][0] - t0)
+    assert response.fields[0] == "TYPING_DONE"
+    assert parse_typing(response) == {"usb": {"sent": len(usb), "dropped": 0},
+                                      "ble": {"sent": len(ble), "dropped": 0}}
+
+
+def test_send_errors_are_counted_as_drops():
+    hal = Hal()
+    type_on_device(hal, ble=False)
+    total = len(hal.keyboard.reports)
+
+    hal = Hal()
+    failures = []
+
+    def flaky(report):
+        if len(hal.keyboard.reports) == 5 and not failures:
+            failures.append(report)
+            raise OSError(5)  # EIO
+
+    hal.keyboard.on_report = flaky
+    response = type_on_device(hal)
+    assert response.fields[0] == "TYPING_CANCELLED"
+    counters = parse_typing(response)
+    assert counters["usb"] == {"sent": 4, "dropped": total - 4}
+    assert counters["ble"]["dropped"] == 0
+    assert decode_reports(data for _, _, _, data in hal.ble.notifications) == PASSWORD
+
+
+def test_long_passwords_are_queued_in_blocks():
+    # "a" * 200 needs 400 reports (a release between repeated keys): more
+    # than one queue, on both transports
+    password = "a" * 200 + "Ab1"
+    hal = Hal()
+    response = type_on_device(hal, password=password)
+    assert response.fields[0] == "TYPING_DONE"
+    assert hal.keyboard.typed() == password
+    assert decode_reports(data for _, _, _, data in hal.ble.notifications) == password
+    assert len(hal.keyboard.reports) > sys.modules["typing_engine"].DEFAULT_CAPACITY
+
+    hal = Hal()
+    keyboard = hal.boot("hid_keyboard").USBKeyboard()
+    done = []
+    assert keyboard.start_typing(password, on_done=done.append)
+    hal.clock.advance_ms(5000)
+    assert done == [True] and hal.keyboard.typed() == password
+    assert not any(keyboard.engine.queue)  # every block zeroed
+
+    # nothing started: USB off and no BLE connection is not TYPING_DONE
+    hal = Hal()
+    response = type_on_device(hal, ble=False, usb=False)
+    assert response.fields == ["TYPING_CANCELLED"]
+    assert hal.keyboard.reports == []
+
+
+def test_engines_share_one_hardware_timer():
+    # ESP32: Timer(0) objects are one timer; a second engine's init() would
+    # replace the typing callback. Every engine is a slot on timers.scheduler.
+    hal = Hal()
+    machine = hal.modules["machine"]
+    first, second = machine.Timer(0), machine.Timer(0)
+    fired = []
+    first.init(mode=machine.Timer.ONE_SHOT, period=5, callback=lambda t: fired.append(1))
+    second.init(mode=machine.Timer.ONE_SHOT, period=5, callback=lambda t: fired.append(2))
+    hal.clock.advance_ms(10)
+    assert fired == [2]
+
+    keyboard = hal.boot("hid_keyboard").USBKeyboard()
+    leds = hal.import_firmware("led_controller", fresh=False).LEDController()
+    timers = sys.modules["timers"]
+    timers.scheduler.configure(0)
+    done = []
+    assert keyboard.start_typing(PASSWORD, on_done=done.append)
+    for _ in range(10):
+        leds.blink_status(3, 0.01)  # re-arms its one-shot while typing
+        hal.clock.advance_ms(7)
+    hal.clock.advance_ms(2000)
+    assert done == [True] and hal.keyboard.typed() == PASSWORD
+    assert not leds.engine.busy()
+    assert set(hal.hw_timers) == {0}
+
+
+if __name__ == "__main__":
+    test_typing_runs_in_the_background()
+    test_cancel_releases_every_key()
+    test_lock_and_cancel_typing_abort_mid_stream()
+    test_usb_and_ble_type_in_parallel()
+    test_send_errors_are_counted_as_drops()
+    test_long_passwords_are_queued_in_blocks()
+    test_engines_share_one_hardware_timer()
+    print("✅ Typing engine tests passed!")
@@ -0,0 +1,155 @@
+# tools/test_typing_profile.py
+# Typing profiles from device.cfg and the CALIBRATE_TYPING round trip
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from hal_sim import Hal, decode_reports
+from picopass_client import LineProtocol, calibrate_typing
+from picopass_client.calibrate import score
+
+
+def test_profiles_come_from_device_cfg():
+    hal = Hal()
+    hid_keyboard = hal.boot("hid_keyboard", {"typing": {"profile": "safe"}})
+    keyboard = hid_keyboard.USBKeyboard()
+    assert (keyboard.profile.key_ms, keyboard.profile.release_ms, keyboard.profile.pre_ms) == (30, 15, 500)
+    keyboard.type_string("ab")
+    # pre-delay, then the press report; nothing waits after the last release
+    assert hal.clock.now_us() == (500 + 30) * 1000
+    assert hal.keyboard.typed() == "ab"
+
+    hal = Hal()
+    custom = {"typing": {"profile": "kvm", "profiles": {"kvm": {"key_ms": 7}}}}
+    profile = hal.boot("hid_keyboard", custom).USBKeyboard().profile
+    assert (profile.name, profile.key_ms, profile.release_ms, profile.pre_ms) == ("kvm", 7, 0, 0)
+    assert Hal().boot("hid_keyboard").USBKeyboard().profile.key_ms == 10
+
+
+class SampledHost:
+    """A host that polls the keyboard state every poll_us.
+
+    Any state shorter than a poll interval may never be seen, like a VM or
+    RDP session coalescing input: too-short releases eat repeated keys.
+    """
+
+    def __init__(self, keyboard, poll_us=4000):
+        self.keyboard = keyboard
+        self.poll_us = poll_us
+        self.seen = 0
+
+    def read_line(self, timeout):
+        reports = self.keyboard.reports[self.seen:]
+        self.seen = len(self.keyboard.reports)
+        if not reports:
+            return None
+        samples = []
+        t = reports[0][0]
+        i = 0
+        while i < len(reports):
+            while i + 1 < len(reports) and reports[i + 1][0] <= t:
+                i += 1
+            samples.append(reports[i][1])
+            if i == len(reports) - 1:
+                break
+            t += self.poll_us
+        return decode_reports(samples).split("\n")[0]
+
+
+class BoardClient:
+    """Just enough of PicoPassClient to dispatch lines into device.py."""
+
+    protocol = LineProtocol()
+
+    def __init__(self, device):
+        self.device = device
+
+    def call(self, name, *args, timeout=None):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.device.dispatch(self.protocol.build(name, *args))
+        responses = [r for r in map(self.protocol.decode, out.getvalue().splitlines()) if r]
+        return responses[-1]
+
+
+def test_calibration_finds_the_fastest_reliable_delay():
+    hal = Hal()
+    device_module = hal.boot("device")
+    fs = hal.fs
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = device_module.PicoPassDevice()
+    host = SampledHost(hal.keyboard, poll_us=4000)
+    rounds = []
+    result = calibrate_typing(BoardClient(device), host.read_line, 1, 24,
+                              on_round=lambda *r: rounds.append(r))
+
+    delays = [d for d, _, _ in rounds]
+    assert delays[0] == 24  # the slow end is verified first
+    assert len(rounds) <= 7
+    # releases last key_ms // 2 and must survive a 4 ms poll
+    passing = [d for d, got, want in rounds if got == want]
+    failing = [d for d, got, want in rounds if got < want]
+    assert min(passing) == 8 and max(failing) == 7
+    assert result == {"key_ms": 10, "release_ms": 5, "rounds": len(rounds)}  # 25% margin
+
+    with open(fs.path("device.cfg")) as f:
+        saved = json.load(f)["typing"]
+    assert saved == {"profile": "calibrated",
+                     "profiles": {"calibrated": {"key_ms": 10, "release_ms": 5, "pre_ms": 0}}}
+    assert device.hid.profile.key_ms == 10
+    assert device.calibration is None
+    # a CONFIG from the app keeps the calibrated profile
+    device.license._save_config({"led_gpio": 25})
+    assert Hal().boot("hid_keyboard", fs=fs).USBKeyboard().profile.name == "calibrated"
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        device.dispatch("CALIBRATE_RESULT:3")
+    assert "ERROR|NOT_CALIBRATING" in out.getvalue()
+
+
+def test_calibrated_profile_is_reloaded_by_both_firmwares():
+    hal = Hal()
+    main = hal.boot("main")
+    fs = hal.fs
+    with contextlib.redirect_stdout(io.StringIO()):
+        device = main.PicoPassDevice()
+    host = SampledHost(hal.keyboard, poll_us=4000)
+
+    def command(**fields):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            device.handle_serial_command(fields)
+        return json.loads(out.getvalue().splitlines()[-1])
+
+    response = command(type="CALIBRATE_TYPING", min_ms=1, max_ms=24)
+    while response["status"] == "calibrate":
+        got = score(response["text"], host.read_line(1) or "")
+        response = command(type="CALIBRATE_RESULT", received=got)
+    assert response == {"status": "ok", "key_ms": 10, "release_ms": 5}
+
+    # after a reboot, from the same flash
+    with contextlib.redirect_stdout(io.StringIO()):
+        main = Hal().boot("main", fs=fs)
+        assert main.PicoPassDevice().keyboard.profile.key_ms == 10
+        device_module = Hal().boot("device", fs=fs)
+        rebooted = device_module.PicoPassDevice()
+    assert (rebooted.hid.profile.name, rebooted.hid.profile.key_ms) == ("calibrated", 10)
+    assert rebooted.license.config_file == device.config_file
+
+
+def test_score_counts_the_intact_prefix():
+    assert score("abcdef", "abcdef") == 6
+    assert score("abcdef", "abdef") == 2
+    assert score("abcdef", "junkabcdef") == 6
+    assert score("abcdef", "") == 0
+
+
+if __name__ == "__main__":
+    test_profiles_come_from_device_cfg()
+    test_calibration_finds_the_fastest_reliable_delay()
+    test_calibrated_profile_is_reloaded_by_both_firmwares()
+    test_score_counts_the_intact_prefix()
+    print("✅ Typing profile tests passed!")